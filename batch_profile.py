@@ -0,0 +1,322 @@
+# batch_profile.py
+# ------------------------------------------------------------
+# Mode batch (headless) untuk "Profil Perusahaan" di test.py
+# ------------------------------------------------------------
+# Membaca ekspor CRM (CSV/Excel) berisi perusahaan, industri, dan produk,
+# lalu membuat profil dan/atau strategi pendekatan untuk setiap akun dengan
+# prompt yang sama seperti tab "🏷 Profil Perusahaan".
+#
+# - Konkurensi terbatas (--concurrency) + rate limit (--rate, req/menit);
+#   dengan --shared-state (atau SHARED_STATE_URL) rate limit berlaku untuk
+#   gabungan semua proses batch yang berjalan bersamaan
+# - Checkpoint: hasil ditulis baris per baris ke JSONL; run yang terputus
+#   dapat dilanjutkan, akun yang sudah sukses dilewati
+# - Output JSONL atau Parquet (Parquet dibuat dari checkpoint JSONL)
+# - Laporan throughput dalam akun/menit
+#
+# Contoh:
+#   python batch_profile.py akun.csv -o profil.jsonl --task both \
+#       --concurrency 4 --rate 60
+# ------------------------------------------------------------
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import sys
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Dict, Iterator, List, Optional, Set, Union
+
+from dotenv import load_dotenv
+
+from chatbot.providers.task_profiles import task_params
+from chatbot.shared_state import SharedRateLimiter, open_shared_state
+from chatbot.providers.telkom_api import (
+    AUTH_SCHEMES,
+    DEFAULT_ENDPOINTS,
+    SYSTEM_PROMPT,
+    build_profile_prompt,
+    telkom_llm,
+)
+
+TASKS = {"profil": ["profil"], "strategi": ["strategi"], "both": ["profil", "strategi"]}
+_PRODUCT_SPLIT_RE = re.compile(r"\s*[;,|]\s*")
+
+
+class RateLimiter:
+    """Token bucket sederhana: maksimal `rate_per_minute` permintaan per menit"""
+
+    def __init__(self, rate_per_minute: float, burst: int = 1):
+        self.interval = 60.0 / rate_per_minute if rate_per_minute > 0 else 0.0
+        self.capacity = max(burst, 1)
+        self._tokens = float(self.capacity)
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        if not self.interval:
+            return
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(
+                    self.capacity, self._tokens + (now - self._last) / self.interval
+                )
+                self._last = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait_s = (1 - self._tokens) * self.interval
+            time.sleep(wait_s)
+
+
+# --------------------------
+# Input
+# --------------------------
+def read_accounts(path: str, sheet: Optional[str] = None):
+    import pandas as pd
+
+    if path.lower().endswith((".xlsx", ".xls")):
+        df = pd.read_excel(path, sheet_name=sheet or 0, engine="openpyxl")
+    else:
+        df = pd.read_csv(path)
+    # Sel kosong dibaca sebagai NaN → ubah ke string kosong
+    return df.fillna("")
+
+
+def iter_jobs(df, args) -> Iterator[Dict[str, Any]]:
+    for row_no, row in enumerate(df.to_dict(orient="records")):
+        company = str(row.get(args.company_col, "")).strip()
+        if not company:
+            continue
+        industry = str(row.get(args.industry_col, "")).strip()
+        products_raw = str(row.get(args.products_col, "")).strip()
+        products = [p for p in _PRODUCT_SPLIT_RE.split(products_raw) if p]
+        crm = str(row.get(args.crm_col, "")).strip()
+        for task in TASKS[args.task]:
+            yield {
+                "id": job_id(company, industry, products, crm, task),
+                "row": row_no,
+                "company": company,
+                "industry": industry,
+                "products": products,
+                "task": task,
+                "prompt": build_profile_prompt(company, industry, products, crm, task),
+            }
+
+
+def job_id(company: str, industry: str, products: List[str], crm: str, task: str) -> str:
+    # Id stabil dari isi akun → checkpoint tetap valid walau urutan baris berubah
+    raw = json.dumps([company, industry, products, crm, task], ensure_ascii=False)
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()[:16]
+
+
+# --------------------------
+# Checkpoint & output
+# --------------------------
+def checkpoint_path(output: str) -> str:
+    return output if output.endswith(".jsonl") else output + ".jsonl"
+
+
+def load_done_ids(path: str) -> Set[str]:
+    done: Set[str] = set()
+    if not os.path.exists(path):
+        return done
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                rec = json.loads(line)
+            except ValueError:
+                # Baris terakhir bisa terpotong jika proses dihentikan paksa
+                continue
+            if rec.get("status") == "ok":
+                done.add(rec["id"])
+    return done
+
+
+def write_parquet(jsonl_path: str, output: str):
+    import pandas as pd
+
+    records = {}
+    with open(jsonl_path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                rec = json.loads(line)
+            except ValueError:
+                continue
+            # Hasil sukses terbaru untuk tiap id menggantikan percobaan sebelumnya
+            if rec["id"] not in records or rec.get("status") == "ok":
+                records[rec["id"]] = rec
+    pd.DataFrame(list(records.values())).to_parquet(output, index=False)
+
+
+# --------------------------
+# Eksekusi
+# --------------------------
+def run_job(
+    job: Dict[str, Any], args, limiter: Union[RateLimiter, SharedRateLimiter]
+) -> Dict[str, Any]:
+    started = time.monotonic()
+    last_error = ""
+    for attempt in range(1, args.retries + 2):
+        limiter.acquire()
+        try:
+            text = telkom_llm(
+                job["prompt"],
+                SYSTEM_PROMPT,
+                endpoint=args.endpoint,
+                api_key=args.api_key,
+                auth_scheme=args.auth_scheme,
+                timeout=args.timeout,
+                label="profile",
+                **task_params("profile"),
+            )
+        except Exception as e:
+            last_error = f"{type(e).__name__}: {str(e)[:300]}"
+            # Backoff eksponensial sebelum mencoba lagi
+            time.sleep(min(2**attempt, 30))
+            continue
+        return {
+            **{k: v for k, v in job.items() if k != "prompt"},
+            "status": "ok",
+            "result": text,
+            "attempts": attempt,
+            "latency_s": round(time.monotonic() - started, 3),
+        }
+    return {
+        **{k: v for k, v in job.items() if k != "prompt"},
+        "status": "error",
+        "error": last_error,
+        "attempts": args.retries + 1,
+        "latency_s": round(time.monotonic() - started, 3),
+    }
+
+
+def run_batch(args) -> int:
+    df = read_accounts(args.input, args.sheet)
+    ckpt = checkpoint_path(args.output)
+    done = load_done_ids(ckpt)
+    jobs = [j for j in iter_jobs(df, args) if j["id"] not in done]
+    print(
+        f"{len(df)} akun dibaca, {len(done)} tugas sudah selesai (checkpoint), "
+        f"{len(jobs)} tugas dijalankan.",
+        file=sys.stderr,
+    )
+
+    shared = open_shared_state(args.shared_state)
+    limiter: Union[RateLimiter, SharedRateLimiter] = (
+        SharedRateLimiter(shared, "telkom_llm", args.rate, burst=args.concurrency)
+        if shared is not None
+        else RateLimiter(args.rate, burst=args.concurrency)
+    )
+    started = time.monotonic()
+    ok = failed = 0
+    # Satu akun bisa terdiri dari beberapa tugas (profil + strategi)
+    tasks_per_account = len(TASKS[args.task])
+
+    def accounts_per_minute() -> float:
+        elapsed = time.monotonic() - started
+        return ok / tasks_per_account / elapsed * 60 if elapsed else 0.0
+
+    with open(ckpt, "a", encoding="utf-8") as out, ThreadPoolExecutor(
+        max_workers=args.concurrency
+    ) as pool:
+        pending = set()
+        job_iter = iter(jobs)
+
+        # Jumlah tugas yang sedang berjalan dibatasi agar memori tetap kecil
+        def fill():
+            for job in job_iter:
+                pending.add(pool.submit(run_job, job, args, limiter))
+                if len(pending) >= args.concurrency * 2:
+                    break
+
+        fill()
+        while pending:
+            finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for fut in finished:
+                pending.discard(fut)
+                rec = fut.result()
+                # Satu penulis (thread utama) → baris JSONL tidak saling tumpang
+                out.write(json.dumps(rec, ensure_ascii=False) + "\n")
+                out.flush()
+                if rec["status"] == "ok":
+                    ok += 1
+                else:
+                    failed += 1
+                    print(f"✗ {rec['company']} ({rec['task']}): {rec['error']}", file=sys.stderr)
+            print(
+                f"\r{ok + failed}/{len(jobs)} tugas selesai — "
+                f"{accounts_per_minute():.1f} akun/menit",
+                end="",
+                file=sys.stderr,
+            )
+            fill()
+
+    elapsed = time.monotonic() - started
+    print(file=sys.stderr)
+    print(
+        f"Selesai: {ok} sukses, {failed} gagal dalam {elapsed:.1f} detik "
+        f"({accounts_per_minute():.1f} akun/menit).",
+        file=sys.stderr,
+    )
+
+    if args.output.endswith(".parquet"):
+        write_parquet(ckpt, args.output)
+        print(f"Parquet ditulis ke {args.output}", file=sys.stderr)
+    return 1 if failed else 0
+
+
+def parse_args(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(
+        description="Batch Profil Perusahaan / Strategi Pendekatan via Telkom-LLM"
+    )
+    parser.add_argument("input", help="File CSV atau Excel ekspor CRM")
+    parser.add_argument(
+        "-o",
+        "--output",
+        default="profiles.jsonl",
+        help="File hasil (.jsonl, atau .parquet — checkpoint disimpan di <output>.jsonl)",
+    )
+    parser.add_argument("--sheet", help="Nama sheet (untuk Excel)")
+    parser.add_argument("--task", choices=list(TASKS), default="profil")
+    parser.add_argument("--company-col", default="company")
+    parser.add_argument("--industry-col", default="industry")
+    parser.add_argument("--products-col", default="products")
+    parser.add_argument("--crm-col", default="crm")
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument(
+        "--rate", type=float, default=60, help="Maksimal permintaan per menit (0 = tanpa batas)"
+    )
+    parser.add_argument(
+        "--shared-state",
+        default=os.getenv("SHARED_STATE_URL"),
+        help="URL state bersama (sqlite:///... / redis://...) untuk rate limit lintas proses",
+    )
+    parser.add_argument("--retries", type=int, default=2)
+    parser.add_argument("--timeout", type=int, default=120)
+    parser.add_argument(
+        "--endpoint",
+        default=os.getenv("TELKOM_LLM_URL", DEFAULT_ENDPOINTS["TELKOM_LLM"]),
+    )
+    parser.add_argument("--auth-scheme", choices=AUTH_SCHEMES, default="bearer")
+    parser.add_argument("--api-key", default=None, help="Default: GEMINI_API_KEY dari .env")
+    args = parser.parse_args(argv)
+    args.api_key = (args.api_key or os.getenv("GEMINI_API_KEY") or "").strip()
+    return args
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    load_dotenv()
+    args = parse_args(argv)
+    if not args.api_key:
+        print("❌ No API key provided. Set GEMINI_API_KEY atau --api-key.", file=sys.stderr)
+        return 2
+    return run_batch(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,12 @@
+# benchmarks
+# ------------------------------------------------------------
+# Suite benchmark & uji beban aplikasi
+# ------------------------------------------------------------
+# - mock_server : server tiruan Gemini / OpenAI-compatible / Telkom raw
+# - micro       : microbenchmark ekstraksi PDF/Excel dan penyusunan prompt
+# - importtime  : profil waktu impor (cold start) dengan -X importtime
+# - load        : driver sesi bersamaan terhadap endpoint (tiruan atau asli)
+# - report      : persentil latensi, throughput, dan perbandingan baseline
+#
+#   python -m benchmarks all --json hasil.json --baseline baseline.json
+# ------------------------------------------------------------
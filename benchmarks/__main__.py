@@ -0,0 +1,93 @@
+# benchmarks/__main__.py
+# ------------------------------------------------------------
+# CLI suite benchmark
+# ------------------------------------------------------------
+# Contoh:
+#   python -m benchmarks micro
+#   python -m benchmarks import       # profil -X importtime per script
+#   python -m benchmarks load --sessions 1 10 50 --latency 0.1 --token-rate 100
+#   python -m benchmarks all --json hasil.json --baseline baseline.json
+#
+# Tanpa --target, beban diarahkan ke server tiruan lokal. Dengan --baseline,
+# p95 yang naik / throughput yang turun melebihi --threshold dilaporkan
+# sebagai regresi (exit code 1).
+# ------------------------------------------------------------
+
+import argparse
+import sys
+from typing import List, Optional
+
+from benchmarks import importtime, load, micro, report
+from benchmarks.mock_server import MockConfig, MockServer, mock_endpoints
+
+
+def parse_args(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description="Benchmark ConsultBot")
+    parser.add_argument("suite", choices=["micro", "import", "load", "all"], nargs="?", default="all")
+    parser.add_argument("--json", help="Simpan hasil ke file JSON")
+    parser.add_argument("--baseline", help="Bandingkan dengan hasil JSON sebelumnya")
+    parser.add_argument("--threshold", type=float, default=0.2, help="Batas regresi (0.2 = 20%%)")
+
+    micro_group = parser.add_argument_group("micro")
+    micro_group.add_argument("--repeat", type=int, default=10)
+    micro_group.add_argument("--pdf", help="PDF asli (default: PDF sintetis)")
+    micro_group.add_argument("--pdf-pages", type=int, default=20)
+    micro_group.add_argument("--excel", help="Excel asli (default: Excel sintetis)")
+    micro_group.add_argument("--excel-rows", type=int, default=2000)
+    micro_group.add_argument("--only", nargs="+", help="Hanya kasus micro tertentu")
+
+    import_group = parser.add_argument_group("import")
+    import_group.add_argument("--scripts", nargs="+", help="Default: main.py main_telkom.py test.py")
+    import_group.add_argument("--top", type=int, default=15, help="Jumlah modul terlama yang ditampilkan")
+
+    load_group = parser.add_argument_group("load")
+    load_group.add_argument("--sessions", type=int, nargs="+", default=[1, 10, 50])
+    load_group.add_argument("--iterations", type=int, default=20, help="Operasi per sesi")
+    load_group.add_argument("--scenarios", nargs="+", choices=load.SCENARIOS, default=load.SCENARIOS)
+    load_group.add_argument("--target", help="Base URL server (default: server tiruan lokal)")
+    load_group.add_argument("--latency", type=float, default=0.05)
+    load_group.add_argument("--token-rate", type=float, default=200.0)
+    load_group.add_argument("--tokens", type=int, default=64)
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+    results = []
+
+    if args.suite in ("micro", "all"):
+        results += micro.run(args, only=args.only)
+
+    if args.suite in ("import", "all"):
+        results += importtime.run(args, scripts=args.scripts)
+
+    if args.suite in ("load", "all"):
+        server = None
+        if args.target:
+            endpoints = mock_endpoints(args.target)
+        else:
+            server = MockServer(config=MockConfig(args.latency, args.token_rate, args.tokens)).start()
+            endpoints = mock_endpoints(server.url)
+            print(f"Mock server di {server.url}", file=sys.stderr)
+        try:
+            for sessions in args.sessions:
+                results += load.run(endpoints, sessions, args.iterations, args.scenarios)
+        finally:
+            if server:
+                server.stop()
+
+    report.print_table(results)
+    if args.json:
+        report.save(results, args.json)
+    if args.baseline:
+        regressions = report.compare(results, args.baseline, args.threshold)
+        for line in regressions:
+            print(f"REGRESI  {line}", file=sys.stderr)
+        if regressions:
+            return 1
+        print("Tidak ada regresi terhadap baseline.", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
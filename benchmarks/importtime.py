@@ -0,0 +1,118 @@
+# benchmarks/importtime.py
+# ------------------------------------------------------------
+# Profil waktu impor (cold start) via `python -X importtime`
+# ------------------------------------------------------------
+# - Impor tingkat atas setiap script Streamlit (main.py, main_telkom.py,
+#   test.py) diukur di interpreter baru: inilah yang harus selesai sebelum
+#   elemen pertama halaman tampil.
+# - Dependensi berat (SDK provider, parser dokumen) diukur satu per satu.
+# - Laporan: total per script + modul dengan waktu kumulatif terbesar.
+# ------------------------------------------------------------
+
+import ast
+import json
+import os
+import re
+import subprocess
+import sys
+from typing import Any, Dict, List, Optional, Tuple
+
+from benchmarks.report import summarize
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SCRIPTS = ["main.py", "main_telkom.py", "test.py"]
+HEAVY_MODULES = [
+    "streamlit",
+    "google.generativeai",
+    "openai",
+    "langchain",
+    "pandas",
+    "pyarrow",
+    "PyPDF2",
+    "openpyxl",
+    "PIL.Image",
+    "requests",
+]
+
+# "import time:      1234 |       5678 |   package.module"
+_LINE_RE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+
+def startup_imports(script: str) -> List[str]:
+    """Modul yang diimpor di tingkat atas script (bukan di dalam fungsi)"""
+    with open(os.path.join(REPO_DIR, script), encoding="utf-8") as f:
+        tree = ast.parse(f.read())
+    modules = []
+    for node in tree.body:
+        if isinstance(node, ast.Import):
+            modules += [alias.name for alias in node.names]
+        elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+            modules.append(node.module)
+    return modules
+
+
+def parse_importtime(stderr: str) -> List[Tuple[str, int, int, int]]:
+    """Baris -X importtime → (modul, self µs, kumulatif µs, kedalaman)"""
+    rows = []
+    for line in stderr.splitlines():
+        m = _LINE_RE.match(line)
+        if m:
+            rows.append((m.group(4), int(m.group(1)), int(m.group(2)), len(m.group(3)) // 2))
+    return rows
+
+
+def measure(modules: List[str]) -> Tuple[float, List[Tuple[str, int, int, int]], List[str]]:
+    """Mengimpor `modules` di interpreter baru; (detik, baris importtime, modul yang hilang)"""
+    code = (
+        "import importlib, json, sys, time\n"
+        # Penanda: baris importtime sebelum ini milik startup interpreter (site, dll.)
+        "sys.stderr.write('@@start\\n'); sys.stderr.flush()\n"
+        "missing = []\n"
+        "started = time.perf_counter()\n"
+        f"for name in {modules!r}:\n"
+        "    try:\n"
+        "        importlib.import_module(name)\n"
+        "    except ImportError:\n"
+        "        missing.append(name)\n"
+        "print(json.dumps({'seconds': time.perf_counter() - started, 'missing': missing}))\n"
+    )
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=REPO_DIR,
+        capture_output=True,
+        text=True,
+        env={**os.environ, "WARMUP": "0"},
+    )
+    proc.check_returncode()
+    out = json.loads(proc.stdout.strip().splitlines()[-1])
+    rows = parse_importtime(proc.stderr.split("@@start", 1)[-1])
+    return out["seconds"], rows, out["missing"]
+
+
+def top_modules(rows, n: int = 15) -> List[Tuple[str, int, int, int]]:
+    return sorted(rows, key=lambda r: r[2], reverse=True)[:n]
+
+
+def run(args, scripts: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+    results = []
+    repeat = max(args.repeat // 2, 3)
+
+    for script in scripts or SCRIPTS:
+        modules = startup_imports(script)
+        samples, rows, missing = [], [], []
+        for _ in range(repeat):
+            seconds, rows, missing = measure(modules)
+            samples.append(seconds)
+        results.append(summarize("import", script, samples, sum(samples), missing=missing))
+        print(f"\n{script}: impor tingkat atas {', '.join(modules)}", file=sys.stderr)
+        if missing:
+            print(f"  (tidak terpasang, tidak diukur: {', '.join(missing)})", file=sys.stderr)
+        for name, self_us, cum_us, depth in top_modules(rows, args.top):
+            print(f"  {cum_us / 1000:8.1f} ms  {'  ' * depth}{name}", file=sys.stderr)
+
+    for module in HEAVY_MODULES:
+        seconds, _, missing = measure([module])
+        if missing:
+            continue
+        results.append(summarize("import", module, [seconds], seconds))
+    return results
@@ -0,0 +1,172 @@
+# benchmarks/load.py
+# ------------------------------------------------------------
+# Driver beban: N sesi bersamaan, masing-masing menjalankan skenario
+# ------------------------------------------------------------
+# Setiap sesi (thread, seperti thread script Streamlit) menjalankan
+# skenario berulang kali terhadap endpoint (server tiruan atau asli) dengan
+# klien yang sama seperti aplikasi (telkom_api). Latensi per operasi dan
+# waktu token pertama (untuk streaming) dikumpulkan per skenario.
+# ------------------------------------------------------------
+
+import base64
+import json
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+
+import requests
+
+from benchmarks.report import percentile, summarize
+from chatbot.providers.telkom_api import (
+    auth_headers,
+    build_llm_payload,
+    post_json,
+    stream_llm,
+    stt,
+    tts,
+)
+
+SCENARIOS = [
+    "telkom_llm",
+    "telkom_llm_stream",
+    "openai_stream",
+    "gemini_stream",
+    "lmm",
+    "ocr",
+    "od",
+    "stt",
+    "tts",
+]
+
+_SAMPLE_B64 = "data:application/octet-stream;base64," + base64.b64encode(b"\x00" * 2048).decode()
+
+
+def _iter_sse(url: str, payload: Dict[str, Any], headers: Dict[str, str], timeout: int):
+    """Iterasi baris `data:` dari respons SSE (klien HTTP sinkron)"""
+    with requests.post(url, json=payload, headers=headers, timeout=timeout, stream=True) as r:
+        r.raise_for_status()
+        for line in r.iter_lines(decode_unicode=True):
+            if line and line.startswith("data:") and line[5:].strip() != "[DONE]":
+                yield json.loads(line[5:])
+
+
+def scenario_fn(name: str, endpoints: Dict[str, str], api_key: str, timeout: int) -> Callable[[], Optional[float]]:
+    """Fungsi satu operasi; mengembalikan waktu token pertama (detik) bila streaming"""
+    headers = auth_headers(api_key, "bearer")
+    question = "Ringkas peluang SD-WAN untuk pelanggan manufaktur dengan 12 cabang."
+
+    def telkom_llm():
+        post_json(endpoints["TELKOM_LLM"], build_llm_payload(question), headers, timeout)
+
+    def telkom_llm_stream():
+        started = time.perf_counter()
+        first = None
+        for _ in stream_llm(build_llm_payload(question), endpoints["TELKOM_LLM"], headers, timeout):
+            if first is None:
+                first = time.perf_counter() - started
+        return first
+
+    def openai_stream():
+        started = time.perf_counter()
+        first = None
+        payload = {
+            "model": "telkom-ai",
+            "messages": [{"role": "user", "content": question}],
+            "stream": True,
+        }
+        for _ in _iter_sse(endpoints["TELKOM_LLM"] + "/chat/completions", payload, headers, timeout):
+            if first is None:
+                first = time.perf_counter() - started
+        return first
+
+    def gemini_stream():
+        started = time.perf_counter()
+        first = None
+        url = f"{endpoints['GEMINI']}/models/gemini-2.5-flash:streamGenerateContent?alt=sse"
+        payload = {"contents": [{"role": "user", "parts": [{"text": question}]}]}
+        for _ in _iter_sse(url, payload, headers, timeout):
+            if first is None:
+                first = time.perf_counter() - started
+        return first
+
+    def lmm():
+        payload = {"inputs": {"prompt": question, "images": [_SAMPLE_B64]}}
+        post_json(endpoints["LMM"], payload, headers, timeout)
+
+    def ocr():
+        post_json(endpoints["OCR"], {"file_base64": _SAMPLE_B64}, timeout=timeout)
+
+    def od():
+        post_json(endpoints["OD"], {"image_base64": _SAMPLE_B64, "labels": ["rack", "cable"]}, timeout=timeout)
+
+    def speech_to_text():
+        stt(_SAMPLE_B64, endpoints["STT"], timeout=timeout)
+
+    def text_to_speech():
+        tts("Halo, ini uji beban.", endpoints["TTS"], timeout=timeout)
+
+    return {
+        "telkom_llm": telkom_llm,
+        "telkom_llm_stream": telkom_llm_stream,
+        "openai_stream": openai_stream,
+        "gemini_stream": gemini_stream,
+        "lmm": lmm,
+        "ocr": ocr,
+        "od": od,
+        "stt": speech_to_text,
+        "tts": text_to_speech,
+    }[name]
+
+
+def run(
+    endpoints: Dict[str, str],
+    sessions: int,
+    iterations: int,
+    scenarios: List[str],
+    api_key: str = "benchmark",
+    timeout: int = 60,
+) -> List[Dict[str, Any]]:
+    latencies: Dict[str, List[float]] = defaultdict(list)
+    ttfts: Dict[str, List[float]] = defaultdict(list)
+    errors: Dict[str, int] = defaultdict(int)
+    lock = threading.Lock()
+
+    def session(session_no: int):
+        # Skenario digilir agar tiap sesi mencampur beban seperti pengguna nyata
+        for i in range(iterations):
+            name = scenarios[(session_no + i) % len(scenarios)]
+            fn = scenario_fn(name, endpoints, api_key, timeout)
+            t0 = time.perf_counter()
+            try:
+                first = fn()
+            except Exception:
+                with lock:
+                    errors[name] += 1
+                continue
+            elapsed = time.perf_counter() - t0
+            with lock:
+                latencies[name].append(elapsed)
+                if first is not None:
+                    ttfts[name].append(first)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=sessions) as pool:
+        list(pool.map(session, range(sessions)))
+    wall = time.perf_counter() - started
+
+    results = []
+    for name in scenarios:
+        extra: Dict[str, Any] = {"sessions": sessions}
+        if ttfts[name]:
+            extra["ttft_p50_ms"] = round(percentile(ttfts[name], 50) * 1000, 3)
+            extra["ttft_p95_ms"] = round(percentile(ttfts[name], 95) * 1000, 3)
+        results.append(
+            summarize("load", f"{name}@{sessions}", latencies[name], wall, errors[name], **extra)
+        )
+    all_latencies = [x for name in scenarios for x in latencies[name]]
+    results.append(
+        summarize("load", f"total@{sessions}", all_latencies, wall, sum(errors.values()), sessions=sessions)
+    )
+    return results
@@ -0,0 +1,210 @@
+# benchmarks/micro.py
+# ------------------------------------------------------------
+# Microbenchmark: ekstraksi PDF/Excel dan penyusunan prompt
+# ------------------------------------------------------------
+# File uji dibuat secara sintetis (ukuran dapat diatur), atau gunakan file
+# asli lewat --pdf / --excel. Kasus yang dependensinya tidak terpasang
+# dilewati dengan pesan.
+# ------------------------------------------------------------
+
+import io
+import sys
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from benchmarks.report import summarize
+
+_WORDS = (
+    "jaringan layanan pelanggan kontrak tender instalasi perangkat kapasitas "
+    "bandwidth lokasi biaya jadwal dukungan keamanan cloud internet"
+).split()
+
+
+def _sentence(i: int, n_words: int = 12) -> str:
+    return " ".join(_WORDS[(i * 7 + j) % len(_WORDS)] for j in range(n_words))
+
+
+def make_pdf(pages: int = 20, lines_per_page: int = 40) -> bytes:
+    """PDF teks minimal (Helvetica) dengan `pages` halaman"""
+    objects: List[bytes] = []
+    page_ids = [4 + i * 2 for i in range(pages)]
+    objects.append(b"<< /Type /Catalog /Pages 2 0 R >>")
+    kids = " ".join(f"{pid} 0 R" for pid in page_ids)
+    objects.append(f"<< /Type /Pages /Kids [{kids}] /Count {pages} >>".encode())
+    objects.append(b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
+    for p in range(pages):
+        lines = [
+            f"({_sentence(p * lines_per_page + i)}) Tj 0 -14 Td" for i in range(lines_per_page)
+        ]
+        stream = ("BT /F1 10 Tf 40 800 Td " + " ".join(lines) + " ET").encode()
+        objects.append(
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+            f"/Resources << /Font << /F1 3 0 R >> >> /Contents {page_ids[p] + 1} 0 R >>".encode()
+        )
+        objects.append(
+            f"<< /Length {len(stream)} >>\nstream\n".encode() + stream + b"\nendstream"
+        )
+
+    out = io.BytesIO()
+    out.write(b"%PDF-1.4\n")
+    offsets = []
+    for i, obj in enumerate(objects, start=1):
+        offsets.append(out.tell())
+        out.write(f"{i} 0 obj\n".encode() + obj + b"\nendobj\n")
+    xref = out.tell()
+    out.write(f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode())
+    for off in offsets:
+        out.write(f"{off:010d} 00000 n \n".encode())
+    out.write(
+        f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode()
+    )
+    return out.getvalue()
+
+
+def make_excel(rows: int = 2000, cols: int = 8) -> bytes:
+    import pandas as pd
+
+    data = {
+        f"kolom_{c}": (
+            [i * (c + 1) for i in range(rows)]
+            if c % 2
+            else [_WORDS[(i + c) % len(_WORDS)] for i in range(rows)]
+        )
+        for c in range(cols)
+    }
+    buf = io.BytesIO()
+    pd.DataFrame(data).to_excel(buf, index=False, engine="openpyxl")
+    return buf.getvalue()
+
+
+def bench(name: str, fn: Callable[[], Any], repeat: int, warmup: int = 1) -> Dict[str, Any]:
+    for _ in range(warmup):
+        fn()
+    samples = []
+    started = time.perf_counter()
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - t0)
+    return summarize("micro", name, samples, time.perf_counter() - started)
+
+
+def _cases(args) -> Dict[str, Callable[[], Callable[[], Any]]]:
+    """Nama kasus → fungsi penyiap (mengembalikan fungsi yang diukur)"""
+
+    def pdf():
+        from chatbot.ingestion.extractors import extract_text_from_pdf
+
+        data = open(args.pdf, "rb").read() if args.pdf else make_pdf(args.pdf_pages)
+        return lambda: extract_text_from_pdf(data)
+
+    def excel_text():
+        from chatbot.ingestion.extractors import extract_text_from_excel
+
+        data = open(args.excel, "rb").read() if args.excel else make_excel(args.excel_rows)
+        return lambda: extract_text_from_excel(data)
+
+    def excel_markdown():
+        from chatbot.ingestion.extractors import dataframe_to_markdown, extract_text_from_excel
+
+        data = open(args.excel, "rb").read() if args.excel else make_excel(args.excel_rows)
+        df = extract_text_from_excel(data, as_dataframe=True)
+        return lambda: dataframe_to_markdown(df)
+
+    def build_document():
+        from chatbot.ingestion.doc_store import Document
+
+        text = "\n".join(_sentence(i, 20) for i in range(5000))
+        return lambda: Document("k", "doc.pdf", "pdf", text)
+
+    def chat_state():
+        from chatbot.ingestion.doc_store import Document, DocumentStore
+        from chatbot.retrieval.chat_memory import ConversationLog
+        from chatbot.retrieval.knowledge_base import KnowledgeBase
+
+        store = DocumentStore()
+        kb = KnowledgeBase()
+        for d in range(5):
+            text = "\n".join(_sentence(d * 1000 + i, 20) for i in range(2000))
+            kb.add(store.acquire(f"k{d}", lambda t=text, d=d: Document(f"k{d}", f"doc{d}.pdf", "pdf", t)))
+        question = "berapa biaya instalasi perangkat jaringan di lokasi pelanggan"
+        log = ConversationLog()
+        for i in range(20):
+            log.append("user" if i % 2 == 0 else "assistant", _sentence(i, 40))
+        return kb, log, question
+
+    def plan_with_retrieval():
+        from chatbot.pipelines.chat import plan_chat
+
+        kb, log, question = chat_state()
+        return lambda: plan_chat(
+            "telkom-ai", "You are a helpful AI assistant.", question, kb, log
+        )
+
+    def gemini_request_case(prefetched: bool):
+        # Seluruh basis pengetahuan muat di konteks Gemini: dengan prefetch,
+        # teks KB dan prompt sistem sudah dirakit sebelum pertanyaan dikirim
+        def setup():
+            from chatbot.pipelines.chat import PreparedChat, gemini_request, plan_chat
+
+            model, role = "gemini-2.5-flash", "You are a helpful AI assistant."
+            kb, log, question = chat_state()
+            prepared = None
+            if prefetched:
+                prepared = PreparedChat(model, role, kb, log)
+                prepared.full_system_prompt()
+                prepared.gemini_history()
+            return lambda: gemini_request(
+                plan_chat(model, role, question, kb, log, prepared=prepared), prepared
+            )
+
+        return setup
+
+    def chat_request():
+        from chatbot.retrieval.chat_memory import ConversationLog, build_chat_request
+
+        log = ConversationLog()
+        for i in range(200):
+            log.append("user" if i % 2 == 0 else "assistant", _sentence(i, 60))
+        return lambda: build_chat_request(
+            log, "telkom-llm-0.0.4", "Anda asisten Telkom.", "lanjutkan", 1200
+        )
+
+    def telkom_prompts():
+        from chatbot.providers.telkom_api import build_llm_payload, build_profile_prompt
+
+        def run():
+            prompt = build_profile_prompt(
+                "PT Contoh", "Manufaktur", ["SD-WAN", "Cloud/Edge"], "3 site", "profil"
+            )
+            return build_llm_payload(prompt)
+
+        return run
+
+    return {
+        "extract_text_from_pdf": pdf,
+        "extract_text_from_excel": excel_text,
+        "dataframe_to_markdown": excel_markdown,
+        "document_chunk_index": build_document,
+        "plan_context_retrieval": plan_with_retrieval,
+        "gemini_request_cold": gemini_request_case(False),
+        "gemini_request_prefetched": gemini_request_case(True),
+        "build_chat_request": chat_request,
+        "build_profile_payload": telkom_prompts,
+    }
+
+
+def run(args, only: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+    results = []
+    for name, setup in _cases(args).items():
+        if only and name not in only:
+            continue
+        try:
+            fn = setup()
+        except ImportError as e:
+            print(f"skip {name}: {e}", file=sys.stderr)
+            continue
+        # Operasi murah diulang lebih banyak agar persentil stabil
+        repeat = args.repeat * (50 if name in ("build_profile_payload",) else 1)
+        results.append(bench(name, fn, repeat))
+    return results
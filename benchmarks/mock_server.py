@@ -0,0 +1,280 @@
+# benchmarks/mock_server.py
+# ------------------------------------------------------------
+# Server tiruan lokal untuk semua API yang dipakai aplikasi
+# ------------------------------------------------------------
+# Meniru (secukupnya untuk benchmark) format respons:
+# - Gemini      : .../models/<model>:generateContent dan
+#                 :streamGenerateContent?alt=sse
+# - OpenAI-compatible (Telkom AI, main_telkom.py): .../chat/completions
+# - Telkom raw  : Telkom-LLM (JSON / SSE), LMM, OCR, OD, STT, TTS sesuai path
+#                 di DEFAULT_ENDPOINTS
+#
+# Latensi (waktu sampai byte pertama) dan kecepatan token dapat diatur.
+# Server berjalan di atas asyncio (tanpa framework web):
+#   python -m benchmarks.mock_server --port 8765 --latency 0.2 --token-rate 50
+# lalu arahkan endpoint di sidebar test.py ke http://127.0.0.1:8765/...
+# ------------------------------------------------------------
+
+import argparse
+import asyncio
+import base64
+import json
+import threading
+from collections import Counter
+from typing import Any, Dict, Optional, Tuple
+from urllib.parse import urlsplit
+
+from chatbot.providers.telkom_api import DEFAULT_ENDPOINTS
+
+
+class MockConfig:
+    def __init__(self, latency: float = 0.05, token_rate: float = 200.0, tokens: int = 64):
+        # Detik sebelum byte pertama, token per detik, dan panjang jawaban LLM
+        self.latency = latency
+        self.token_rate = token_rate
+        self.tokens = tokens
+
+    @property
+    def token_delay(self) -> float:
+        return 1.0 / self.token_rate if self.token_rate > 0 else 0.0
+
+
+def mock_endpoints(base_url: str) -> Dict[str, str]:
+    """DEFAULT_ENDPOINTS dengan host diganti ke server tiruan (path dipertahankan)"""
+    base_url = base_url.rstrip("/")
+    endpoints = {k: base_url + urlsplit(v).path for k, v in DEFAULT_ENDPOINTS.items()}
+    # Basis API Gemini (REST) dan OpenAI-compatible
+    endpoints["GEMINI"] = base_url + "/v1beta"
+    endpoints["OPENAI"] = base_url + "/v1"
+    return endpoints
+
+
+def _tokens(n: int):
+    return [f"tok{i} " for i in range(n)]
+
+
+class MockServer:
+    """Server HTTP/1.1 (keep-alive, chunked untuk streaming) di thread latar"""
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, config: Optional[MockConfig] = None):
+        self.host = host
+        self.port = port
+        self.config = config or MockConfig()
+        self.requests: Counter = Counter()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._server = None
+        self._ready = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    # --------------------------
+    # Siklus hidup
+    # --------------------------
+    def start(self) -> "MockServer":
+        self._thread = threading.Thread(target=self._run, name="mock-server", daemon=True)
+        self._thread.start()
+        self._ready.wait()
+        return self
+
+    def _run(self):
+        self._loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self._loop)
+        self._server = self._loop.run_until_complete(
+            asyncio.start_server(self._handle, self.host, self.port, backlog=4096)
+        )
+        self.port = self._server.sockets[0].getsockname()[1]
+        self._ready.set()
+        self._loop.run_forever()
+
+    def stop(self):
+        if self._loop is None:
+            return
+        self._loop.call_soon_threadsafe(self._server.close)
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(timeout=5)
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    async def serve_forever(self):
+        """Menjalankan server di event loop pemanggil (mode CLI)"""
+        self._server = await asyncio.start_server(self._handle, self.host, self.port, backlog=4096)
+        self.port = self._server.sockets[0].getsockname()[1]
+        async with self._server:
+            await self._server.serve_forever()
+
+    # --------------------------
+    # HTTP
+    # --------------------------
+    async def _read_request(self, reader) -> Optional[Tuple[str, str, Dict[str, str], bytes]]:
+        try:
+            head = await reader.readuntil(b"\r\n\r\n")
+        except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+            return None
+        lines = head.decode("latin-1").split("\r\n")
+        method, target, _ = lines[0].split(" ", 2)
+        headers = {}
+        for line in lines[1:]:
+            if ":" in line:
+                k, v = line.split(":", 1)
+                headers[k.strip().lower()] = v.strip()
+        body = b""
+        if int(headers.get("content-length", 0)):
+            body = await reader.readexactly(int(headers["content-length"]))
+        return method, target, headers, body
+
+    async def _handle(self, reader, writer):
+        try:
+            while True:
+                request = await self._read_request(reader)
+                if request is None:
+                    break
+                method, target, headers, body = request
+                await self._respond(writer, target, body)
+                if headers.get("connection", "").lower() == "close":
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    @staticmethod
+    def _head(status: str, content_type: str, extra: str = "") -> bytes:
+        return (
+            f"HTTP/1.1 {status}\r\nContent-Type: {content_type}\r\n{extra}\r\n"
+        ).encode()
+
+    async def _send_json(self, writer, obj: Any, status: str = "200 OK"):
+        data = json.dumps(obj).encode()
+        writer.write(self._head(status, "application/json", f"Content-Length: {len(data)}\r\n") + data)
+        await writer.drain()
+
+    async def _send_sse(self, writer, events):
+        writer.write(self._head("200 OK", "text/event-stream", "Transfer-Encoding: chunked\r\n"))
+        for event in events:
+            await asyncio.sleep(self.config.token_delay)
+            data = b"data: " + (event if isinstance(event, bytes) else json.dumps(event).encode()) + b"\n\n"
+            writer.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+            await writer.drain()
+        writer.write(b"0\r\n\r\n")
+        await writer.drain()
+
+    async def _generate_blocking(self) -> str:
+        # Jawaban non-streaming tetap "menghabiskan" waktu generasi semua token
+        await asyncio.sleep(self.config.tokens * self.config.token_delay)
+        return "".join(_tokens(self.config.tokens))
+
+    async def _respond(self, writer, target: str, body: bytes):
+        path = urlsplit(target).path
+        try:
+            payload = json.loads(body) if body else {}
+        except ValueError:
+            payload = {}
+        await asyncio.sleep(self.config.latency)
+        n = self.config.tokens
+        usage = {"prompt_tokens": len(body) // 4, "completion_tokens": n}
+
+        if ":streamGenerateContent" in path:
+            self.requests["gemini_stream"] += 1
+            await self._send_sse(
+                writer,
+                [
+                    {"candidates": [{"content": {"parts": [{"text": t}], "role": "model"}}]}
+                    for t in _tokens(n)
+                ]
+                + [{"usageMetadata": {"promptTokenCount": usage["prompt_tokens"], "candidatesTokenCount": n}}],
+            )
+        elif ":generateContent" in path:
+            self.requests["gemini"] += 1
+            text = await self._generate_blocking()
+            await self._send_json(
+                writer,
+                {
+                    "candidates": [{"content": {"parts": [{"text": text}], "role": "model"}}],
+                    "usageMetadata": {"promptTokenCount": usage["prompt_tokens"], "candidatesTokenCount": n},
+                },
+            )
+        elif path.endswith("/chat/completions"):
+            if payload.get("stream"):
+                self.requests["openai_stream"] += 1
+                chunks = [
+                    {"object": "chat.completion.chunk", "choices": [{"index": 0, "delta": {"content": t}}]}
+                    for t in _tokens(n)
+                ]
+                chunks.append({"object": "chat.completion.chunk", "choices": [], "usage": usage})
+                await self._send_sse(writer, chunks + [b"[DONE]"])
+            else:
+                self.requests["openai"] += 1
+                text = await self._generate_blocking()
+                await self._send_json(
+                    writer,
+                    {
+                        "object": "chat.completion",
+                        "choices": [{"index": 0, "message": {"role": "assistant", "content": text}, "finish_reason": "stop"}],
+                        "usage": usage,
+                    },
+                )
+        elif "Telkom-LLM" in path:
+            if (payload.get("inputs") or {}).get("stream"):
+                self.requests["telkom_llm_stream"] += 1
+                events = [{"outputs": {"token": t}} for t in _tokens(n)]
+                events.append({"outputs": {"usage": usage}})
+                await self._send_sse(writer, events + [b"[DONE]"])
+            else:
+                self.requests["telkom_llm"] += 1
+                text = await self._generate_blocking()
+                await self._send_json(writer, {"outputs": {"text": text, "usage": usage}})
+        elif "LargeMultimodalModel" in path:
+            self.requests["lmm"] += 1
+            text = await self._generate_blocking()
+            await self._send_json(writer, {"outputs": {"text": text}})
+        elif "OCR" in path:
+            self.requests["ocr"] += 1
+            await self._send_json(writer, {"text": "Dokumen tender contoh. " * 200})
+        elif "Object_Detection" in path:
+            self.requests["od"] += 1
+            labels = payload.get("labels") or ["object"]
+            await self._send_json(
+                writer,
+                {"detections": [{"label": label, "score": 0.9, "box": [10, 10, 100, 100]} for label in labels]},
+            )
+        elif "Speech_To_Text" in path:
+            self.requests["stt"] += 1
+            await self._send_json(writer, {"text": "Halo, ini transkrip rekaman contoh. " * 10})
+        elif "Text_To_Speech" in path:
+            self.requests["tts"] += 1
+            audio = base64.b64encode(b"\xff\xf3" + b"\x00" * 4096).decode()
+            await self._send_json(writer, {"audio_base64": f"data:audio/mp3;base64,{audio}"})
+        else:
+            self.requests["not_found"] += 1
+            await self._send_json(writer, {"error": f"unknown path {path}"}, status="404 Not Found")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Server tiruan Gemini / Telkom untuk benchmark")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.05, help="Detik sebelum byte pertama")
+    parser.add_argument("--token-rate", type=float, default=200.0, help="Token per detik")
+    parser.add_argument("--tokens", type=int, default=64, help="Token per jawaban LLM")
+    args = parser.parse_args(argv)
+
+    server = MockServer(args.host, args.port, MockConfig(args.latency, args.token_rate, args.tokens))
+    print(f"Mock server di {server.url}", flush=True)
+    for name, url in mock_endpoints(server.url).items():
+        print(f"  {name:10s} {url}", flush=True)
+    try:
+        asyncio.run(server.serve_forever())
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,89 @@
+# benchmarks/report.py
+# ------------------------------------------------------------
+# Ringkasan hasil benchmark & deteksi regresi terhadap baseline
+# ------------------------------------------------------------
+
+import json
+import math
+from typing import Any, Dict, List, Optional, Sequence
+
+
+def percentile(samples: Sequence[float], q: float) -> float:
+    """Persentil dengan interpolasi linear (q dalam 0–100)"""
+    if not samples:
+        return math.nan
+    ordered = sorted(samples)
+    pos = (len(ordered) - 1) * q / 100
+    lo, hi = math.floor(pos), math.ceil(pos)
+    return ordered[lo] + (ordered[hi] - ordered[lo]) * (pos - lo)
+
+
+def summarize(
+    suite: str,
+    name: str,
+    latencies_s: Sequence[float],
+    elapsed_s: float,
+    errors: int = 0,
+    **extra: Any,
+) -> Dict[str, Any]:
+    """Satu baris hasil: persentil latensi (ms) dan throughput (operasi/detik)"""
+    n = len(latencies_s)
+    return {
+        "suite": suite,
+        "name": name,
+        "n": n,
+        "errors": errors,
+        "p50_ms": round(percentile(latencies_s, 50) * 1000, 3),
+        "p95_ms": round(percentile(latencies_s, 95) * 1000, 3),
+        "p99_ms": round(percentile(latencies_s, 99) * 1000, 3),
+        "throughput": round(n / elapsed_s, 2) if elapsed_s > 0 else 0.0,
+        **extra,
+    }
+
+
+def print_table(results: List[Dict[str, Any]]):
+    header = f"{'suite':6s} {'name':32s} {'n':>6s} {'err':>4s} {'p50 ms':>9s} {'p95 ms':>9s} {'p99 ms':>9s} {'ops/s':>9s}"
+    print(header)
+    print("-" * len(header))
+    for r in results:
+        line = (
+            f"{r['suite']:6s} {r['name']:32s} {r['n']:6d} {r['errors']:4d} "
+            f"{r['p50_ms']:9.2f} {r['p95_ms']:9.2f} {r['p99_ms']:9.2f} {r['throughput']:9.1f}"
+        )
+        if "ttft_p50_ms" in r:
+            line += f"  ttft p50={r['ttft_p50_ms']:.1f}ms p95={r['ttft_p95_ms']:.1f}ms"
+        print(line)
+
+
+def save(results: List[Dict[str, Any]], path: str):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"results": results}, f, indent=2)
+
+
+def compare(
+    results: List[Dict[str, Any]],
+    baseline_path: str,
+    threshold: float = 0.2,
+) -> List[str]:
+    """Daftar regresi: p95 naik atau throughput turun lebih dari `threshold`"""
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = {(r["suite"], r["name"]): r for r in json.load(f)["results"]}
+
+    regressions = []
+    for r in results:
+        base: Optional[Dict[str, Any]] = baseline.get((r["suite"], r["name"]))
+        if not base:
+            continue
+        if base["p95_ms"] and r["p95_ms"] > base["p95_ms"] * (1 + threshold):
+            regressions.append(
+                f"{r['suite']}/{r['name']}: p95 {base['p95_ms']:.2f} → {r['p95_ms']:.2f} ms"
+            )
+        if base["throughput"] and r["throughput"] < base["throughput"] * (1 - threshold):
+            regressions.append(
+                f"{r['suite']}/{r['name']}: throughput {base['throughput']:.1f} → {r['throughput']:.1f} ops/s"
+            )
+        if r["errors"] > base.get("errors", 0):
+            regressions.append(
+                f"{r['suite']}/{r['name']}: errors {base.get('errors', 0)} → {r['errors']}"
+            )
+    return regressions
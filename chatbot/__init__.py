@@ -0,0 +1,17 @@
+# chatbot
+# ------------------------------------------------------------
+# Pustaka inti aplikasi (tanpa Streamlit, kecuali chatbot.ui)
+# ------------------------------------------------------------
+# - ingestion : ekstraksi PDF/Excel, store dokumen & tabel, penyimpanan disk
+# - retrieval : basis pengetahuan per sesi, anggaran token, memori chat, peran
+# - providers : klien Telkom API dan layanan generasi async (Gemini/OpenAI)
+# - pipelines : alur chat, gambar (Site Risk), dan suara (Voice Brief)
+# - session_store : percakapan & artefak pipeline tersimpan (SQLite WAL)
+# - shared_state  : state bersama lintas proses worker (memori / SQLite / Redis)
+# - profiling     : mode profiling per rerun & per tahap (cProfile, tracemalloc)
+# - ui        : komponen Streamlit bersama untuk main.py / main_telkom.py
+#
+# Script di root (main.py, main_telkom.py, test.py) hanya menyusun UI.
+# Paket ini sengaja tidak meng-impor submodulnya di __init__, agar impor
+# dependensi berat tetap malas (lihat chatbot.warmup).
+# ------------------------------------------------------------
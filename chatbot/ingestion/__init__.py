@@ -0,0 +1,11 @@
+# chatbot/ingestion
+# ------------------------------------------------------------
+# Dari file unggahan sampai dokumen terindeks
+# ------------------------------------------------------------
+# - extractors  : teks dari PDF / Excel
+# - uploads     : membangun Document & sinkronisasi uploader → basis pengetahuan
+# - spool       : unggahan sebagai memoryview, batas ukuran & jatah memori
+# - doc_store   : store dokumen bersama lintas sesi (hash konten)
+# - kb_storage  : penyimpanan dokumen & basis pengetahuan di disk (mmap)
+# - table_store : store DataFrame Excel hemat memori
+# ------------------------------------------------------------
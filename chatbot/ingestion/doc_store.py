@@ -0,0 +1,321 @@
+# chatbot/ingestion/doc_store.py
+# ------------------------------------------------------------
+# Penyimpanan dokumen bersama (lintas sesi Streamlit)
+# ------------------------------------------------------------
+# Dokumen disimpan berdasarkan hash konten (sha256 dari byte file),
+# sehingga file yang sama yang diunggah oleh banyak sesi hanya
+# di-parse dan disimpan sekali. Setiap sesi hanya memegang referensi
+# (DocumentRef). Dokumen tanpa referensi dievakuasi secara LRU ketika
+# total memori melewati batas.
+#
+# Dengan beberapa proses worker, `storage` (KB_STORE_DIR) dipakai bersama
+# dan `shared` (SharedState) memberi lease parsing per hash: worker lain yang
+# menerima file yang sama menunggu lalu membuka hasilnya dari disk.
+# ------------------------------------------------------------
+
+import hashlib
+import re
+import sys
+import threading
+import weakref
+from collections import OrderedDict
+from contextlib import nullcontext
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from chatbot.retrieval.token_budget import estimate_tokens
+from chatbot.shared_state import SharedState
+
+# Perkiraan ukuran satu entri indeks (kunci dict + list + int) dalam byte
+_INDEX_ENTRY_BYTES = 64
+_WORD_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def content_hash(data: bytes) -> str:
+    """Menghasilkan hash konten (sha256) dari byte file"""
+    return hashlib.sha256(data).hexdigest()
+
+
+def chunk_text(text: str, max_words: int = 200) -> List[str]:
+    """Memecah teks menjadi potongan (chunk) berdasarkan paragraf, maks `max_words` kata"""
+    chunks: List[str] = []
+    current: List[str] = []
+    current_words = 0
+    for paragraph in text.split("\n"):
+        words = paragraph.split()
+        if not words:
+            continue
+        if current and current_words + len(words) > max_words:
+            chunks.append("\n".join(current))
+            current, current_words = [], 0
+        # Paragraf yang terlalu panjang dipecah per `max_words` kata
+        if len(words) > max_words:
+            while len(words) > max_words:
+                chunks.append(" ".join(words[:max_words]))
+                words = words[max_words:]
+            paragraph = " ".join(words)
+        # Baris pendek disimpan apa adanya agar format tabel tetap terjaga
+        current.append(paragraph.strip())
+        current_words += len(words)
+    if current:
+        chunks.append("\n".join(current))
+    return chunks
+
+
+def build_index(chunks: List[str]) -> Dict[str, List[int]]:
+    """Membangun indeks terbalik sederhana: kata (huruf kecil) → daftar id chunk"""
+    index: Dict[str, List[int]] = {}
+    for chunk_id, chunk in enumerate(chunks):
+        for term in set(_WORD_RE.findall(chunk.lower())):
+            index.setdefault(term, []).append(chunk_id)
+    return index
+
+
+class Document:
+    """Hasil ekstraksi satu file: chunk, indeks, dan (opsional) DataFrame"""
+
+    def __init__(
+        self,
+        key: str,
+        name: str,
+        kind: str,
+        text: str,
+        dataframe: Any = None,
+    ):
+        self.key = key
+        self.name = name
+        self.kind = kind
+        self.dataframe = dataframe
+        self.chunks: Sequence[str] = chunk_text(text)
+        self.index = build_index(self.chunks)
+        self.word_count = sum(len(c.split()) for c in self.chunks)
+        self.nbytes = self._estimate_nbytes()
+
+    @classmethod
+    def from_storage(cls, loaded: Dict[str, Any]) -> "Document":
+        """Membangun dokumen dari hasil `KnowledgeBaseStorage.load_document`"""
+        manifest = loaded["manifest"]
+        doc = cls.__new__(cls)
+        doc.key = manifest["key"]
+        doc.name = manifest["name"]
+        doc.kind = manifest["kind"]
+        doc.dataframe = None
+        doc.chunks = loaded["chunks"]
+        doc.index = loaded["index"]
+        doc.word_count = manifest["word_count"]
+        doc.nbytes = doc._estimate_nbytes()
+        return doc
+
+    @property
+    def token_count(self) -> int:
+        # Dihitung sekali per dokumen (dibagi semua sesi), bukan per pertanyaan
+        count = getattr(self, "_token_count", None)
+        if count is None:
+            count = self._token_count = sum(estimate_tokens(c) for c in self.chunks)
+        return count
+
+    @property
+    def text(self) -> str:
+        # Teks lengkap dirakit dari chunk saat dibutuhkan (tidak disimpan dua kali)
+        return "\n".join(self.chunks)
+
+    def warm(self):
+        """Menyiapkan dokumen untuk retrieval: jumlah token & halaman mmap dimuat"""
+        prefetch = getattr(self.chunks, "prefetch", None)
+        if prefetch is not None:
+            prefetch()
+        return self.token_count
+
+    def _estimate_nbytes(self) -> int:
+        # Chunk yang dipetakan mmap tidak dihitung: halaman dikelola oleh OS
+        size = 0
+        if isinstance(self.chunks, list):
+            size += sum(sys.getsizeof(c) for c in self.chunks)
+        size += sum(len(ids) for ids in self.index.values()) * _INDEX_ENTRY_BYTES
+        if self.dataframe is not None:
+            try:
+                size += int(self.dataframe.memory_usage(deep=True).sum())
+            except Exception:
+                pass
+        return size
+
+
+class DocumentRef:
+    """Referensi milik sesi ke dokumen di store.
+
+    Referensi dilepas otomatis ketika objek ini dibuang oleh garbage collector
+    (misalnya saat session_state Streamlit berakhir), atau secara eksplisit
+    lewat `release()`.
+    """
+
+    def __init__(
+        self, store: "DocumentStore", document: Document, name: Optional[str] = None
+    ):
+        self.document = document
+        # Nama file menurut sesi ini (file yang sama bisa diunggah dengan nama lain)
+        self.name = name or document.name
+        self._finalizer = weakref.finalize(self, store.release, document.key)
+
+    @property
+    def key(self) -> str:
+        return self.document.key
+
+    def release(self):
+        self._finalizer()
+
+
+class DocumentStore:
+    """Store dokumen process-wide dengan reference counting dan evakuasi LRU"""
+
+    # Lease parsing lintas proses (detik); PDF besar dengan OCR bisa lama
+    BUILD_LEASE_TTL = 600
+
+    def __init__(
+        self,
+        max_bytes: int = 512 * 1024 * 1024,
+        storage=None,
+        shared: Optional[SharedState] = None,
+    ):
+        self.max_bytes = max_bytes
+        # KnowledgeBaseStorage opsional: dokumen dibaca dari / ditulis ke disk
+        self.storage = storage
+        self.shared = shared
+        self._docs: "OrderedDict[str, Document]" = OrderedDict()
+        self._refs: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._build_locks: Dict[str, threading.Lock] = {}
+        self.total_bytes = 0
+        # Penghitung diubah di bawah _lock. misses = dokumen tidak ada di
+        # memori (dibaca dari storage atau di-parse); storage_loads = bagian
+        # misses yang cukup dibaca dari storage
+        self.hits = 0
+        self.misses = 0
+        self.storage_loads = 0
+
+    def acquire(
+        self,
+        key: str,
+        builder: Callable[[], Optional[Document]],
+        name: Optional[str] = None,
+    ) -> Optional[DocumentRef]:
+        """Mengambil referensi dokumen; `builder` hanya dipanggil jika dokumen belum ada.
+
+        Sesi lain yang meminta hash yang sama secara bersamaan menunggu hasil
+        parsing yang sedang berjalan alih-alih mem-parse ulang.
+        """
+        doc = self._get_and_ref(key)
+        if doc is not None:
+            return DocumentRef(self, doc, name=name)
+        with self._lock:
+            build_lock = self._build_locks.setdefault(key, threading.Lock())
+        try:
+            with build_lock:
+                doc = self._get_and_ref(key)
+                if doc is not None:
+                    # Sesi lain baru selesai mem-parse selama kita menunggu
+                    return DocumentRef(self, doc, name=name)
+                doc = self._load_from_storage(key)
+                from_storage = doc is not None
+                if doc is None:
+                    with self._shared_build(key):
+                        # Worker lain mungkin baru selesai mem-parse file yang sama
+                        doc = self._load_from_storage(key)
+                        from_storage = doc is not None
+                        if doc is None:
+                            doc = builder()
+                            if doc is None:
+                                return None
+                            self._save_to_storage(doc)
+                # Miss dihitung hanya jika dokumen didapat (dari storage atau builder)
+                self._put_and_ref(doc, from_storage=from_storage)
+        finally:
+            # Juga saat builder gagal / mengembalikan None: kunci tidak boleh tertinggal
+            with self._lock:
+                self._build_locks.pop(key, None)
+        return DocumentRef(self, doc, name=name)
+
+    def release(self, key: str):
+        with self._lock:
+            count = self._refs.get(key, 0) - 1
+            if count > 0:
+                self._refs[key] = count
+            else:
+                self._refs.pop(key, None)
+            self._evict_locked()
+
+    def get(self, key: str) -> Optional[Document]:
+        return self._get(key)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "documents": len(self._docs),
+                "referenced": len(self._refs),
+                "total_bytes": self.total_bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "storage_loads": self.storage_loads,
+            }
+
+    def _shared_build(self, key: str):
+        # Lease hanya berguna jika hasil parsing ditulis ke storage bersama
+        if self.shared is None or self.storage is None:
+            return nullcontext()
+        return self.shared.lock(f"doc_build:{key}", ttl=self.BUILD_LEASE_TTL)
+
+    def _load_from_storage(self, key: str) -> Optional[Document]:
+        if self.storage is None:
+            return None
+        loaded = self.storage.load_document(key)
+        return Document.from_storage(loaded) if loaded else None
+
+    def _save_to_storage(self, doc: Document):
+        if self.storage is None:
+            return
+        try:
+            self.storage.save_document(doc)
+        except OSError:
+            # Kegagalan menulis cache disk tidak boleh menggagalkan unggahan
+            pass
+
+    def _get(self, key: str) -> Optional[Document]:
+        with self._lock:
+            doc = self._docs.get(key)
+            if doc is not None:
+                self._docs.move_to_end(key)
+            return doc
+
+    def _get_and_ref(self, key: str) -> Optional[Document]:
+        with self._lock:
+            doc = self._docs.get(key)
+            if doc is not None:
+                self._docs.move_to_end(key)
+                self._refs[key] = self._refs.get(key, 0) + 1
+                self.hits += 1
+            return doc
+
+    def _put_and_ref(self, doc: Document, from_storage: bool = False):
+        with self._lock:
+            self.misses += 1
+            if from_storage:
+                self.storage_loads += 1
+            if doc.key not in self._docs:
+                self.total_bytes += doc.nbytes
+            self._docs[doc.key] = doc
+            self._docs.move_to_end(doc.key)
+            # Referensi dicatat sebelum evakuasi agar dokumen baru tidak langsung dibuang
+            self._refs[doc.key] = self._refs.get(doc.key, 0) + 1
+            self._evict_locked()
+
+    def _evict_locked(self):
+        # Hanya dokumen tanpa referensi yang boleh dievakuasi; dokumen yang
+        # masih dipakai sesi tetap tinggal walaupun batas terlampaui.
+        if self.total_bytes <= self.max_bytes:
+            return
+        for key in list(self._docs):
+            if self.total_bytes <= self.max_bytes:
+                break
+            if self._refs.get(key):
+                continue
+            doc = self._docs.pop(key)
+            self.total_bytes -= doc.nbytes
@@ -0,0 +1,192 @@
+# chatbot/ingestion/extractors.py
+# ------------------------------------------------------------
+# Ekstraksi teks dari file unggahan (PDF / Excel)
+# ------------------------------------------------------------
+# Dipakai oleh main.py dan main_telkom.py, dan dapat diimpor tanpa
+# Streamlit (misal oleh benchmark). Error tidak ditangkap di sini;
+# pemanggil (UI) yang menampilkannya.
+#
+# PDF hibrida (extract_pdf_hybrid): teks diambil dari text layer lokal per
+# halaman; hanya halaman yang tampak hasil scan (teks sangat sedikit atau
+# tidak terbaca, dan memuat gambar) yang dikirim ke OCR, lalu digabung
+# sesuai urutan halaman. Halaman kosong tanpa gambar tidak dikirim.
+# ------------------------------------------------------------
+
+import io
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import BinaryIO, Callable, Dict, List, Optional, Union
+
+from chatbot.ingestion.spool import ViewReader
+from chatbot.profiling import bind, stage
+
+FileInput = Union[bytes, memoryview, BinaryIO]
+
+# Halaman dengan teks lebih sedikit dari ini dianggap hasil scan
+OCR_MIN_CHARS = int(os.getenv("PDF_OCR_MIN_CHARS", "40"))
+# Proporsi huruf/angka minimum; di bawahnya teks biasanya encoding font yang rusak
+OCR_MIN_ALNUM_RATIO = 0.5
+
+
+def _as_stream(file: FileInput) -> BinaryIO:
+    # Byte / memoryview dibaca lewat ViewReader (tanpa salinan ke BytesIO);
+    # UploadedFile Streamlit dibaca langsung dari awal
+    if isinstance(file, (bytes, bytearray, memoryview)):
+        return ViewReader(memoryview(file))
+    if hasattr(file, "seek"):
+        file.seek(0)
+    return file
+
+
+def _pdf_reader(pdf_file: FileInput):
+    import PyPDF2
+
+    return PyPDF2.PdfReader(_as_stream(pdf_file))
+
+
+def extract_text_from_pdf(pdf_file: FileInput) -> str:
+    """Mengekstrak teks semua halaman PDF (langsung dari memori, tanpa file sementara)"""
+    text = ""
+    # Loop setiap halaman dalam PDF untuk mengambil teksnya
+    for page in _pdf_reader(pdf_file).pages:
+        text += page.extract_text() + "\n"
+    return text
+
+
+def needs_ocr(text: str) -> bool:
+    """Heuristik halaman hasil scan: teks terlalu sedikit atau sebagian besar bukan huruf/angka"""
+    chars = "".join(text.split())
+    if len(chars) < OCR_MIN_CHARS:
+        return True
+    alnum = sum(1 for c in chars if c.isalnum())
+    return alnum / len(chars) < OCR_MIN_ALNUM_RATIO
+
+
+def _has_images(resources, depth: int = 0) -> bool:
+    """True jika resource halaman memuat XObject gambar (juga di dalam Form XObject)"""
+    if resources is None or depth > 3:
+        return False
+    resources = resources.get_object()
+    xobjects = resources.get("/XObject")
+    if xobjects is None:
+        return False
+    for xobject in xobjects.get_object().values():
+        xobject = xobject.get_object()
+        subtype = xobject.get("/Subtype")
+        if subtype == "/Image":
+            return True
+        if subtype == "/Form" and _has_images(xobject.get("/Resources"), depth + 1):
+            return True
+    return False
+
+
+def page_has_images(page) -> bool:
+    """Memeriksa dictionary resource saja; gambar tidak di-decode"""
+    try:
+        return _has_images(page.get("/Resources"))
+    except Exception:
+        # Struktur PDF rusak: anggap bisa berisi gambar agar tetap di-OCR
+        return True
+
+
+def _page_pdf(reader, index: int) -> bytes:
+    """PDF satu halaman (untuk dikirim ke OCR tanpa halaman lain)"""
+    import PyPDF2
+
+    writer = PyPDF2.PdfWriter()
+    writer.add_page(reader.pages[index])
+    buf = io.BytesIO()
+    writer.write(buf)
+    return buf.getvalue()
+
+
+class PdfText:
+    """Teks per halaman + rincian halaman yang di-OCR"""
+
+    def __init__(self, pages: List[str], total_bytes: int):
+        self.pages = pages
+        self.total_bytes = total_bytes
+        self.ocr_pages: List[int] = []
+        self.ocr_bytes = 0
+        # Nomor halaman → error OCR (teks lokal dipakai sebagai gantinya)
+        self.ocr_errors: Dict[int, Exception] = {}
+
+    @property
+    def text(self) -> str:
+        return "".join(page + "\n" for page in self.pages)
+
+
+def extract_pdf_hybrid(
+    pdf_file: FileInput,
+    ocr_fn: Optional[Callable[[bytes], str]] = None,
+    max_workers: int = 4,
+) -> PdfText:
+    """Text layer lokal per halaman; halaman hasil scan dikirim ke `ocr_fn` (PDF satu halaman → teks).
+
+    Tanpa `ocr_fn` hanya text layer yang dipakai. Halaman dengan teks sedikit
+    tanpa gambar (kosong / pemisah) tidak di-OCR. Halaman di-OCR secara
+    konkuren; halaman yang OCR-nya gagal tetap memakai teks lokalnya.
+    """
+    if isinstance(pdf_file, (bytes, bytearray, memoryview)):
+        data = memoryview(pdf_file)
+    else:
+        data = memoryview(_as_stream(pdf_file).read())
+    reader = _pdf_reader(data)
+    result = PdfText([page.extract_text() or "" for page in reader.pages], data.nbytes)
+    if ocr_fn is None:
+        return result
+
+    scanned = [
+        i
+        for i, text in enumerate(result.pages)
+        if needs_ocr(text) and page_has_images(reader.pages[i])
+    ]
+    if not scanned:
+        return result
+    # PDF satu halaman dikirim apa adanya (tanpa ditulis ulang)
+    if len(result.pages) == 1:
+        parts = [(0, data)]
+    else:
+        parts = [(i, _page_pdf(reader, i)) for i in scanned]
+
+    def run(part):
+        index, page_bytes = part
+        try:
+            with stage("ocr_page"):
+                return index, ocr_fn(page_bytes), None
+        except Exception as e:
+            return index, None, e
+
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(parts)))) as pool:
+        # bind(): tahap OCR per halaman ikut tercatat di profil rerun pemanggil
+        for index, text, error in pool.map(bind(run), parts):
+            if error is not None:
+                result.ocr_errors[index] = error
+                continue
+            result.pages[index] = (text or "").strip()
+            result.ocr_pages.append(index)
+    result.ocr_bytes = sum(len(b) for _, b in parts)
+    return result
+
+
+def extract_text_from_excel(excel_file: FileInput, as_dataframe: bool = False):
+    """Membaca sheet pertama Excel sebagai DataFrame atau teks baris per baris"""
+    import pandas as pd
+
+    df = pd.read_excel(_as_stream(excel_file), engine="openpyxl")
+    if as_dataframe:
+        return df
+    text = ""
+    for index, row in df.iterrows():
+        text += " ".join(str(cell) for cell in row) + "\n"
+    return text
+
+
+def dataframe_to_markdown(df) -> str:
+    """Tabel markdown (format GitHub) untuk basis pengetahuan"""
+    try:
+        import tabulate
+
+        return tabulate.tabulate(df, headers="keys", tablefmt="github", showindex=False)
+    except ImportError:
+        return df.to_markdown(index=False)
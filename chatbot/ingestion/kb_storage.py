@@ -0,0 +1,214 @@
+# chatbot/ingestion/kb_storage.py
+# ------------------------------------------------------------
+# Format persisten basis pengetahuan di disk
+# ------------------------------------------------------------
+# Setiap dokumen disimpan dalam direktori <root>/docs/<hash>/:
+#   chunks.bin    → teks semua chunk (UTF-8) disambung dalam satu file
+#   offsets.bin   → array uint64 berisi offset awal tiap chunk (+ offset akhir)
+#   index.json    → indeks terbalik (kata → daftar id chunk)
+#   manifest.json → metadata + hash konten chunks.bin
+#
+# chunks.bin dibuka dengan mmap sehingga teks chunk baru dibaca dari disk
+# (page-in) ketika benar-benar diakses. Server yang di-restart dapat membuka
+# ulang dokumen yang sudah pernah diproses tanpa mem-parse PDF lagi.
+#
+# Basis pengetahuan bernama disimpan di <root>/kb/<nama>.json sebagai daftar
+# hash dokumen + nama file.
+# ------------------------------------------------------------
+
+import hashlib
+import json
+import mmap
+import os
+import re
+import shutil
+import tempfile
+import time
+from array import array
+from typing import Any, Dict, List, Optional, Sequence
+
+FORMAT_VERSION = 1
+_SAFE_NAME_RE = re.compile(r"[^A-Za-z0-9_.-]+")
+
+
+class MappedChunks(Sequence):
+    """Daftar chunk read-only yang dibaca malas (lazy) dari file mmap"""
+
+    def __init__(self, chunks_path: str, offsets: array):
+        self._offsets = offsets
+        self._file = open(chunks_path, "rb")
+        size = os.fstat(self._file.fileno()).st_size
+        # mmap tidak bisa memetakan file kosong
+        self._mm = (
+            mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            if size
+            else b""
+        )
+
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self)))]
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError("chunk index out of range")
+        start, end = self._offsets[i], self._offsets[i + 1]
+        return self._mm[start:end].decode("utf-8")
+
+    def prefetch(self):
+        """Meminta OS memuat halaman chunk ke page cache (tanpa menunggu)"""
+        if isinstance(self._mm, mmap.mmap) and hasattr(mmap, "MADV_WILLNEED"):
+            self._mm.madvise(mmap.MADV_WILLNEED)
+
+    def close(self):
+        if isinstance(self._mm, mmap.mmap):
+            self._mm.close()
+        self._file.close()
+
+    def __del__(self):
+        try:
+            self.close()
+        except Exception:
+            pass
+
+
+class KnowledgeBaseStorage:
+    """Menyimpan dan membuka dokumen / basis pengetahuan dalam format persisten"""
+
+    def __init__(self, root: str):
+        self.root = root
+        self.docs_dir = os.path.join(root, "docs")
+        self.kb_dir = os.path.join(root, "kb")
+        os.makedirs(self.docs_dir, exist_ok=True)
+        os.makedirs(self.kb_dir, exist_ok=True)
+
+    # --------------------------
+    # Dokumen
+    # --------------------------
+    def has_document(self, key: str) -> bool:
+        return os.path.exists(os.path.join(self.docs_dir, key, "manifest.json"))
+
+    def save_document(self, document) -> None:
+        """Menulis dokumen secara atomik (direktori sementara lalu rename)"""
+        final_dir = os.path.join(self.docs_dir, document.key)
+        if os.path.exists(final_dir):
+            return
+
+        tmp_dir = tempfile.mkdtemp(prefix=".tmp-", dir=self.docs_dir)
+        try:
+            offsets = array("Q", [0])
+            digest = hashlib.sha256()
+            with open(os.path.join(tmp_dir, "chunks.bin"), "wb") as f:
+                for chunk in document.chunks:
+                    data = chunk.encode("utf-8")
+                    f.write(data)
+                    digest.update(data)
+                    offsets.append(offsets[-1] + len(data))
+            with open(os.path.join(tmp_dir, "offsets.bin"), "wb") as f:
+                offsets.tofile(f)
+            with open(os.path.join(tmp_dir, "index.json"), "w", encoding="utf-8") as f:
+                json.dump(document.index, f, separators=(",", ":"))
+
+            manifest = {
+                "version": FORMAT_VERSION,
+                "key": document.key,
+                "name": document.name,
+                "kind": document.kind,
+                "word_count": document.word_count,
+                "chunk_count": len(document.chunks),
+                "chunks_sha256": digest.hexdigest(),
+                "created_at": time.time(),
+            }
+            # Manifest ditulis terakhir: direktori tanpa manifest dianggap tidak valid
+            with open(os.path.join(tmp_dir, "manifest.json"), "w", encoding="utf-8") as f:
+                json.dump(manifest, f, indent=2)
+
+            os.replace(tmp_dir, final_dir)
+        except OSError:
+            # Direktori tujuan bisa dibuat proses lain lebih dulu
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            if not os.path.exists(final_dir):
+                raise
+
+    def load_document(self, key: str, verify: bool = False) -> Optional[Dict[str, Any]]:
+        """Membuka dokumen tersimpan; teks chunk dipetakan dengan mmap (lazy).
+
+        Mengembalikan dict berisi manifest, chunks (MappedChunks), dan index,
+        atau None jika dokumen tidak ada / rusak.
+        """
+        doc_dir = os.path.join(self.docs_dir, key)
+        try:
+            with open(os.path.join(doc_dir, "manifest.json"), encoding="utf-8") as f:
+                manifest = json.load(f)
+            if manifest.get("version") != FORMAT_VERSION:
+                return None
+
+            offsets = array("Q")
+            offsets_path = os.path.join(doc_dir, "offsets.bin")
+            with open(offsets_path, "rb") as f:
+                offsets.fromfile(f, os.path.getsize(offsets_path) // offsets.itemsize)
+
+            chunks_path = os.path.join(doc_dir, "chunks.bin")
+            if (
+                len(offsets) != manifest["chunk_count"] + 1
+                or offsets[-1] != os.path.getsize(chunks_path)
+            ):
+                return None
+            if verify and _file_sha256(chunks_path) != manifest["chunks_sha256"]:
+                return None
+
+            with open(os.path.join(doc_dir, "index.json"), encoding="utf-8") as f:
+                index = json.load(f)
+        except (OSError, ValueError, KeyError):
+            return None
+
+        return {
+            "manifest": manifest,
+            "chunks": MappedChunks(chunks_path, offsets),
+            "index": index,
+        }
+
+    # --------------------------
+    # Basis pengetahuan bernama
+    # --------------------------
+    def list_knowledge_bases(self) -> List[str]:
+        return sorted(
+            f[: -len(".json")] for f in os.listdir(self.kb_dir) if f.endswith(".json")
+        )
+
+    def save_knowledge_base(self, name: str, documents: List[Dict[str, str]]) -> str:
+        """Menyimpan daftar dokumen ({"key", "name"}) sebagai basis pengetahuan bernama"""
+        safe_name = _SAFE_NAME_RE.sub("_", name).strip("._") or "default"
+        manifest = {
+            "version": FORMAT_VERSION,
+            "name": name,
+            "documents": documents,
+            "saved_at": time.time(),
+        }
+        path = os.path.join(self.kb_dir, f"{safe_name}.json")
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(tmp_path, path)
+        return safe_name
+
+    def load_knowledge_base(self, name: str) -> List[Dict[str, str]]:
+        path = os.path.join(self.kb_dir, f"{name}.json")
+        try:
+            with open(path, encoding="utf-8") as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            return []
+        # Abaikan dokumen yang datanya sudah tidak ada di disk
+        return [d for d in manifest.get("documents", []) if self.has_document(d["key"])]
+
+
+def _file_sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
@@ -0,0 +1,199 @@
+# chatbot/ingestion/spool.py
+# ------------------------------------------------------------
+# Unggahan berukuran besar dengan memori terbatas
+# ------------------------------------------------------------
+# - SpooledUpload: isi unggahan sebagai memoryview tanpa salinan tambahan.
+#   UploadedFile Streamlit / BytesIO sudah berada di memori, jadi langsung
+#   dibaca lewat getbuffer(). Stream lain disalin per blok: di memori hingga
+#   UPLOAD_SPOOL_MB, selebihnya ke file sementara yang dibaca lewat mmap.
+# - Batas per file (UPLOAD_MAX_MB) diperiksa sebelum file diproses.
+# - MemoryBudget: jatah memori kerja per proses (UPLOAD_MEMORY_BUDGET_MB)
+#   untuk salinan turunan (halaman PDF, base64, teks). Jika jatah habis,
+#   pemrosesan berikutnya menunggu (backpressure) alih-alih menambah RSS.
+# - ViewReader: file-like read-only di atas memoryview untuk parser
+#   (PyPDF2, openpyxl, PIL, wave) tanpa menyalin ke BytesIO.
+# ------------------------------------------------------------
+
+import io
+import mmap
+import os
+import tempfile
+import threading
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional
+
+MB = 1024 * 1024
+
+UPLOAD_MAX_BYTES = int(os.getenv("UPLOAD_MAX_MB", "200")) * MB
+SPOOL_MEMORY_BYTES = int(os.getenv("UPLOAD_SPOOL_MB", "8")) * MB
+PROCESS_BUDGET_BYTES = int(os.getenv("UPLOAD_MEMORY_BUDGET_MB", "512")) * MB
+# Batas waktu menunggu jatah memori sebelum menyerah (detik)
+BUDGET_WAIT_S = float(os.getenv("UPLOAD_BUDGET_WAIT_S", "120"))
+# Perkiraan memori kerja per byte file (base64 ≈ 1.34×, halaman & teks hasil parse)
+WORKING_SET_FACTOR = 2
+_COPY_BLOCK = 1 * MB
+
+
+class ViewReader(io.RawIOBase):
+    """File-like read-only di atas memoryview (read/seek/tell tanpa salinan penuh)"""
+
+    def __init__(self, view: memoryview):
+        self._view = view
+        self._pos = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        n = max(min(len(buffer), len(self._view) - self._pos), 0)
+        buffer[:n] = self._view[self._pos : self._pos + n]
+        self._pos += n
+        return n
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        if whence == io.SEEK_CUR:
+            offset += self._pos
+        elif whence == io.SEEK_END:
+            offset += len(self._view)
+        self._pos = max(offset, 0)
+        return self._pos
+
+    def tell(self) -> int:
+        return self._pos
+
+
+class MemoryBudget:
+    """Jatah byte memori kerja bersama satu proses; reserve() menunggu jika habis"""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.in_use = 0
+        self.waits = 0
+        self._cond = threading.Condition()
+
+    @contextmanager
+    def reserve(self, nbytes: int, timeout: Optional[float] = BUDGET_WAIT_S):
+        # File yang lebih besar dari seluruh jatah tetap boleh diproses, sendirian
+        nbytes = min(nbytes, self.max_bytes)
+        with self._cond:
+            if self.in_use + nbytes > self.max_bytes:
+                self.waits += 1
+            if not self._cond.wait_for(
+                lambda: self.in_use + nbytes <= self.max_bytes, timeout
+            ):
+                raise TimeoutError(
+                    "Server sedang memproses unggahan lain; coba lagi sebentar lagi."
+                )
+            self.in_use += nbytes
+        try:
+            yield
+        finally:
+            with self._cond:
+                self.in_use -= nbytes
+                self._cond.notify_all()
+
+    def stats(self) -> Dict[str, int]:
+        with self._cond:
+            return {"in_use": self.in_use, "max_bytes": self.max_bytes, "waits": self.waits}
+
+
+# Jatah bersama semua sesi dalam proses server
+_budget = MemoryBudget(PROCESS_BUDGET_BYTES)
+
+
+def upload_budget() -> MemoryBudget:
+    return _budget
+
+
+class SpooledUpload:
+    """Isi satu unggahan sebagai memoryview (`view`); tutup dengan close() / `with`"""
+
+    def __init__(
+        self,
+        source: Any,
+        max_bytes: int = UPLOAD_MAX_BYTES,
+        spool_bytes: int = SPOOL_MEMORY_BYTES,
+    ):
+        self.name = getattr(source, "name", "upload")
+        self._file = None
+        self._mmap = None
+        if isinstance(source, (bytes, bytearray, memoryview)):
+            self.view = memoryview(source)
+        elif hasattr(source, "getbuffer"):
+            # UploadedFile Streamlit / BytesIO: sudah di memori, dibaca tanpa salinan
+            self.view = source.getbuffer()
+        else:
+            self.view = self._spool(source, max_bytes, spool_bytes)
+        self.nbytes = self.view.nbytes
+        if self.nbytes > max_bytes:
+            self.close()
+            raise ValueError(self._too_large(max_bytes))
+
+    def _too_large(self, max_bytes: int) -> str:
+        return f"File {self.name} melebihi batas ukuran unggahan ({max_bytes // MB} MB)."
+
+    def _spool(self, source, max_bytes: int, spool_bytes: int) -> memoryview:
+        buffer = io.BytesIO()
+        on_disk = False
+        total = 0
+        while True:
+            block = source.read(_COPY_BLOCK)
+            if not block:
+                break
+            total += len(block)
+            # Dihentikan lebih awal: file terlalu besar tidak disalin seluruhnya
+            if total > max_bytes:
+                buffer.close()
+                raise ValueError(self._too_large(max_bytes))
+            if total > spool_bytes and not on_disk:
+                disk = tempfile.TemporaryFile(prefix="upload-")
+                disk.write(buffer.getbuffer())
+                buffer.close()
+                buffer, on_disk = disk, True
+            buffer.write(block)
+        self._file = buffer
+        if not on_disk:
+            return buffer.getbuffer()
+        buffer.flush()
+        # Halaman file sementara dikelola page cache OS, bukan heap Python
+        self._mmap = mmap.mmap(buffer.fileno(), 0, access=mmap.ACCESS_READ)
+        return memoryview(self._mmap)
+
+    def reader(self) -> ViewReader:
+        """File-like baru di atas isi unggahan (untuk parser yang butuh stream)"""
+        return ViewReader(self.view)
+
+    def close(self):
+        try:
+            self.view.release()
+            if self._mmap is not None:
+                self._mmap.close()
+            if self._file is not None:
+                self._file.close()
+        except BufferError:
+            # Masih ada memoryview turunan yang hidup; dilepas oleh GC
+            pass
+
+    def __enter__(self) -> "SpooledUpload":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+@contextmanager
+def open_upload(
+    source: Any,
+    max_bytes: int = UPLOAD_MAX_BYTES,
+    budget: Optional[MemoryBudget] = None,
+) -> Iterator[SpooledUpload]:
+    """SpooledUpload + jatah memori kerja selama blok `with` berjalan"""
+    upload = SpooledUpload(source, max_bytes=max_bytes)
+    try:
+        with (budget or _budget).reserve(upload.nbytes * WORKING_SET_FACTOR):
+            yield upload
+    finally:
+        upload.close()
@@ -0,0 +1,190 @@
+# chatbot/ingestion/table_store.py
+# ------------------------------------------------------------
+# Penyimpanan tabel (DataFrame dari Excel) yang hemat memori
+# ------------------------------------------------------------
+# - Tabel dikunci dengan hash konten file: unggahan ulang tidak
+#   menambah salinan baru.
+# - Tipe kolom diperkecil (downcast): string berulang → category,
+#   int64/float64 → tipe numerik terkecil yang muat.
+# - Jika total memori melewati batas, tabel yang paling lama tidak
+#   dipakai dipindahkan (spill) ke file Parquet dan dibaca kembali
+#   dengan memory-map saat dibutuhkan. Tanpa pyarrow, tabel tersebut
+#   dibuang dari memori.
+# ------------------------------------------------------------
+
+import os
+import threading
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Any, Dict, List, Optional
+
+if TYPE_CHECKING:
+    # pandas baru diimpor saat tabel pertama disimpan (impor berat)
+    import pandas as pd
+
+# Kolom teks dijadikan category jika rasio nilai unik ≤ ambang ini
+CATEGORY_MAX_UNIQUE_RATIO = 0.5
+
+
+def optimize_dataframe(df: "pd.DataFrame") -> "pd.DataFrame":
+    """Memperkecil tipe data kolom DataFrame tanpa mengubah nilainya"""
+    import pandas as pd
+
+    df = df.copy()
+    for col in df.columns:
+        series = df[col]
+        if pd.api.types.is_integer_dtype(series):
+            df[col] = pd.to_numeric(series, downcast="integer")
+        elif pd.api.types.is_float_dtype(series):
+            downcast = pd.to_numeric(series, downcast="float")
+            # float32 bisa kehilangan presisi; downcast hanya jika nilainya tetap sama
+            if downcast.astype(series.dtype).equals(series):
+                df[col] = downcast
+        elif series.dtype == object and len(series) > 0:
+            try:
+                unique_ratio = series.nunique(dropna=False) / len(series)
+            except TypeError:
+                # Sel berisi objek yang tidak bisa di-hash (list, dict, ...)
+                continue
+            if unique_ratio <= CATEGORY_MAX_UNIQUE_RATIO:
+                df[col] = series.astype("category")
+    return df
+
+
+def dataframe_nbytes(df: "pd.DataFrame") -> int:
+    return int(df.memory_usage(deep=True).sum())
+
+
+def _parquet_available() -> bool:
+    try:
+        import pyarrow  # noqa: F401
+        import pyarrow.parquet  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+class TableEntry:
+    def __init__(self, key: str, name: str, df: "pd.DataFrame"):
+        self.key = key
+        self.name = name
+        self.df: Optional["pd.DataFrame"] = df
+        self.rows, self.cols = df.shape
+        self.nbytes = dataframe_nbytes(df)
+        self.path: Optional[str] = None
+
+    @property
+    def location(self) -> str:
+        return "memory" if self.df is not None else "disk"
+
+
+class TableStore:
+    """Store tabel process-wide: deduplikasi hash, downcast, dan spill ke Parquet"""
+
+    def __init__(
+        self, max_bytes: int = 256 * 1024 * 1024, spill_dir: Optional[str] = None
+    ):
+        self.max_bytes = max_bytes
+        # Spill hanya aktif jika direktori diberikan dan pyarrow tersedia
+        self.spill_dir = spill_dir if spill_dir and _parquet_available() else None
+        if self.spill_dir:
+            os.makedirs(self.spill_dir, exist_ok=True)
+        self._tables: "OrderedDict[str, TableEntry]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.memory_bytes = 0
+
+    def put(self, key: str, name: str, df: "pd.DataFrame") -> TableEntry:
+        """Menyimpan tabel; jika hash sudah ada, entri lama dipakai ulang"""
+        with self._lock:
+            entry = self._tables.get(key)
+            if entry is not None:
+                self._tables.move_to_end(key)
+                return entry
+
+        entry = TableEntry(key, name, optimize_dataframe(df))
+        with self._lock:
+            if key in self._tables:
+                return self._tables[key]
+            self._tables[key] = entry
+            self.memory_bytes += entry.nbytes
+            self._spill_locked()
+        return entry
+
+    def get(self, key: str) -> Optional["pd.DataFrame"]:
+        """Mengambil DataFrame; tabel yang sudah di-spill dibaca via memory-map"""
+        with self._lock:
+            entry = self._tables.get(key)
+            if entry is not None:
+                self._tables.move_to_end(key)
+                if entry.df is not None:
+                    return entry.df
+                path = entry.path
+            else:
+                path = self._spill_path(key)
+                if path is None or not os.path.exists(path):
+                    return None
+
+        import pyarrow.parquet as pq
+
+        # Tabel dari disk tidak dimasukkan lagi ke memori store
+        return pq.read_table(path, memory_map=True).to_pandas()
+
+    def __contains__(self, key: str) -> bool:
+        with self._lock:
+            if key in self._tables:
+                return True
+        path = self._spill_path(key)
+        return path is not None and os.path.exists(path)
+
+    def memory_report(self, keys: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+        """Ringkasan per tabel: nama, ukuran, dan lokasi (memory/disk)"""
+        with self._lock:
+            entries = [
+                e for k, e in self._tables.items() if keys is None or k in keys
+            ]
+            return [
+                {
+                    "name": e.name,
+                    "rows": e.rows,
+                    "columns": e.cols,
+                    "bytes": e.nbytes,
+                    "location": e.location,
+                }
+                for e in entries
+            ]
+
+    def _spill_path(self, key: str) -> Optional[str]:
+        if not self.spill_dir:
+            return None
+        return os.path.join(self.spill_dir, f"{key}.parquet")
+
+    def _spill_locked(self):
+        # Tabel terbaru tidak pernah di-spill agar bisa langsung dipakai
+        for entry in list(self._tables.values())[:-1]:
+            if self.memory_bytes <= self.max_bytes:
+                break
+            if entry.df is None:
+                continue
+            if self._write_parquet(entry):
+                entry.df = None
+            else:
+                # Tanpa spill (pyarrow tidak ada / tipe kolom tidak didukung)
+                # tabel dibuang agar memori tetap terbatas
+                del self._tables[entry.key]
+            self.memory_bytes -= entry.nbytes
+
+    def _write_parquet(self, entry: TableEntry) -> bool:
+        path = self._spill_path(entry.key)
+        if path is None:
+            return False
+        if not os.path.exists(path):
+            tmp_path = path + ".tmp"
+            try:
+                entry.df.to_parquet(tmp_path, engine="pyarrow", index=False)
+            except Exception:
+                # Kolom campuran (misal angka + teks) tidak bisa ditulis ke Parquet
+                if os.path.exists(tmp_path):
+                    os.unlink(tmp_path)
+                return False
+            os.replace(tmp_path, path)
+        entry.path = path
+        return True
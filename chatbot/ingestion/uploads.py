@@ -0,0 +1,149 @@
+# chatbot/ingestion/uploads.py
+# ------------------------------------------------------------
+# File unggahan → Document → basis pengetahuan sesi
+# ------------------------------------------------------------
+# - build_document(): ekstraksi PDF / Excel menjadi Document (DataFrame
+#   Excel disimpan di TableStore bersama). PDF memakai text layer lokal;
+#   halaman hasil scan dikirim ke `ocr_fn` bila diberikan.
+# - sync_uploads(): menyamakan basis pengetahuan sesi dengan isi uploader
+#   (tambah, ganti versi, hapus) tanpa mem-parse ulang file yang sudah ada.
+#
+# Tidak bergantung pada Streamlit: file cukup memiliki atribut `name`,
+# `type`, `file_id` dan berupa stream biner (seperti UploadedFile).
+# Isi file dibaca sebagai memoryview lewat spool (tanpa salinan byte
+# tambahan), dengan batas ukuran per file dan jatah memori per proses.
+# Error ekstraksi tidak ditangkap di sini; pemanggil (UI) yang menampilkannya.
+# ------------------------------------------------------------
+
+import logging
+from typing import Any, Callable, Dict, List, Optional
+
+from chatbot.ingestion import extractors
+from chatbot.ingestion.doc_store import Document, DocumentStore, content_hash
+from chatbot.ingestion.spool import SpooledUpload, open_upload
+from chatbot.ingestion.table_store import TableStore
+from chatbot.profiling import stage
+from chatbot.retrieval.knowledge_base import KnowledgeBase
+
+logger = logging.getLogger("uploads")
+
+PDF_TYPES = {"application/pdf"}
+EXCEL_TYPES = {
+    "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    "application/vnd.ms-excel",
+}
+
+
+def document_kind(mime: str) -> Optional[str]:
+    if mime in PDF_TYPES:
+        return "pdf"
+    if mime in EXCEL_TYPES:
+        return "excel"
+    return None
+
+
+def build_document(
+    key: str,
+    name: str,
+    mime: str,
+    file: Any,
+    table_store: TableStore,
+    ocr_fn: Optional[Callable[[bytes], str]] = None,
+) -> Optional[Document]:
+    """Mengekstrak file unggahan menjadi Document; None jika tipe tidak didukung / kosong"""
+    kind = document_kind(mime)
+    if kind is None:
+        return None
+
+    # Parser membaca memoryview isi file; pemrosesan menunggu jika jatah
+    # memori kerja proses sedang habis dipakai unggahan lain
+    with open_upload(file) as upload:
+        if kind == "pdf":
+            with stage("pdf_extract"):
+                pdf = extractors.extract_pdf_hybrid(upload.view, ocr_fn)
+            if pdf.ocr_pages:
+                logger.info(
+                    "%s: OCR %d/%d halaman (%d dari %d byte)",
+                    name, len(pdf.ocr_pages), len(pdf.pages), pdf.ocr_bytes, pdf.total_bytes,
+                )
+            for page, error in pdf.ocr_errors.items():
+                logger.warning("%s: OCR halaman %d gagal: %s", name, page + 1, error)
+            pdf_text = pdf.text
+            if pdf_text.strip():
+                return Document(key, name, "pdf", pdf_text)
+
+        elif kind == "excel":
+            with stage("excel_read"):
+                excel_df = extractors.extract_text_from_excel(upload.reader(), as_dataframe=True)
+            if excel_df is not None:
+                # Simpan DataFrame (versi hemat memori) di store tabel bersama
+                table_store.put(key, name, excel_df)
+                excel_df = table_store.get(key)
+                with stage("excel_markdown"):
+                    excel_text = extractors.dataframe_to_markdown(excel_df)
+                return Document(key, name, "excel", excel_text)
+
+    return None
+
+
+def sync_uploads(
+    kb: KnowledgeBase,
+    store: DocumentStore,
+    files: List[Any],
+    hashes: Dict[str, str],
+    build: Callable[[str, Any], Optional[Document]],
+    on_process: Optional[Callable[[Any], None]] = None,
+    on_reject: Optional[Callable[[Any, Exception], None]] = None,
+) -> int:
+    """Menyamakan basis pengetahuan dengan isi uploader; mengembalikan jumlah file baru.
+
+    `hashes` (file_id → hash konten) milik sesi dan diperbarui di tempat,
+    sehingga isi file hanya di-hash sekali per unggahan. `build(key, file)`
+    hanya dipanggil untuk dokumen yang belum ada di store bersama. File yang
+    melebihi batas ukuran dilewati dan dilaporkan ke `on_reject`.
+    """
+    accepted, uploaded_keys = [], []
+    for uploaded_file in files:
+        key = hashes.get(uploaded_file.file_id)
+        if key is None:
+            try:
+                with SpooledUpload(uploaded_file) as upload:
+                    key = content_hash(upload.view)
+            except ValueError as e:
+                if on_reject is not None:
+                    on_reject(uploaded_file, e)
+                continue
+            hashes[uploaded_file.file_id] = key
+        accepted.append(uploaded_file)
+        uploaded_keys.append(key)
+    files = accepted
+
+    processed = 0
+    for uploaded_file, key in zip(files, uploaded_keys):
+        # Lewati file yang sudah ada di basis pengetahuan sesi ini
+        if key in kb:
+            continue
+        if on_process is not None:
+            on_process(uploaded_file)
+        ref = store.acquire(
+            key,
+            lambda f=uploaded_file, k=key: build(k, f),
+            name=uploaded_file.name,
+        )
+        if ref is None:
+            continue
+        # File dengan nama sama tapi isi berbeda menggantikan versi lamanya
+        old_key = kb.find_by_name(uploaded_file.name, source="upload")
+        if old_key is not None and old_key not in uploaded_keys:
+            kb.replace(old_key, ref)
+        else:
+            kb.add(ref)
+        processed += 1
+
+    # File yang dihapus dari uploader juga dihapus dari basis pengetahuan
+    kb.sync_source("upload", uploaded_keys)
+    live_ids = {f.file_id for f in files}
+    for file_id in list(hashes):
+        if file_id not in live_ids:
+            del hashes[file_id]
+    return processed
@@ -0,0 +1,9 @@
+# chatbot/pipelines
+# ------------------------------------------------------------
+# Alur kerja yang menggabungkan retrieval dan provider
+# ------------------------------------------------------------
+# - chat           : rencana konteks → permintaan Gemini / OpenAI
+# - image_pipeline : perkecil foto Site Risk & cache hasil OD/LMM
+# - sections       : keluaran JSON per bagian template Consultative Selling
+# - voice_pipeline : STT per segmen, TTS per kalimat
+# ------------------------------------------------------------
@@ -0,0 +1,198 @@
+# chatbot/pipelines/chat.py
+# ------------------------------------------------------------
+# Alur chat main.py / main_telkom.py: rencana konteks → permintaan provider
+# ------------------------------------------------------------
+# - PreparedChat / ChatPrefetch: bagian permintaan yang tidak bergantung
+#   pada pertanyaan (riwayat, teks basis pengetahuan, prompt sistem dengan
+#   seluruh basis pengetahuan, riwayat format Gemini) disiapkan di thread
+#   latar setiap kali peran, basis pengetahuan, atau riwayat berubah.
+# - plan_chat(): anggaran token untuk prompt peran, basis pengetahuan,
+#   riwayat, dan pertanyaan. Saat pertanyaan dikirim, hanya retrieval
+#   yang bergantung pada pertanyaan dan perencanaan yang tersisa.
+# - gemini_request() / openai_messages(): format permintaan per provider.
+# ------------------------------------------------------------
+
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+from chatbot.profiling import bind, stage
+from chatbot.retrieval.chat_memory import ConversationLog
+from chatbot.retrieval.knowledge_base import KnowledgeBase
+from chatbot.retrieval.prompts import with_knowledge_base
+from chatbot.retrieval.token_budget import (
+    DEFAULT_OUTPUT_RESERVE,
+    ContextPlan,
+    get_context_limit,
+    plan_context,
+)
+
+logger = logging.getLogger("chat")
+
+# Thread persiapan spekulatif, bersama untuk semua sesi
+_prefetch_pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="chat-prefetch")
+
+
+def prepare_key(
+    model: str, role_prompt: str, kb: Optional[KnowledgeBase], log: ConversationLog
+) -> Tuple:
+    """Kunci keadaan yang menentukan isi PreparedChat (versi KB naik di setiap perubahan)"""
+    kb_state = (id(kb), kb.version) if kb is not None else None
+    return (model, role_prompt, kb_state, id(log), len(log))
+
+
+class PreparedChat:
+    """Bagian permintaan chat yang tidak bergantung pada pertanyaan"""
+
+    def __init__(
+        self,
+        model: str,
+        role_prompt: str,
+        kb: Optional[KnowledgeBase],
+        log: ConversationLog,
+    ):
+        self.key = prepare_key(model, role_prompt, kb, log)
+        self.role_prompt = role_prompt
+        self.history, self.history_tokens = log.window()
+        self.has_kb = kb is not None and len(kb) > 0
+        # Teks lengkap hanya dirakit jika mungkin muat di jendela konteks model
+        self.kb_tokens = kb.text_tokens() if self.has_kb else 0
+        fits = self.has_kb and self.kb_tokens <= get_context_limit(model)
+        self.kb_text: Optional[str] = kb.text() if fits else None
+        # Basis pengetahuan diubah di tengah persiapan → hasil tidak dipakai
+        self.consistent = prepare_key(model, role_prompt, kb, log) == self.key
+        self._full_system_prompt: Optional[str] = None
+        self._gemini_history: Optional[List[Dict[str, Any]]] = None
+
+    def matches(
+        self, model: str, role_prompt: str, kb: Optional[KnowledgeBase], log: ConversationLog
+    ) -> bool:
+        return self.consistent and self.key == prepare_key(model, role_prompt, kb, log)
+
+    def full_system_prompt(self) -> Optional[str]:
+        """Prompt sistem bila seluruh basis pengetahuan lolos anggaran"""
+        if self._full_system_prompt is None and self.kb_text is not None:
+            self._full_system_prompt = with_knowledge_base(self.role_prompt, self.kb_text)
+        return self._full_system_prompt
+
+    def gemini_history(self) -> List[Dict[str, Any]]:
+        if self._gemini_history is None:
+            self._gemini_history = [_gemini_message(msg) for msg in self.history]
+        return self._gemini_history
+
+
+def _prepare(
+    model: str, role_prompt: str, kb: Optional[KnowledgeBase], log: ConversationLog
+) -> PreparedChat:
+    with stage("chat_prefetch"):
+        if kb is not None:
+            for ref in list(kb):
+                ref.document.warm()
+        prepared = PreparedChat(model, role_prompt, kb, log)
+        prepared.full_system_prompt()
+        prepared.gemini_history()
+    return prepared
+
+
+class ChatPrefetch:
+    """Persiapan PreparedChat yang berjalan di latar; hasil dipakai hanya jika keadaan sama"""
+
+    def __init__(
+        self,
+        model: str,
+        role_prompt: str,
+        kb: Optional[KnowledgeBase],
+        log: ConversationLog,
+    ):
+        self.key = prepare_key(model, role_prompt, kb, log)
+        self._future = _prefetch_pool.submit(bind(_prepare), model, role_prompt, kb, log)
+
+    def matches(
+        self, model: str, role_prompt: str, kb: Optional[KnowledgeBase], log: ConversationLog
+    ) -> bool:
+        return self.key == prepare_key(model, role_prompt, kb, log)
+
+    def result(self) -> Optional[PreparedChat]:
+        """PreparedChat (menunggu jika belum selesai); None jika persiapan gagal"""
+        try:
+            prepared = self._future.result()
+        except Exception:
+            # Misal basis pengetahuan diubah saat sedang dibaca; dihitung ulang inline
+            logger.debug("persiapan chat gagal", exc_info=True)
+            return None
+        return prepared if prepared.consistent else None
+
+
+def plan_chat(
+    model: str,
+    role_prompt: str,
+    question: str,
+    kb: Optional[KnowledgeBase],
+    log: ConversationLog,
+    prepared: Optional[PreparedChat] = None,
+    max_output_tokens: int = DEFAULT_OUTPUT_RESERVE,
+) -> ContextPlan:
+    """Rencana konteks: seluruh basis pengetahuan bila muat, jika tidak chunk yang relevan.
+
+    `log` belum berisi pertanyaan saat ini. `prepared` (hasil prefetch) dipakai
+    jika masih sesuai dengan peran, basis pengetahuan, dan riwayat saat ini.
+    `max_output_tokens` (batas jawaban TaskProfile) dicadangkan dari jendela konteks.
+    """
+    if prepared is None or not prepared.matches(model, role_prompt, kb, log):
+        prepared = PreparedChat(model, role_prompt, kb, log)
+    fits = prepared.kb_text is not None
+    return plan_context(
+        model,
+        role_prompt,
+        question,
+        context_candidates=kb.retrieve(question) if prepared.has_kb else None,
+        context_full=prepared.kb_text,
+        context_full_tokens=prepared.kb_tokens if fits else None,
+        history=prepared.history,
+        history_token_counts=prepared.history_tokens,
+        max_output_tokens=max_output_tokens,
+    )
+
+
+def system_prompt(plan: ContextPlan, prepared: Optional[PreparedChat] = None) -> str:
+    """Prompt sistem peran + konteks basis pengetahuan yang lolos anggaran"""
+    if (
+        prepared is not None
+        and prepared.kb_text is not None
+        and len(plan.context) == 1
+        and plan.context[0] is prepared.kb_text
+        and plan.system_prompt == prepared.role_prompt
+    ):
+        # Seluruh basis pengetahuan terpakai: prompt sudah dirakit saat prefetch
+        return prepared.full_system_prompt()
+    return with_knowledge_base(plan.system_prompt, plan.context_text())
+
+
+def _gemini_message(msg: Dict[str, str]) -> Dict[str, Any]:
+    return {"role": "user" if msg["role"] == "user" else "model", "parts": [msg["content"]]}
+
+
+def gemini_request(plan: ContextPlan, prepared: Optional[PreparedChat] = None) -> Dict[str, Any]:
+    """Argumen gemini_stream; prompt sistem dikirim sebagai system_instruction"""
+    if prepared is not None:
+        # plan.history selalu akhiran (pesan terbaru) dari riwayat yang disiapkan
+        kept = len(plan.history)
+        history = prepared.gemini_history()[len(prepared.history) - kept:] if kept else []
+    else:
+        history = [_gemini_message(msg) for msg in plan.history]
+    return {
+        "system_prompt": system_prompt(plan, prepared),
+        "history": history,
+        "question": plan.question,
+    }
+
+
+def openai_messages(
+    plan: ContextPlan, prepared: Optional[PreparedChat] = None
+) -> List[Dict[str, str]]:
+    """Pesan OpenAI-compatible: prompt sistem, riwayat yang lolos anggaran, pertanyaan"""
+    messages = [{"role": "system", "content": system_prompt(plan, prepared)}]
+    for msg in plan.history:
+        messages.append({"role": msg["role"], "content": msg["content"]})
+    messages.append({"role": "user", "content": plan.question})
+    return messages
@@ -0,0 +1,214 @@
+# chatbot/pipelines/image_pipeline.py
+# ------------------------------------------------------------
+# Pra-pemrosesan foto & cache hasil analisis untuk tab Site Risk
+# ------------------------------------------------------------
+# - prepare_image(): memperkecil foto (sisi terpanjang maks `max_side`
+#   piksel) dan meng-encode ulang sebagai JPEG dengan kualitas tertentu.
+#   Base64 dibuat sekali dan dipakai bersama oleh OD dan LMM.
+# - ResultCache: cache hasil OD / LMM lintas sesi, dengan kunci hash konten
+#   (sha256 foto asli) dan perceptual hash (dHash) foto yang sudah
+#   diperkecil, sehingga foto yang sama yang diunggah ulang — walau
+#   disimpan ulang oleh aplikasi lain — tidak dianalisis dua kali.
+#
+# Pillow sudah terpasang sebagai dependensi Streamlit. Jika tidak tersedia,
+# foto dikirim apa adanya (tanpa diperkecil dan tanpa perceptual hash).
+# ------------------------------------------------------------
+
+import base64
+import hashlib
+import io
+import json
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Optional, Tuple, Union
+
+from chatbot.ingestion.spool import ViewReader
+from chatbot.shared_state import SharedState
+
+
+# Resolusi & kualitas default (bisa ditimpa lewat environment variable)
+DEFAULT_MAX_SIDE = int(os.getenv("SITE_IMAGE_MAX_PX", "1280"))
+DEFAULT_QUALITY = int(os.getenv("SITE_IMAGE_QUALITY", "80"))
+
+# Ukuran dHash: (HASH_SIZE + 1) × HASH_SIZE piksel → 64 bit
+HASH_SIZE = 8
+
+
+class PreparedImage:
+    """Foto yang siap dikirim: byte hasil encode ulang + base64 (data URI) sekali jadi"""
+
+    def __init__(
+        self,
+        data: bytes,
+        mime: str,
+        size: Tuple[int, int],
+        original_size: Tuple[int, int],
+        original_nbytes: int,
+        content_key: str,
+        phash: Optional[str] = None,
+    ):
+        self.data = data
+        self.mime = mime
+        self.size = size
+        self.original_size = original_size
+        self.original_nbytes = original_nbytes
+        self.content_key = content_key
+        self.phash = phash
+        self.data_uri = f"data:{mime};base64," + base64.b64encode(data).decode()
+
+    @property
+    def nbytes(self) -> int:
+        return len(self.data)
+
+
+def _load_pil():
+    # Pillow diimpor saat foto pertama diproses, bukan saat aplikasi dimuat
+    try:
+        from PIL import Image, ImageOps
+    except ImportError:  # pragma: no cover - Pillow ikut terpasang bersama Streamlit
+        return None, None
+    return Image, ImageOps
+
+
+def dhash(img) -> str:
+    """Perceptual hash (difference hash) 64-bit dalam bentuk hex"""
+    Image, _ = _load_pil()
+    small = img.convert("L").resize((HASH_SIZE + 1, HASH_SIZE), Image.LANCZOS)
+    px = list(small.getdata())
+    bits = 0
+    for row in range(HASH_SIZE):
+        for col in range(HASH_SIZE):
+            left = px[row * (HASH_SIZE + 1) + col]
+            right = px[row * (HASH_SIZE + 1) + col + 1]
+            bits = (bits << 1) | (1 if left > right else 0)
+    return f"{bits:016x}"
+
+
+def prepare_image(
+    data: Union[bytes, memoryview],
+    mime: str,
+    max_side: int = DEFAULT_MAX_SIDE,
+    quality: int = DEFAULT_QUALITY,
+    content_key: Optional[str] = None,
+) -> PreparedImage:
+    """Memperkecil & meng-encode ulang foto sebelum diunggah ke API.
+
+    `data` boleh berupa memoryview unggahan: foto hanya disalin jika dikirim
+    apa adanya (PreparedImage selalu menyimpan bytes miliknya sendiri).
+    """
+    content_key = content_key or hashlib.sha256(data).hexdigest()
+    Image, ImageOps = _load_pil()
+    if Image is None:
+        return PreparedImage(bytes(data), mime, (0, 0), (0, 0), len(data), content_key)
+
+    with Image.open(ViewReader(memoryview(data))) as src:
+        # Foto ponsel sering diputar lewat tag EXIF; terapkan sebelum diperkecil
+        img = ImageOps.exif_transpose(src)
+        original_size = img.size
+        img.thumbnail((max_side, max_side), Image.LANCZOS)
+        if img.mode != "RGB":
+            # JPEG tidak mendukung transparansi → latar putih
+            rgba = img.convert("RGBA")
+            img = Image.new("RGB", rgba.size, (255, 255, 255))
+            img.paste(rgba, mask=rgba.split()[-1])
+        buf = io.BytesIO()
+        img.save(buf, format="JPEG", quality=quality, optimize=True)
+        phash = dhash(img)
+
+    encoded = buf.getvalue()
+    if len(encoded) >= len(data) and img.size == original_size:
+        # Foto kecil yang sudah terkompresi baik dikirim apa adanya
+        return PreparedImage(
+            bytes(data), mime, original_size, original_size, len(data), content_key, phash
+        )
+    return PreparedImage(
+        encoded, "image/jpeg", img.size, original_size, len(data), content_key, phash
+    )
+
+
+def hamming(a: str, b: str) -> int:
+    return bin(int(a, 16) ^ int(b, 16)).count("1")
+
+
+class ResultCache:
+    """Cache LRU hasil analisis foto, dicari lewat hash konten lalu perceptual hash.
+
+    Foto yang disimpan ulang (kompresi / format lain) menghasilkan dHash yang
+    hampir sama; selisih hingga `max_distance` bit dianggap foto yang sama.
+    Dengan `shared`, hasil untuk hash konten yang sama juga dibagi ke proses
+    worker lain (selama `shared_ttl` detik); pencarian perseptual tetap lokal.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 256,
+        max_distance: int = 4,
+        shared: Optional[SharedState] = None,
+        shared_ttl: float = 24 * 3600,
+    ):
+        self.max_entries = max_entries
+        self.max_distance = max_distance
+        self.shared = shared
+        self.shared_ttl = shared_ttl
+        # key → (perceptual hash, hasil)
+        self._entries: "OrderedDict[str, Tuple[Optional[str], Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _prefix(kind: str, params: Any) -> str:
+        # Parameter (label OD, prompt LMM, resolusi) ikut menentukan hasil
+        params_key = hashlib.sha1(
+            json.dumps(params, sort_keys=True, ensure_ascii=False).encode("utf-8")
+        ).hexdigest()[:12]
+        return f"{kind}:{params_key}:"
+
+    def get(self, kind: str, image: PreparedImage, params: Any = None):
+        prefix = self._prefix(kind, params)
+        with self._lock:
+            key = prefix + image.content_key
+            if key not in self._entries and image.phash:
+                # Tidak ada foto identik → cari foto yang mirip secara perseptual
+                key = next(
+                    (
+                        k
+                        for k, (phash, _) in self._entries.items()
+                        if k.startswith(prefix)
+                        and phash
+                        and hamming(phash, image.phash) <= self.max_distance
+                    ),
+                    key,
+                )
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key][1]
+        if self.shared is not None:
+            value = self.shared.get_json(f"site:{prefix}{image.content_key}")
+            if value is not None:
+                self._store(prefix + image.content_key, image.phash, value)
+                with self._lock:
+                    self.hits += 1
+                return value
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def put(self, kind: str, image: PreparedImage, params: Any, value: Any):
+        key = self._prefix(kind, params) + image.content_key
+        self._store(key, image.phash, value)
+        if self.shared is not None:
+            self.shared.set_json(f"site:{key}", value, ttl=self.shared_ttl)
+
+    def _store(self, key: str, phash: Optional[str], value: Any):
+        with self._lock:
+            self._entries[key] = (phash, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
@@ -0,0 +1,228 @@
+# chatbot/pipelines/sections.py
+# ------------------------------------------------------------
+# Keluaran terstruktur template Consultative Selling (per bagian)
+# ------------------------------------------------------------
+# SYSTEM_PROMPT meminta blok tetap ([Profil], [Pain Points], ...). Dalam
+# mode terstruktur, model diminta menjawab satu objek JSON (SECTION_SCHEMA)
+# dengan satu kunci per bagian:
+# - SectionParser: parser JSON inkremental untuk respons streaming; setiap
+#   bagian dilaporkan begitu nilainya selesai, dan teks parsial bagian yang
+#   sedang ditulis bisa ditampilkan langsung.
+# - section_prompt(): meminta ulang sebagian bagian saja (misal hanya Talk
+#   Track); bagian lain yang sudah ada dikirim sebagai konteks agar isi
+#   tetap konsisten, sehingga token & latensi hanya untuk bagian tersebut.
+# - split_blocks(): cadangan jika model tetap menjawab teks bebas dengan
+#   penanda [Judul].
+# ------------------------------------------------------------
+
+import json
+import re
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+# (kunci JSON, judul blok) sesuai urutan di SYSTEM_PROMPT
+SECTIONS: List[Tuple[str, str]] = [
+    ("profil", "Profil"),
+    ("pain_points", "Pain Points"),
+    ("opportunity_90_hari", "Opportunity 90 Hari"),
+    ("risiko", "Risiko"),
+    ("next_best_action", "Next Best Action"),
+    ("talk_track", "Talk Track 30 detik"),
+    ("data_verifikasi", "Data yang perlu diverifikasi"),
+]
+SECTION_TITLES: Dict[str, str] = dict(SECTIONS)
+SECTION_KEYS: List[str] = [key for key, _ in SECTIONS]
+
+# Perkiraan token keluaran per bagian (untuk max_tokens permintaan)
+SECTION_OUTPUT_TOKENS = 220
+_JSON_OVERHEAD_TOKENS = 40
+
+
+def section_schema(keys: Optional[Iterable[str]] = None) -> Dict[str, Any]:
+    """JSON schema objek jawaban untuk bagian `keys` (default: semua)"""
+    keys = list(keys or SECTION_KEYS)
+    return {
+        "type": "object",
+        "properties": {
+            key: {"type": "string", "description": SECTION_TITLES[key]} for key in keys
+        },
+        "required": keys,
+        "additionalProperties": False,
+    }
+
+
+SECTION_SCHEMA = section_schema()
+
+
+def structured_system_prompt(base_prompt: str, keys: Optional[Iterable[str]] = None) -> str:
+    """Prompt sistem mode terstruktur: jawaban berupa satu objek JSON sesuai skema"""
+    keys = list(keys or SECTION_KEYS)
+    return (
+        f"{base_prompt}\n\n"
+        "Jawab HANYA dengan satu objek JSON (tanpa teks lain, tanpa ```), "
+        "dengan kunci berikut sesuai urutan; setiap nilai berupa string Markdown:\n"
+        + "\n".join(f'- "{key}": {SECTION_TITLES[key]}' for key in keys)
+        + f"\n\nJSON schema:\n{json.dumps(section_schema(keys), ensure_ascii=False)}"
+    )
+
+
+def section_prompt(
+    user_prompt: str,
+    keys: Optional[Iterable[str]] = None,
+    current: Optional[Dict[str, str]] = None,
+) -> str:
+    """Prompt pengguna untuk bagian `keys`; bagian lain di `current` menjadi konteks"""
+    keys = list(keys or SECTION_KEYS)
+    context = {k: v for k, v in (current or {}).items() if k not in keys and v}
+    if not context:
+        return user_prompt
+    existing = "\n\n".join(f"[{SECTION_TITLES[k]}]\n{v}" for k, v in context.items())
+    titles = ", ".join(SECTION_TITLES[k] for k in keys)
+    return (
+        f"{user_prompt}\n\n"
+        f"Bagian yang sudah ada (jangan diulang, jaga konsistensi):\n{existing}\n\n"
+        f"Tulis ulang HANYA bagian: {titles}."
+    )
+
+
+def section_max_tokens(keys: Optional[Iterable[str]] = None) -> int:
+    return SECTION_OUTPUT_TOKENS * len(list(keys or SECTION_KEYS)) + _JSON_OVERHEAD_TOKENS
+
+
+def section_text(value: Any) -> str:
+    """Nilai bagian sebagai teks Markdown (daftar menjadi butir)"""
+    if isinstance(value, str):
+        return value.strip()
+    if isinstance(value, list):
+        return "\n".join(f"- {section_text(item)}" for item in value)
+    return json.dumps(value, ensure_ascii=False)
+
+
+def render_blocks(sections: Dict[str, str]) -> str:
+    """Bagian-bagian dalam format blok SYSTEM_PROMPT ([Judul] + isi)"""
+    return "\n\n".join(
+        f"[{SECTION_TITLES[key]}]\n{sections[key]}" for key in SECTION_KEYS if key in sections
+    )
+
+
+_BLOCK_RE = re.compile(
+    r"^\s*\**\[(" + "|".join(re.escape(t) for _, t in SECTIONS) + r")\]\**\s*$",
+    re.M | re.I,
+)
+
+
+def split_blocks(text: str) -> Dict[str, str]:
+    """Cadangan untuk jawaban teks bebas: memecah berdasarkan penanda [Judul]"""
+    by_title = {title.lower(): key for key, title in SECTIONS}
+    matches = list(_BLOCK_RE.finditer(text))
+    sections = {}
+    for match, nxt in zip(matches, matches[1:] + [None]):
+        end = nxt.start() if nxt is not None else len(text)
+        body = text[match.end():end].strip()
+        if body:
+            sections[by_title[match.group(1).lower()]] = body
+    return sections
+
+
+class SectionParser:
+    """Parser JSON inkremental untuk objek datar {kunci: nilai} yang di-stream.
+
+    feed() mengembalikan (kunci, teks) bagian yang selesai pada potongan itu.
+    Teks sebelum '{' (misal pagar ```json) diabaikan.
+    """
+
+    def __init__(self):
+        self._text = ""
+        self._pos = 0
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        # "key" → "colon" → "value" → "comma" → "key" ...
+        self._stage = "start"
+        self._token_start: Optional[int] = None
+        self._key: Optional[str] = None
+        self.sections: Dict[str, str] = {}
+        self.done = False
+
+    def feed(self, chunk: str) -> List[Tuple[str, str]]:
+        self._text += chunk
+        completed = []
+        text = self._text
+        while self._pos < len(text) and not self.done:
+            i, c = self._pos, text[self._pos]
+            self._pos += 1
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif c == "\\":
+                    self._escape = True
+                elif c == '"':
+                    self._in_string = False
+                    if self._depth == 1:
+                        self._end_string(i, completed)
+                continue
+
+            if self._stage == "start":
+                if c == "{":
+                    self._depth, self._stage = 1, "key"
+                continue
+            if c == '"':
+                self._in_string = True
+                if self._depth == 1 and self._stage in ("key", "value"):
+                    self._token_start = i
+            elif c in "[{":
+                if self._depth == 1 and self._stage == "value":
+                    self._token_start = i
+                self._depth += 1
+            elif c in "]}":
+                self._depth -= 1
+                if self._depth == 1 and self._stage == "value":
+                    self._emit(text[self._token_start : i + 1], completed)
+                elif self._depth == 0:
+                    self._finish_scalar(i, completed)
+                    self.done = True
+            elif self._depth == 1:
+                if c == ":" and self._stage == "colon":
+                    self._stage, self._token_start = "value", None
+                elif c == ",":
+                    self._finish_scalar(i, completed)
+                    self._stage = "key"
+                elif self._stage == "value" and self._token_start is None and not c.isspace():
+                    # Nilai skalar (angka / true / null)
+                    self._token_start = i
+        return completed
+
+    def _end_string(self, i: int, completed):
+        raw = self._text[self._token_start : i + 1]
+        if self._stage == "key":
+            self._key, self._stage = json.loads(raw), "colon"
+        elif self._stage == "value":
+            self._emit(raw, completed)
+
+    def _finish_scalar(self, i: int, completed):
+        if self._stage == "value" and self._token_start is not None:
+            self._emit(self._text[self._token_start : i].strip(), completed)
+
+    def _emit(self, raw: str, completed):
+        try:
+            value = section_text(json.loads(raw))
+        except ValueError:
+            value = raw
+        self.sections[self._key] = value
+        completed.append((self._key, value))
+        self._stage, self._token_start = "comma", None
+
+    def partial(self) -> Optional[Tuple[str, str]]:
+        """(kunci, teks sejauh ini) untuk nilai string yang sedang di-stream"""
+        if not (self._in_string and self._stage == "value" and self._depth == 1):
+            return None
+        raw = self._text[self._token_start + 1 : self._pos]
+        # Escape yang terpotong di akhir potongan dibuang dulu
+        raw = re.sub(r"\\u[0-9a-fA-F]{0,3}$|\\$", "", raw)
+        try:
+            return self._key, json.loads(f'"{raw}"')
+        except ValueError:
+            return self._key, raw
+
+    @property
+    def text(self) -> str:
+        return self._text
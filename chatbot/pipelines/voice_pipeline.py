@@ -0,0 +1,222 @@
+# chatbot/pipelines/voice_pipeline.py
+# ------------------------------------------------------------
+# Pipeline Voice Brief: STT → LLM → TTS yang saling tumpang-tindih
+# ------------------------------------------------------------
+# - split_wav_on_silence(): memecah rekaman WAV panjang pada jeda hening
+#   sehingga setiap segmen dapat ditranskrip secara paralel.
+# - transcribe_segments(): STT per segmen secara konkuren, hasil digabung
+#   sesuai urutan.
+# - SentenceSplitter: memecah teks streaming LLM menjadi kalimat utuh,
+#   sehingga TTS kalimat pertama bisa dimulai sebelum LLM selesai.
+# - TTSQueue: TTS per kalimat secara konkuren, hasil diambil berurutan.
+#
+# Modul ini tidak memanggil Streamlit; fungsi STT/TTS diberikan oleh
+# pemanggil (harus aman dipanggil dari thread lain).
+# ------------------------------------------------------------
+
+import base64
+import io
+import re
+import time
+import wave
+from array import array
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Union
+
+from chatbot.ingestion.spool import ViewReader
+from chatbot.profiling import bind, stage
+
+# Jendela analisis energi (ms) dan parameter pemotongan default
+FRAME_MS = 20
+MIN_SILENCE_MS = 400
+MIN_SEGMENT_S = 5.0
+MAX_SEGMENT_S = 30.0
+
+_SENTENCE_RE = re.compile(r"(.+?[.!?…]+)(?:\s+|$)", re.S)
+
+
+def _frame_rms(samples: array) -> float:
+    # Cukup setiap sampel ke-4 untuk mendeteksi hening (4× lebih cepat)
+    samples = samples[::4]
+    if not samples:
+        return 0.0
+    return (sum(s * s for s in samples) / len(samples)) ** 0.5
+
+
+def _write_wav(params, frames: memoryview) -> bytes:
+    buf = io.BytesIO()
+    with wave.open(buf, "wb") as w:
+        w.setnchannels(params.nchannels)
+        w.setsampwidth(params.sampwidth)
+        w.setframerate(params.framerate)
+        w.writeframes(frames)
+    return buf.getvalue()
+
+
+def split_wav_on_silence(
+    data: Union[bytes, memoryview],
+    min_silence_ms: int = MIN_SILENCE_MS,
+    min_segment_s: float = MIN_SEGMENT_S,
+    max_segment_s: float = MAX_SEGMENT_S,
+    silence_ratio: float = 0.1,
+) -> List[bytes]:
+    """Memecah WAV PCM 16-bit pada jeda hening; format lain dikembalikan utuh.
+
+    Segmen dipotong di jeda hening pertama setelah `min_segment_s`, atau paksa
+    di `max_segment_s` jika tidak ada jeda. Ambang hening = `silence_ratio` ×
+    RMS rata-rata rekaman. `data` boleh berupa memoryview unggahan; segmen
+    dipotong dari memoryview PCM tanpa salinan antara.
+    """
+    try:
+        with wave.open(ViewReader(memoryview(data)), "rb") as w:
+            params = w.getparams()
+            pcm = memoryview(w.readframes(params.nframes))
+    except (wave.Error, EOFError):
+        return [data]
+    if params.sampwidth != 2:
+        return [data]
+
+    bytes_per_frame = params.sampwidth * params.nchannels
+    window = max(int(params.framerate * FRAME_MS / 1000), 1) * bytes_per_frame
+    n_windows = len(pcm) // window
+    if n_windows * FRAME_MS / 1000 <= max_segment_s:
+        return [data]
+
+    rms = []
+    for i in range(n_windows):
+        samples = array("h")
+        samples.frombytes(pcm[i * window : (i + 1) * window])
+        rms.append(_frame_rms(samples))
+    threshold = (sum(rms) / len(rms)) * silence_ratio
+
+    min_silence = max(min_silence_ms // FRAME_MS, 1)
+    min_seg = int(min_segment_s * 1000 / FRAME_MS)
+    max_seg = int(max_segment_s * 1000 / FRAME_MS)
+
+    cuts = [0]
+    silent_run = 0
+    for i, value in enumerate(rms):
+        silent_run = silent_run + 1 if value < threshold else 0
+        seg_len = i - cuts[-1]
+        if (silent_run >= min_silence and seg_len >= min_seg) or seg_len >= max_seg:
+            # Potong di tengah jeda agar kata tidak terpotong
+            cut = i - silent_run // 2 if silent_run >= min_silence else i
+            cuts.append(cut)
+            silent_run = 0
+    cuts.append(n_windows)
+
+    segments = []
+    for start, end in zip(cuts, cuts[1:]):
+        if end > start:
+            segments.append(_write_wav(params, pcm[start * window : end * window]))
+    # Sisa byte yang tidak genap satu jendela ditempel ke segmen terakhir
+    tail = pcm[n_windows * window :]
+    if tail and segments:
+        last = pcm[cuts[-2] * window :]
+        segments[-1] = _write_wav(params, last)
+    return segments or [data]
+
+
+def transcribe_segments(
+    segments: List[bytes],
+    stt_fn: Callable[[bytes], str],
+    max_workers: int = 4,
+) -> str:
+    """Transkripsi semua segmen secara konkuren, digabung sesuai urutan"""
+
+    def transcribe(segment: bytes) -> str:
+        with stage("stt_segment"):
+            return stt_fn(segment)
+
+    if len(segments) == 1:
+        return transcribe(segments[0]).strip()
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        texts = list(pool.map(bind(transcribe), segments))
+    return " ".join(t.strip() for t in texts if t and t.strip())
+
+
+class SentenceSplitter:
+    """Mengumpulkan potongan teks streaming dan mengeluarkan kalimat utuh"""
+
+    def __init__(self, min_chars: int = 20):
+        # Kalimat yang lebih pendek dari ini digabung dengan kalimat berikutnya
+        self.min_chars = min_chars
+        self._buffer = ""
+        self._pending = ""
+
+    def feed(self, piece: str) -> List[str]:
+        self._buffer += piece
+        sentences = []
+        while True:
+            m = _SENTENCE_RE.match(self._buffer)
+            # Tanda baca di ujung buffer belum pasti akhir kalimat (misal "3." lalu "5")
+            if not m or (m.end() == len(self._buffer) and not self._buffer[-1].isspace()):
+                break
+            self._pending = f"{self._pending} {m.group(1).strip()}".strip()
+            self._buffer = self._buffer[m.end():]
+            if len(self._pending) >= self.min_chars:
+                sentences.append(self._pending)
+                self._pending = ""
+        return sentences
+
+    def flush(self) -> List[str]:
+        rest = f"{self._pending} {self._buffer.strip()}".strip()
+        self._buffer = self._pending = ""
+        return [rest] if rest else []
+
+
+def decode_audio_b64(audio_b64: str) -> bytes:
+    """Decode base64 audio (dengan / tanpa prefix data:)"""
+    b64data = audio_b64.split(",", 1)[1] if "," in audio_b64 else audio_b64
+    return base64.b64decode(b64data)
+
+
+class TTSQueue:
+    """TTS per kalimat secara konkuren; hasil diambil sesuai urutan kalimat"""
+
+    def __init__(self, tts_fn: Callable[[str], Optional[bytes]], max_workers: int = 3):
+        self._tts_fn = tts_fn
+        self._pool = ThreadPoolExecutor(max_workers=max_workers)
+        self._futures: List[Future] = []
+        self._next = 0
+        # Dibuat di thread script: tahap TTS pekerja dicatat di profil rerun-nya
+        self._synthesize = bind(self._synthesize)
+
+    def _synthesize(self, sentence: str) -> Optional[bytes]:
+        with stage("tts_sentence"):
+            return self._tts_fn(sentence)
+
+    def submit(self, sentence: str):
+        self._futures.append(self._pool.submit(self._synthesize, sentence))
+
+    def ready(self) -> List[Optional[bytes]]:
+        """Audio yang sudah siap dan berada di urutan berikutnya (tanpa menunggu)"""
+        out = []
+        while self._next < len(self._futures) and self._futures[self._next].done():
+            out.append(self._futures[self._next].result())
+            self._next += 1
+        return out
+
+    def drain(self) -> List[Optional[bytes]]:
+        """Menunggu dan mengembalikan sisa audio sesuai urutan"""
+        out = []
+        while self._next < len(self._futures):
+            out.append(self._futures[self._next].result())
+            self._next += 1
+        self._pool.shutdown(wait=False)
+        return out
+
+
+class StageTimer:
+    """Mencatat waktu tiap tahap relatif terhadap awal pipeline"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.marks: Dict[str, float] = {}
+
+    def mark(self, name: str):
+        # Hanya kejadian pertama yang dicatat (misal audio pertama)
+        self.marks.setdefault(name, time.perf_counter() - self.started)
+
+    def get(self, name: str) -> Optional[float]:
+        return self.marks.get(name)
@@ -0,0 +1,309 @@
+# chatbot/profiling.py
+# ------------------------------------------------------------
+# Mode profiling: cProfile + tracemalloc per rerun dan per tahap pipeline
+# ------------------------------------------------------------
+# Diaktifkan dari sidebar (chatbot/ui.py) atau PROFILE_MODE=1. Untuk setiap
+# rerun script Streamlit:
+#   <PROFILE_DIR>/<waktu>-<script>.prof     → pstats (bisa dibuka snakeviz /
+#                                              flameprof sebagai flame graph)
+#   <PROFILE_DIR>/<waktu>-<script>.snapshot → snapshot tracemalloc
+#   <PROFILE_DIR>/<waktu>-<script>.json     → ringkasan: durasi, tahap,
+#                                              fungsi terpanas, alokasi terbesar
+# - stage(): membungkus satu tahap (parse PDF, OCR, base64, LLM, ...) dan
+#   mencatat waktu dinding, waktu CPU thread, dan selisih memori ter-trace.
+#   Di luar rerun yang diprofil, stage() tidak melakukan apa-apa.
+# - bind(): profil aktif disimpan per thread; pekerja (pool OCR, STT/TTS,
+#   prefetch chat) menerima profil pemanggil lewat fungsi yang dibungkus
+#   bind(), sehingga tahapnya ikut tercatat (dengan nama thread-nya).
+# - Satu rerun diprofil pada satu waktu per proses (cProfile di Python 3.12+
+#   dan tracemalloc bersifat global); rerun lain yang bersamaan dilewati.
+#   Alokasi / panggilan thread lain pada saat itu bisa ikut tercatat.
+# - Hanya PROFILE_KEEP profil terbaru yang disimpan.
+#
+# Viewer: panel sidebar (ui.profiling_panel) atau `python -m chatbot.profiling`.
+# ------------------------------------------------------------
+
+import cProfile
+import functools
+import glob
+import json
+import logging
+import os
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+logger = logging.getLogger("profiling")
+
+PROFILE_MODE = os.getenv("PROFILE_MODE", "0") == "1"
+PROFILE_DIR = os.getenv(
+    "PROFILE_DIR", os.path.join(os.getenv("KB_STORE_DIR", ".kb_store"), "profiles")
+)
+PROFILE_KEEP = int(os.getenv("PROFILE_KEEP", "100"))
+# Kedalaman traceback alokasi; 0 = tracemalloc dimatikan (overhead memori ±2×)
+PROFILE_TRACE_FRAMES = int(os.getenv("PROFILE_TRACE_FRAMES", "10"))
+TOP_N = 25
+
+# Profil yang belum selesai setelah selang ini dianggap ditinggalkan
+# (rerun terputus) dan boleh diambil alih oleh rerun berikutnya
+STALE_AFTER_S = 300
+
+_local = threading.local()
+_active_lock = threading.RLock()
+_active: Optional["RerunProfile"] = None
+
+
+def _traced_bytes() -> int:
+    return tracemalloc.get_traced_memory()[0] if tracemalloc.is_tracing() else 0
+
+
+class RerunProfile:
+    """Profil satu rerun script: start() di awal, stop() di akhir (menyimpan ke disk)"""
+
+    def __init__(self, script: str, out_dir: str = PROFILE_DIR):
+        self.script = script
+        self.out_dir = out_dir
+        self.stages: List[Dict[str, Any]] = []
+        # Tahap bisa dicatat dari thread pekerja (lihat bind())
+        self._stages_lock = threading.Lock()
+        self._thread = threading.current_thread().name
+        self._profiler = cProfile.Profile()
+        self._tracing = False
+        self._started = 0.0
+        self._started_at = 0.0
+
+    def start(self) -> bool:
+        """False jika rerun lain (atau alat profiling lain) sedang diprofil"""
+        global _active
+        with _active_lock:
+            if _active is not None and time.perf_counter() - _active._started > STALE_AFTER_S:
+                _active._finish()
+            if _active is not None:
+                return False
+            try:
+                self._profiler.enable()
+            except ValueError:
+                logger.debug("cProfile sedang dipakai alat lain", exc_info=True)
+                return False
+            _active = self
+        if PROFILE_TRACE_FRAMES and not tracemalloc.is_tracing():
+            tracemalloc.start(PROFILE_TRACE_FRAMES)
+            self._tracing = True
+        self._started_at = time.time()
+        self._started = time.perf_counter()
+        _local.current = self
+        return True
+
+    def record(self, entry: Dict[str, Any]):
+        thread = threading.current_thread().name
+        if thread != self._thread:
+            entry["thread"] = thread
+        with self._stages_lock:
+            self.stages.append(entry)
+
+    def discard(self):
+        """Menghentikan tanpa menyimpan (rerun terputus oleh st.stop / error)"""
+        self._finish()
+
+    def _finish(self) -> Optional[tracemalloc.Snapshot]:
+        global _active
+        if getattr(_local, "current", None) is self:
+            _local.current = None
+        with _active_lock:
+            if _active is not self:
+                # Sudah dihentikan (misal diambil alih karena ditinggalkan)
+                return None
+            _active = None
+            self._profiler.disable()
+            snapshot = None
+            if self._tracing:
+                snapshot = tracemalloc.take_snapshot().filter_traces(
+                    [
+                        tracemalloc.Filter(False, tracemalloc.__file__),
+                        tracemalloc.Filter(False, __file__),
+                    ]
+                )
+                tracemalloc.stop()
+                self._tracing = False
+        return snapshot
+
+    def stop(self) -> Optional[str]:
+        """Menyimpan profil; mengembalikan path ringkasan JSON (None jika sudah dihentikan)"""
+        wall_s = time.perf_counter() - self._started
+        active = _active is self
+        snapshot = self._finish()
+        if not active:
+            return None
+        os.makedirs(self.out_dir, exist_ok=True)
+        stamp = time.strftime("%Y%m%d-%H%M%S", time.localtime(self._started_at))
+        base = os.path.join(
+            self.out_dir, f"{stamp}-{int(self._started_at * 1000) % 1000:03d}-{self.script}"
+        )
+        self._profiler.dump_stats(base + ".prof")
+        with self._stages_lock:
+            stages = list(self.stages)
+        summary = {
+            "script": self.script,
+            "started": self._started_at,
+            "wall_s": round(wall_s, 4),
+            "stages": stages,
+            "top_functions": top_functions(pstats.Stats(self._profiler)),
+            "top_allocations": [],
+            "prof": base + ".prof",
+            "snapshot": None,
+        }
+        if snapshot is not None:
+            snapshot.dump(base + ".snapshot")
+            summary["snapshot"] = base + ".snapshot"
+            summary["top_allocations"] = top_allocations(snapshot)
+        with open(base + ".json", "w", encoding="utf-8") as f:
+            json.dump(summary, f, ensure_ascii=False, indent=1)
+        prune(self.out_dir)
+        return base + ".json"
+
+
+@contextmanager
+def profiled(script: str, enabled: bool = True) -> Iterator[None]:
+    """Memprofil blok (misal satu rerun fragment) jika belum ada rerun yang diprofil di thread ini"""
+    if not enabled or getattr(_local, "current", None) is not None:
+        yield
+        return
+    run = RerunProfile(script)
+    if not run.start():
+        yield
+        return
+    try:
+        yield
+    except BaseException:
+        # Rerun terputus (st.rerun / st.stop / error): tidak disimpan
+        run.discard()
+        raise
+    run.stop()
+
+
+def current() -> Optional[RerunProfile]:
+    """Profil rerun yang aktif di thread ini (atau diteruskan lewat bind())"""
+    return getattr(_local, "current", None)
+
+
+def bind(fn: Callable[..., Any]) -> Callable[..., Any]:
+    """Meneruskan profil aktif thread pemanggil ke `fn` yang dijalankan di thread lain"""
+    run = current()
+    if run is None:
+        return fn
+
+    @functools.wraps(fn)
+    def bound(*args, **kwargs):
+        previous = current()
+        _local.current = run
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            _local.current = previous
+
+    return bound
+
+
+@contextmanager
+def stage(name: str) -> Iterator[None]:
+    """Mencatat satu tahap pipeline dalam rerun yang sedang diprofil (thread ini)"""
+    run = current()
+    if run is None:
+        yield
+        return
+    started, cpu_started = time.perf_counter(), time.thread_time()
+    mem_started = _traced_bytes()
+    try:
+        yield
+    finally:
+        run.record(
+            {
+                "stage": name,
+                "wall_s": round(time.perf_counter() - started, 4),
+                "cpu_s": round(time.thread_time() - cpu_started, 4),
+                "alloc_kb": round((_traced_bytes() - mem_started) / 1024, 1),
+            }
+        )
+
+
+def top_functions(stats: pstats.Stats, n: int = TOP_N) -> List[Dict[str, Any]]:
+    """Fungsi dengan waktu sendiri (tottime) terbesar"""
+    rows = []
+    for (filename, line, func), (_, calls, tottime, cumtime, _) in stats.stats.items():
+        rows.append(
+            {
+                "function": f"{func} ({os.path.basename(filename)}:{line})",
+                "calls": calls,
+                "tottime_s": round(tottime, 4),
+                "cumtime_s": round(cumtime, 4),
+            }
+        )
+    rows.sort(key=lambda r: r["tottime_s"], reverse=True)
+    return rows[:n]
+
+
+def top_allocations(snapshot: tracemalloc.Snapshot, n: int = TOP_N) -> List[Dict[str, Any]]:
+    """Baris kode dengan memori teralokasi (masih hidup) terbesar"""
+    return [
+        {
+            "where": f"{stat.traceback[0].filename}:{stat.traceback[0].lineno}",
+            "size_kb": round(stat.size / 1024, 1),
+            "count": stat.count,
+        }
+        for stat in snapshot.statistics("lineno")[:n]
+    ]
+
+
+def prune(out_dir: str = PROFILE_DIR, keep: int = PROFILE_KEEP):
+    summaries = sorted(glob.glob(os.path.join(out_dir, "*.json")))
+    for path in summaries[: max(len(summaries) - keep, 0)]:
+        base = path[: -len(".json")]
+        for ext in (".json", ".prof", ".snapshot"):
+            try:
+                os.remove(base + ext)
+            except FileNotFoundError:
+                pass
+
+
+def list_profiles(out_dir: str = PROFILE_DIR, limit: int = 50) -> List[Dict[str, Any]]:
+    """Ringkasan profil terbaru (terbaru dulu)"""
+    profiles = []
+    for path in sorted(glob.glob(os.path.join(out_dir, "*.json")), reverse=True)[:limit]:
+        try:
+            with open(path, encoding="utf-8") as f:
+                profiles.append({**json.load(f), "path": path})
+        except (OSError, ValueError):
+            continue
+    return profiles
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Viewer teks: `python -m chatbot.profiling [jumlah]`"""
+    argv = sys.argv[1:] if argv is None else argv
+    profiles = list_profiles(limit=int(argv[0]) if argv else 1)
+    if not profiles:
+        print(f"Belum ada profil di {PROFILE_DIR}")
+        return 1
+    for profile in profiles:
+        started = time.strftime("%d %b %H:%M:%S", time.localtime(profile["started"]))
+        print(f"\n=== {profile['script']} · {started} · {profile['wall_s']:.3f} dtk")
+        for s in profile["stages"]:
+            thread = f"  [{s['thread']}]" if s.get("thread") else ""
+            print(f"  tahap {s['stage']:<24} {s['wall_s']:>8.3f} dtk  cpu {s['cpu_s']:.3f}  {s['alloc_kb']:+.0f} KB{thread}")
+        print("  fungsi terpanas (tottime):")
+        for row in profile["top_functions"][:10]:
+            print(f"    {row['tottime_s']:>8.4f}  {row['cumtime_s']:>8.4f}  {row['calls']:>7}  {row['function']}")
+        if profile["top_allocations"]:
+            print("  alokasi terbesar:")
+            for row in profile["top_allocations"][:10]:
+                print(f"    {row['size_kb']:>10.1f} KB  {row['count']:>7}  {row['where']}")
+        print(f"  flame graph: snakeviz {profile['prof']}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,9 @@
+# chatbot/providers
+# ------------------------------------------------------------
+# Klien model & layanan eksternal
+# ------------------------------------------------------------
+# - telkom_api         : Telkom LLM/LMM/OCR/OD/STT/TTS (HTTP sinkron)
+# - generation_service : event loop bersama untuk streaming Gemini / OpenAI
+# - single_flight      : penggabungan panggilan upstream identik yang sedang berjalan
+# - task_profiles      : max_tokens / stop / model per alur kerja, disesuaikan dari panjang jawaban
+# ------------------------------------------------------------
@@ -0,0 +1,280 @@
+# chatbot/providers/generation_service.py
+# ------------------------------------------------------------
+# Layanan generasi LLM asinkron bersama (satu event loop per proses)
+# ------------------------------------------------------------
+# Thread script Streamlit tidak lagi menunggu I/O jaringan selama streaming.
+# Permintaan dikirim ke GenerationService, yang menjalankan semua klien
+# provider async (Gemini, OpenAI-compatible / Telkom) di satu event loop
+# pada thread latar belakang. Setiap permintaan menghasilkan
+# GenerationHandle berisi buffer token yang bisa:
+# - dibaca sekilas (snapshot) oleh fragment Streamlit yang di-poll, atau
+# - dikonsumsi sebagai iterator blocking / async oleh pemanggil lain.
+#
+# Dengan cara ini ratusan chat bersamaan dilayani oleh satu thread I/O,
+# bukan satu thread server per sesi yang menunggu jawaban.
+#
+# submit(..., coalesce_key=...) menggabungkan permintaan identik yang sedang
+# berjalan: pemanggil berikutnya menerima handle yang sama (token dibagikan
+# ke semua pembaca), dan kunci dilepas begitu generasi selesai.
+# ------------------------------------------------------------
+
+import asyncio
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, AsyncIterator, Callable, Dict, Iterator, List, Optional, Tuple
+
+# Fungsi streaming provider: dipanggil dengan `usage` (dict yang boleh diisi
+# jumlah token aktual) + argumen lain, menghasilkan potongan teks
+StreamFn = Callable[..., AsyncIterator[str]]
+
+
+class GenerationHandle:
+    """Buffer token satu permintaan; aman dibaca dari thread mana pun"""
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._chunks: List[str] = []
+        self.done = False
+        self.error: Optional[BaseException] = None
+        self.usage: Dict[str, Any] = {}
+        self.submitted = time.perf_counter()
+        self.first_token_s: Optional[float] = None
+        self.total_s: Optional[float] = None
+        self._future: Optional[Future] = None
+        # Jumlah pemanggil yang berbagi handle ini (coalescing)
+        self._subscribers = 1
+
+    # --- dipanggil dari event loop ---
+    def _append(self, piece: str):
+        with self._cond:
+            if self.first_token_s is None:
+                self.first_token_s = time.perf_counter() - self.submitted
+            self._chunks.append(piece)
+            self._cond.notify_all()
+
+    def _finish(self, error: Optional[BaseException] = None):
+        with self._cond:
+            self.error = error
+            self.done = True
+            self.total_s = time.perf_counter() - self.submitted
+            self._cond.notify_all()
+
+    # --- dipanggil dari thread pemakai ---
+    @property
+    def text(self) -> str:
+        with self._cond:
+            return "".join(self._chunks)
+
+    def snapshot(self) -> Tuple[str, bool]:
+        """Teks sejauh ini dan apakah generasi sudah selesai (tanpa menunggu)"""
+        with self._cond:
+            return "".join(self._chunks), self.done
+
+    def iter_chunks(self, timeout: Optional[float] = None) -> Iterator[str]:
+        """Iterator blocking atas potongan teks; error provider dilempar ulang"""
+        i = 0
+        while True:
+            with self._cond:
+                if i >= len(self._chunks) and not self.done:
+                    if not self._cond.wait(timeout):
+                        raise TimeoutError("Tidak ada token baru dalam batas waktu.")
+                new = self._chunks[i:]
+                finished = self.done
+            for piece in new:
+                yield piece
+            i += len(new)
+            if finished and i >= len(self._chunks):
+                if self.error:
+                    raise self.error
+                return
+
+    def result(self, timeout: Optional[float] = None) -> str:
+        with self._cond:
+            if not self._cond.wait_for(lambda: self.done, timeout):
+                raise TimeoutError("Generasi belum selesai dalam batas waktu.")
+        if self.error:
+            raise self.error
+        return self.text
+
+    def cancel(self):
+        """Melepas handle; generasi baru dibatalkan jika tidak ada pemanggil lain"""
+        with self._cond:
+            self._subscribers -= 1
+            if self._subscribers > 0:
+                return
+        if self._future is not None:
+            self._future.cancel()
+
+
+class GenerationService:
+    """Event loop asyncio bersama di thread latar untuk semua permintaan LLM"""
+
+    def __init__(self, max_concurrency: int = 256, timeout: float = 300.0):
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        self.active = 0
+        self.completed = 0
+        self.coalesced = 0
+        self._lock = threading.Lock()
+        self._inflight: Dict[str, GenerationHandle] = {}
+        self._loop = asyncio.new_event_loop()
+        # Semaphore baru terikat ke loop saat pertama dipakai (di thread loop)
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._thread = threading.Thread(
+            target=self._run, name="generation-loop", daemon=True
+        )
+        self._thread.start()
+
+    def _run(self):
+        asyncio.set_event_loop(self._loop)
+        self._loop.run_forever()
+
+    async def _generate(
+        self, handle: GenerationHandle, stream_fn: StreamFn, kwargs: Dict[str, Any]
+    ):
+        # Permintaan di atas batas konkurensi menunggu giliran (tanpa thread tambahan)
+        async with self._semaphore:
+            self.active += 1
+            try:
+                async with asyncio.timeout(self.timeout):
+                    async for piece in stream_fn(usage=handle.usage, **kwargs):
+                        if piece:
+                            handle._append(piece)
+            except BaseException as e:  # termasuk CancelledError
+                handle._finish(e)
+                if isinstance(e, asyncio.CancelledError):
+                    raise
+            else:
+                handle._finish()
+            finally:
+                self.active -= 1
+                self.completed += 1
+
+    def submit(
+        self, stream_fn: StreamFn, coalesce_key: Optional[str] = None, **kwargs
+    ) -> GenerationHandle:
+        """Menjadwalkan permintaan di event loop dan langsung mengembalikan handle.
+
+        Dengan `coalesce_key` (hash konten permintaan), permintaan identik yang
+        masih berjalan dipakai bersama alih-alih memanggil provider lagi.
+        """
+        with self._lock:
+            handle = self._inflight.get(coalesce_key) if coalesce_key else None
+            if handle is not None and not handle.done:
+                with handle._cond:
+                    handle._subscribers += 1
+                self.coalesced += 1
+                return handle
+            handle = GenerationHandle()
+            if coalesce_key:
+                self._inflight[coalesce_key] = handle
+        handle._future = asyncio.run_coroutine_threadsafe(
+            self._generate(handle, stream_fn, kwargs), self._loop
+        )
+        handle._future.add_done_callback(
+            lambda f: self._release(coalesce_key, handle, f)
+        )
+        return handle
+
+    def _release(self, coalesce_key: Optional[str], handle: GenerationHandle, future):
+        # Dibatalkan sebelum sempat berjalan → handle tetap harus selesai
+        if future.cancelled() and not handle.done:
+            handle._finish(asyncio.CancelledError())
+        # Tanpa cache: hasil yang sudah selesai tidak dibagikan ke permintaan baru
+        if coalesce_key:
+            with self._lock:
+                if self._inflight.get(coalesce_key) is handle:
+                    del self._inflight[coalesce_key]
+
+    async def stream(self, stream_fn: StreamFn, **kwargs) -> AsyncIterator[str]:
+        """Token stream async untuk pemanggil yang berjalan di event loop lain"""
+        handle = self.submit(stream_fn, **kwargs)
+        i = 0
+        while True:
+            text, done = handle.snapshot()
+            if len(text) > i:
+                yield text[i:]
+                i = len(text)
+            if done:
+                if handle.error:
+                    raise handle.error
+                return
+            await asyncio.sleep(0.02)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "active": self.active,
+            "completed": self.completed,
+            "coalesced": self.coalesced,
+        }
+
+
+# --------------------------
+# Provider async
+# --------------------------
+def _gemini_chunk_text(chunk) -> str:
+    # chunk.text melempar ValueError untuk chunk tanpa parts (misal
+    # finish_reason MAX_TOKENS): teks yang sudah diterima tetap ditampilkan
+    try:
+        parts = chunk.candidates[0].content.parts
+    except (AttributeError, IndexError):
+        return ""
+    return "".join(getattr(part, "text", "") or "" for part in parts)
+
+
+async def gemini_stream(
+    model_name: str,
+    system_prompt: str,
+    history: List[Dict[str, Any]],
+    question: str,
+    usage: Dict[str, Any],
+    max_output_tokens: Optional[int] = None,
+    stop: Optional[List[str]] = None,
+) -> AsyncIterator[str]:
+    """Streaming Gemini via klien async google-generativeai"""
+    import google.generativeai as genai
+
+    model = genai.GenerativeModel(model_name, system_instruction=system_prompt)
+    chat = model.start_chat(history=history)
+    generation_config: Dict[str, Any] = {}
+    if max_output_tokens:
+        generation_config["max_output_tokens"] = max_output_tokens
+    if stop:
+        generation_config["stop_sequences"] = stop
+    response = await chat.send_message_async(
+        question, stream=True, generation_config=generation_config or None
+    )
+    async for chunk in response:
+        text = _gemini_chunk_text(chunk)
+        if text:
+            yield text
+    meta = getattr(response, "usage_metadata", None)
+    usage["prompt_tokens"] = getattr(meta, "prompt_token_count", None)
+    usage["completion_tokens"] = getattr(meta, "candidates_token_count", None)
+
+
+async def openai_chat_stream(
+    client,
+    model: str,
+    messages: List[Dict[str, str]],
+    usage: Dict[str, Any],
+    max_tokens: Optional[int] = None,
+    stop: Optional[List[str]] = None,
+) -> AsyncIterator[str]:
+    """Streaming API OpenAI-compatible (Telkom AI) via `openai.AsyncOpenAI`"""
+    limits: Dict[str, Any] = {}
+    if max_tokens:
+        limits["max_tokens"] = max_tokens
+    if stop:
+        limits["stop"] = stop
+    stream = await client.chat.completions.create(
+        model=model, messages=messages, stream=True, **limits
+    )
+    async for chunk in stream:
+        # Sebagian server mengirim chunk terakhir berisi usage tanpa choices
+        if getattr(chunk, "usage", None):
+            usage["prompt_tokens"] = chunk.usage.prompt_tokens
+            usage["completion_tokens"] = chunk.usage.completion_tokens
+        if chunk.choices and chunk.choices[0].delta.content:
+            yield chunk.choices[0].delta.content
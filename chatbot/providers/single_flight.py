@@ -0,0 +1,188 @@
+# chatbot/providers/single_flight.py
+# ------------------------------------------------------------
+# Penggabungan (coalescing) panggilan upstream identik yang sedang berjalan
+# ------------------------------------------------------------
+# Beberapa sesi yang mengirim permintaan yang sama persis (hash konten
+# sama) pada saat bersamaan berbagi SATU panggilan upstream:
+# - do()     : panggilan blocking (LLM non-stream, OCR, LMM); pemanggil
+#              berikutnya menunggu hasil panggilan pertama.
+# - stream() : respons streaming diisi oleh satu thread pemompa ke buffer
+#              bersama (GenerationHandle); setiap pemanggil membaca buffer
+#              dari awal, sehingga token yang sama dikirim ke semua penunggu.
+#
+# Tidak ada cache: entri dihapus begitu panggilan selesai, jadi permintaan
+# sesudahnya selalu memanggil upstream lagi (hasil tidak pernah basi).
+#
+# Dengan `shared` (SharedState, misal SQLite / Redis), do() juga digabung
+# lintas proses worker: pemimpin memegang lease per kunci yang nilainya id
+# penerbangan (flight id) unik. Hasilnya dititipkan sebentar di bawah id itu,
+# dan hanya diambil worker yang melihat lease tersebut saat masih berjalan.
+# Pemanggil yang tidak menemukan lease selalu memanggil upstream sendiri.
+# stream() tetap per proses.
+# ------------------------------------------------------------
+
+import hashlib
+import json
+import threading
+import time
+import uuid
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Iterable, Iterator, Optional
+
+from chatbot.providers.generation_service import GenerationHandle
+from chatbot.shared_state import POLL_SECONDS, SharedState
+
+# Lease pemimpin lintas proses: lebih lama dari timeout panggilan terlama (OCR 150 dtk)
+SHARED_LEASE_TTL = 180
+# Hasil per flight id dititipkan cukup lama untuk diambil penunggu yang sedang polling
+SHARED_RESULT_TTL = 10
+
+
+def request_key(*parts: Any) -> str:
+    """Hash konten permintaan (endpoint, payload, model, ...) sebagai kunci coalescing"""
+    data = json.dumps(parts, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(data.encode("utf-8")).hexdigest()
+
+
+class SingleFlight:
+    """Satu panggilan upstream per kunci yang sedang berjalan; aman lintas thread"""
+
+    def __init__(self, shared: Optional[SharedState] = None):
+        self.shared = shared
+        self._lock = threading.Lock()
+        self._calls: Dict[str, Future] = {}
+        self._streams: Dict[str, GenerationHandle] = {}
+        # Panggilan upstream yang benar-benar dilakukan vs. yang menumpang
+        self.upstream = 0
+        self.coalesced = 0
+        # Panggilan yang menumpang hasil worker lain
+        self.coalesced_remote = 0
+
+    def do(self, key: str, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        """Menjalankan `fn` atau menunggu panggilan identik yang sedang berjalan"""
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = self._calls[key] = Future()
+            else:
+                self.coalesced += 1
+        if not leader:
+            return future.result()
+
+        try:
+            if self.shared is not None:
+                result = self._do_shared(key, fn, args, kwargs)
+            else:
+                self._count_upstream()
+                result = fn(*args, **kwargs)
+        except BaseException as e:
+            self._forget(self._calls, key)
+            future.set_exception(e)
+            raise
+        self._forget(self._calls, key)
+        future.set_result(result)
+        return result
+
+    def _count_upstream(self):
+        with self._lock:
+            self.upstream += 1
+
+    def _do_shared(self, key: str, fn, args, kwargs) -> Any:
+        lease_key = f"flight:lease:{key}"
+        flight_id = uuid.uuid4().hex.encode()
+        while not self.shared.set(lease_key, flight_id, ttl=SHARED_LEASE_TTL, nx=True):
+            # Worker lain sedang memanggil upstream: tunggu hasil penerbangan itu
+            current = self.shared.get(lease_key)
+            if current is None:
+                # Lease baru saja dilepas; coba ambil sendiri
+                continue
+            shared_result = self._wait_flight(key, lease_key, current)
+            if shared_result is not None:
+                with self._lock:
+                    self.coalesced_remote += 1
+                return shared_result["value"]
+            # Pemimpin gagal (atau hasilnya tidak bisa dibagi): salah satu
+            # penunggu mencoba sendiri
+        try:
+            self._count_upstream()
+            result = fn(*args, **kwargs)
+            try:
+                # Dititipkan sebelum lease dilepas, agar penunggu selalu menemukannya
+                self.shared.set_json(
+                    f"flight:result:{key}:{flight_id.decode()}",
+                    {"value": result},
+                    ttl=SHARED_RESULT_TTL,
+                )
+            except TypeError:
+                # Hasil tidak bisa diserialisasi JSON: hanya dibagi dalam proses ini
+                pass
+            return result
+        finally:
+            self.shared.delete(lease_key, flight_id)
+
+    def _wait_flight(self, key: str, lease_key: str, flight_id: bytes) -> Optional[dict]:
+        """Hasil penerbangan `flight_id`, atau None jika lease-nya hilang tanpa hasil"""
+        result_key = f"flight:result:{key}:{flight_id.decode()}"
+        while True:
+            shared_result = self.shared.get_json(result_key)
+            if shared_result is not None:
+                return shared_result
+            if self.shared.get(lease_key) != flight_id:
+                # Hasil ditulis sebelum lease dihapus: periksa sekali lagi
+                return self.shared.get_json(result_key)
+            time.sleep(POLL_SECONDS)
+
+    def stream(
+        self,
+        key: str,
+        gen_fn: Callable[..., Iterable[str]],
+        *args,
+        **kwargs,
+    ) -> Iterator[str]:
+        """Iterator potongan teks; upstream identik yang sedang berjalan dibagi"""
+        with self._lock:
+            handle = self._streams.get(key)
+            leader = handle is None
+            if leader:
+                handle = self._streams[key] = GenerationHandle()
+                self.upstream += 1
+            else:
+                self.coalesced += 1
+        if leader:
+            # Dipompa di thread sendiri: jika pemanggil pertama berhenti membaca
+            # (misal script Streamlit di-rerun), penunggu lain tetap menerima token
+            threading.Thread(
+                target=self._pump,
+                args=(key, handle, gen_fn, args, kwargs),
+                name="single-flight",
+                daemon=True,
+            ).start()
+        return handle.iter_chunks()
+
+    def _pump(self, key, handle: GenerationHandle, gen_fn, args, kwargs):
+        try:
+            for piece in gen_fn(*args, **kwargs):
+                if piece:
+                    handle._append(piece)
+        except BaseException as e:
+            self._forget(self._streams, key)
+            handle._finish(e)
+        else:
+            self._forget(self._streams, key)
+            handle._finish()
+
+    def _forget(self, table: Dict[str, Any], key: str):
+        # Dihapus sebelum hasil diumumkan: pemanggil baru tidak menerima hasil lama
+        with self._lock:
+            table.pop(key, None)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            in_flight = len(self._calls) + len(self._streams)
+        return {
+            "upstream": self.upstream,
+            "coalesced": self.coalesced,
+            "coalesced_remote": self.coalesced_remote,
+            "in_flight": in_flight,
+        }
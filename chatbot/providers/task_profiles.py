@@ -0,0 +1,113 @@
+# chatbot/providers/task_profiles.py
+# ------------------------------------------------------------
+# Parameter generasi per alur kerja (chat, profil, tender, site, voice)
+# ------------------------------------------------------------
+# Setiap alur punya TaskProfile: batas token keluaran (max_tokens),
+# temperature, stop sequence, dan model. Batas statis di TASK_PROFILES
+# adalah plafon; begitu cukup sampel panjang jawaban aktual terkumpul
+# (dicatat log_usage dengan label = nama tugas), max_tokens diperkecil ke
+# persentil ke-95 × HEADROOM. Jawaban yang terpotong di batas ikut menaikkan
+# persentil, sehingga batas kembali naik hingga plafon.
+#
+# Gemini 2.5 menghitung token "thinking" ke dalam max_output_tokens, jadi
+# batas yang dipangkas ke panjang jawaban bisa habis untuk berpikir (jawaban
+# kosong / terpotong). Profil chat_gemini karena itu tidak adaptif dan diberi
+# plafon yang cukup untuk thinking + jawaban.
+#
+# Override lewat environment variable, misal:
+#   TASK_TENDER_MAX_TOKENS=2000   TASK_VOICE_MODEL=telkom-llm-lite
+#   TASK_SITE_STOP='["\n\n\n"]'   TASK_PROFILES_ADAPTIVE=0 (batas statis)
+# Model kosong berarti model bawaan pemanggil.
+# ------------------------------------------------------------
+
+import json
+import os
+from typing import Any, Dict, List, Optional
+
+from chatbot.retrieval.token_budget import output_lengths
+
+# Sampel minimum sebelum max_tokens disesuaikan
+MIN_SAMPLES = 5
+# Cadangan di atas persentil ke-95 panjang jawaban aktual
+HEADROOM = 1.3
+ADAPTIVE = os.getenv("TASK_PROFILES_ADAPTIVE", "1") != "0"
+
+
+class TaskProfile:
+    """Parameter generasi satu alur kerja"""
+
+    def __init__(
+        self,
+        task: str,
+        max_tokens: int,
+        temperature: float = 0.2,
+        stop: Optional[List[str]] = None,
+        model: Optional[str] = None,
+        min_tokens: int = 64,
+        adaptive: bool = True,
+    ):
+        prefix = f"TASK_{task.upper()}_"
+        self.task = task
+        self.max_tokens = int(os.getenv(prefix + "MAX_TOKENS", max_tokens))
+        self.temperature = float(os.getenv(prefix + "TEMPERATURE", temperature))
+        self.stop: List[str] = (
+            json.loads(os.getenv(prefix + "STOP")) if os.getenv(prefix + "STOP") else stop or []
+        )
+        self.model: Optional[str] = os.getenv(prefix + "MODEL") or model
+        self.min_tokens = min(min_tokens, self.max_tokens)
+        self.adaptive = adaptive
+
+    def output_budget(self) -> int:
+        """max_tokens hasil penyesuaian dari panjang jawaban aktual (≤ plafon)"""
+        if not (ADAPTIVE and self.adaptive):
+            return self.max_tokens
+        samples = output_lengths(self.task)
+        if len(samples) < MIN_SAMPLES:
+            return self.max_tokens
+        ordered = sorted(samples)
+        p95 = ordered[min(int(len(ordered) * 0.95), len(ordered) - 1)]
+        return max(self.min_tokens, min(int(p95 * HEADROOM), self.max_tokens))
+
+    def params(self, default_model: Optional[str] = None) -> Dict[str, Any]:
+        return {
+            "model": self.model or default_model,
+            "max_tokens": self.output_budget(),
+            "temperature": self.temperature,
+            "stop": list(self.stop),
+        }
+
+
+TASK_PROFILES: Dict[str, TaskProfile] = {
+    profile.task: profile
+    for profile in [
+        # Jawaban chat bervariasi panjangnya; plafon sama dengan batas lama
+        TaskProfile("chat", max_tokens=1200, temperature=0.2),
+        # Chat main.py (Gemini 2.5): thinking ikut dihitung → batas statis
+        TaskProfile(
+            "chat_gemini",
+            max_tokens=8192,
+            temperature=0.2,
+            model="gemini-2.5-flash",
+            adaptive=False,
+        ),
+        # Tujuh blok template Consultative Selling
+        TaskProfile("profile", max_tokens=1600, temperature=0.2),
+        # Tabel compliance + ringkasan bisa panjang
+        TaskProfile("tender", max_tokens=2000, temperature=0.1),
+        # Rekomendasi teknis maks 7 poin: berhenti di poin ke-8
+        TaskProfile("site", max_tokens=400, temperature=0.2, stop=["\n8."]),
+        # Briefing lisan 30 detik (±80 kata)
+        TaskProfile("voice", max_tokens=300, temperature=0.3),
+        # Cek koneksi: satu baris cukup
+        TaskProfile("ping", max_tokens=16, temperature=0.0, stop=["\n"], min_tokens=16),
+    ]
+}
+
+
+def get_profile(task: str) -> TaskProfile:
+    return TASK_PROFILES[task]
+
+
+def task_params(task: str, default_model: Optional[str] = None) -> Dict[str, Any]:
+    """model, max_tokens, temperature, stop untuk `task`"""
+    return get_profile(task).params(default_model)
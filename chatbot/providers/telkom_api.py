@@ -0,0 +1,353 @@
+# chatbot/providers/telkom_api.py
+# ------------------------------------------------------------
+# Klien API Telkom (raw) tanpa ketergantungan ke Streamlit
+# ------------------------------------------------------------
+# Dipakai oleh UI (test.py) dan oleh mode batch/headless
+# (batch_profile.py). Semua konfigurasi (endpoint, API key, skema auth)
+# dikirim sebagai parameter, sehingga fungsi di sini aman dipanggil dari
+# thread lain maupun dari CLI.
+# ------------------------------------------------------------
+
+import base64
+import json
+from typing import Any, Dict, Iterator, List, Optional
+
+import requests
+
+from chatbot.retrieval.token_budget import estimate_tokens, log_usage
+
+# --------------------------
+# Endpoint default
+# --------------------------
+DEFAULT_ENDPOINTS = {
+    "TELKOM_LLM": "https://telkom-ai-dag-api.apilogy.id/Telkom-LLM/0.0.4/llm",  # ← sudah pakai /llm
+    "LMM": "https://telkom-ai-dag.api.apilogy.id/LargeMultimodalModel/0.0.2",
+    "OCR": "http://telkom-ai-dag.api.apilogy.id/OCR_Document_Based/0.0.5",
+    "OD": "http://telkom-ai-dag.api.apilogy.id/Object_Detection/0.0.1",
+    "STT": "http://telkom-ai-dag.api.apilogy.id/Speech_To_Text/0.0.2",
+    "TTS": "http://telkom-ai-dag.api.apilogy.id/Text_To_Speech/0.0.2",
+}
+
+AUTH_SCHEMES = ["bearer", "x-api-key", "apikey", "bearer + x-api-key"]
+
+# Model Telkom-LLM (juga menentukan batas jendela konteks)
+TELKOM_LLM_MODEL = "telkom-llm-0.0.4"
+
+# --------------------------
+# System Prompt
+# --------------------------
+SYSTEM_PROMPT = (
+    "Anda adalah Asisten Consultative Selling Telkom. Jawab ringkas, actionable, "
+    "dan berbasis data. Selalu format hasil dengan blok berikut bila relevan:\n\n"
+    "[Profil]\n"
+    "[Pain Points]\n"
+    "[Opportunity 90 Hari]\n"
+    "[Risiko]\n"
+    "[Next Best Action]\n"
+    "[Talk Track 30 detik]\n"
+    "[Data yang perlu diverifikasi]\n"
+    "Jika pengguna mengunggah dokumen atau foto, lakukan analisis kontekstual."
+)
+
+NO_OUTPUT_TEXT = "Maaf, tidak ada keluaran dari LLM."
+
+
+# --------------------------
+# Helpers
+# --------------------------
+def safe_get(d: Dict[str, Any], path: str, default=None):
+    cur = d
+    for p in path.split("."):
+        if isinstance(cur, dict) and p in cur:
+            cur = cur[p]
+        else:
+            return default
+    return cur
+
+
+def auth_headers(api_key: Optional[str], scheme: str) -> Dict[str, str]:
+    h = {"Content-Type": "application/json"}
+    if not api_key:
+        return h
+    key = api_key.strip()
+
+    if scheme == "bearer":
+        h["Authorization"] = f"Bearer {key}"
+    elif scheme == "x-api-key":
+        h["x-api-key"] = key
+    elif scheme == "apikey":
+        h["apikey"] = key
+    elif scheme == "bearer + x-api-key":
+        h["Authorization"] = f"Bearer {key}"
+        h["x-api-key"] = key
+    return h
+
+
+def post_json(
+    url: str,
+    payload: Dict[str, Any],
+    headers: Optional[Dict[str, str]] = None,
+    timeout: int = 120,
+) -> Dict[str, Any]:
+    r = requests.post(
+        url,
+        json=payload,
+        headers=headers or {"Content-Type": "application/json"},
+        timeout=timeout,
+    )
+    try:
+        r.raise_for_status()
+    except requests.HTTPError as e:
+        raise RuntimeError(f"{e} | body: {r.text[:500]}") from e
+    return r.json()
+
+
+# --------------------------
+# Telkom-LLM
+# --------------------------
+def build_llm_payload(
+    user_text: str,
+    system_prompt: str = SYSTEM_PROMPT,
+    temperature: float = 0.2,
+    max_tokens: int = 1200,
+    history: Optional[List[Dict[str, str]]] = None,
+    stop: Optional[List[str]] = None,
+    model: Optional[str] = None,
+) -> Dict[str, Any]:
+    # Prompt sistem hanya dikirim sekali di field "system"; riwayat (jika ada)
+    # mendahului pesan pengguna saat ini
+    inputs = {
+        "system": system_prompt,
+        "messages": (history or []) + [{"role": "user", "content": user_text}],
+        "temperature": temperature,
+        "max_tokens": max_tokens,
+    }
+    if stop:
+        inputs["stop"] = stop
+    return {"model": model or TELKOM_LLM_MODEL, "inputs": inputs}
+
+
+def _prompt_tokens(payload: Dict[str, Any]) -> int:
+    inputs = payload["inputs"]
+    return estimate_tokens(inputs["system"]) + sum(
+        estimate_tokens(m["content"]) for m in inputs["messages"]
+    )
+
+
+def parse_llm_response(
+    resp: Dict[str, Any], payload: Dict[str, Any], label: str = "telkom_llm"
+) -> str:
+    """Mengambil teks jawaban dan mencatat token perkiraan vs aktual"""
+    usage = safe_get(resp, "outputs.usage") or resp.get("usage") or {}
+    text = safe_get(resp, "outputs.text", NO_OUTPUT_TEXT)
+    log_usage(
+        label,
+        payload["model"],
+        _prompt_tokens(payload),
+        usage.get("prompt_tokens"),
+        usage.get("completion_tokens"),
+        estimate_tokens(text) if text != NO_OUTPUT_TEXT else None,
+    )
+    return text
+
+
+def telkom_llm(
+    user_text: str,
+    system_prompt: str = SYSTEM_PROMPT,
+    temperature: float = 0.2,
+    max_tokens: int = 1200,
+    endpoint: str = DEFAULT_ENDPOINTS["TELKOM_LLM"],
+    api_key: Optional[str] = None,
+    auth_scheme: str = "bearer",
+    timeout: int = 120,
+    stop: Optional[List[str]] = None,
+    model: Optional[str] = None,
+    label: str = "telkom_llm",
+) -> str:
+    """Memanggil Telkom-LLM secara headless (tanpa session_state Streamlit)"""
+    if not api_key:
+        raise RuntimeError("❌ No API key provided.")
+    payload = build_llm_payload(
+        user_text, system_prompt, temperature, max_tokens, stop=stop, model=model
+    )
+    resp = post_json(endpoint, payload, auth_headers(api_key, auth_scheme), timeout)
+    return parse_llm_response(resp, payload, label)
+
+
+def _event_text(event: Any) -> str:
+    """Mengambil potongan teks dari satu event streaming (beberapa format didukung)"""
+    if isinstance(event, str):
+        return event
+    if not isinstance(event, dict):
+        return ""
+    for path in (
+        "choices.0.delta.content",
+        "outputs.text",
+        "outputs.token",
+        "delta",
+        "token",
+        "text",
+    ):
+        cur: Any = event
+        for p in path.split("."):
+            if isinstance(cur, list) and p.isdigit() and int(p) < len(cur):
+                cur = cur[int(p)]
+            elif isinstance(cur, dict) and p in cur:
+                cur = cur[p]
+            else:
+                cur = None
+                break
+        if isinstance(cur, str):
+            return cur
+    return ""
+
+
+def _iter_stream_events(resp) -> Iterator[Any]:
+    """Event dari respons SSE (`data: ...`) atau JSON per baris (NDJSON)"""
+    for raw in resp.iter_lines(decode_unicode=True):
+        if not raw:
+            continue
+        line = raw[len("data:"):].strip() if raw.startswith("data:") else raw.strip()
+        if line.startswith((":", "event:", "id:", "retry:")):
+            continue
+        if line == "[DONE]":
+            return
+        try:
+            yield json.loads(line)
+        except ValueError:
+            # Sebagian server mengirim token mentah (bukan JSON)
+            yield line
+
+
+def stream_llm(
+    payload: Dict[str, Any],
+    endpoint: str,
+    headers: Dict[str, str],
+    timeout: int = 120,
+    label: str = "telkom_llm_stream",
+) -> Iterator[str]:
+    """Memanggil Telkom-LLM dalam mode streaming dan menghasilkan potongan teks.
+
+    Jika endpoint tidak mendukung streaming (menolak parameter `stream` atau
+    mengembalikan satu JSON utuh), hasil blocking dikirim sebagai satu potongan.
+    Pemakaian token dicatat dengan `label` (nama tugas untuk TaskProfile).
+    """
+    stream_payload = {**payload, "inputs": {**payload["inputs"], "stream": True}}
+    resp = requests.post(
+        endpoint,
+        json=stream_payload,
+        headers={**headers, "Accept": "text/event-stream"},
+        timeout=timeout,
+        stream=True,
+    )
+    if resp.status_code in (400, 404, 415, 422):
+        # Parameter stream tidak dikenali → ulangi sebagai panggilan blocking
+        resp.close()
+        yield parse_llm_response(post_json(endpoint, payload, headers, timeout), payload, label)
+        return
+    try:
+        resp.raise_for_status()
+    except requests.HTTPError as e:
+        raise RuntimeError(f"{e} | body: {resp.text[:500]}") from e
+
+    content_type = resp.headers.get("Content-Type", "")
+    if "application/json" in content_type:
+        yield parse_llm_response(resp.json(), payload, label)
+        return
+
+    received = ""
+    usage: Dict[str, Any] = {}
+    with resp:
+        for event in _iter_stream_events(resp):
+            if isinstance(event, dict):
+                usage = safe_get(event, "outputs.usage") or event.get("usage") or usage
+            piece = _event_text(event)
+            if not piece:
+                continue
+            # Sebagian server mengirim teks kumulatif, bukan delta
+            if received and piece.startswith(received):
+                piece = piece[len(received):]
+            received += piece
+            if piece:
+                yield piece
+
+    log_usage(
+        label,
+        payload["model"],
+        _prompt_tokens(payload),
+        usage.get("prompt_tokens"),
+        usage.get("completion_tokens"),
+        estimate_tokens(received),
+    )
+
+
+# --------------------------
+# Layanan tanpa auth (OCR / OD / STT / TTS)
+# --------------------------
+def ocr(
+    file_b64: str,
+    endpoint: str = DEFAULT_ENDPOINTS["OCR"],
+    timeout: int = 150,
+) -> Dict[str, Any]:
+    return post_json(endpoint, {"file_base64": file_b64}, timeout=timeout)
+
+
+def ocr_pdf(
+    pdf_bytes: bytes,
+    endpoint: str = DEFAULT_ENDPOINTS["OCR"],
+    timeout: int = 150,
+) -> str:
+    """Teks hasil OCR dari PDF (misal satu halaman hasil scan)"""
+    file_b64 = "data:application/pdf;base64," + base64.b64encode(pdf_bytes).decode()
+    return ocr(file_b64, endpoint, timeout).get("text", "")
+
+
+def stt(
+    audio_b64: str,
+    endpoint: str = DEFAULT_ENDPOINTS["STT"],
+    language: str = "id",
+    timeout: int = 180,
+) -> Dict[str, Any]:
+    payload = {"audio_base64": audio_b64, "language": language}
+    return post_json(endpoint, payload, timeout=timeout)
+
+
+def tts(
+    text: str,
+    endpoint: str = DEFAULT_ENDPOINTS["TTS"],
+    voice: str = "id_female_1",
+    timeout: int = 180,
+) -> Dict[str, Any]:
+    payload = {"text": text, "voice": voice}
+    return post_json(endpoint, payload, timeout=timeout)
+
+
+# --------------------------
+# Prompt builders
+# --------------------------
+PROFILE_PRODUCTS = [
+    "IndiBiz Internet",
+    "SD-WAN",
+    "MPLS/IPVPN",
+    "WAN Optimization",
+    "Cloud/Edge",
+    "Security",
+]
+
+
+def build_profile_prompt(
+    company: str,
+    industry: Optional[str] = None,
+    products: Optional[List[str]] = None,
+    crm_snapshot: Optional[str] = None,
+    task: str = "profil",
+) -> str:
+    """Prompt tab Profil Perusahaan; `task` = "profil" atau "strategi" """
+    return (
+        f"Tugas: {'Profilkan' if task == 'profil' else 'Rekomendasikan pendekatan untuk'} perusahaan berikut.\n"
+        f"Nama: {company}\n"
+        f"Industri: {industry or '-'}\n"
+        f"Produk target: {', '.join(products) if products else '-'}\n"
+        f"Data CRM ringkas: {crm_snapshot or '-'}\n"
+        f"Tujuan: peluang proyek 90 hari + next best action."
+    )
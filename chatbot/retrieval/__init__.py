@@ -0,0 +1,9 @@
+# chatbot/retrieval
+# ------------------------------------------------------------
+# Memilih apa yang masuk ke prompt
+# ------------------------------------------------------------
+# - knowledge_base : basis pengetahuan per sesi & pencarian chunk
+# - token_budget   : perkiraan token & perencana anggaran konteks
+# - chat_memory    : riwayat chat dengan ringkasan giliran lama
+# - prompts        : peran (role) dan prompt sistem dengan konteks dokumen
+# ------------------------------------------------------------
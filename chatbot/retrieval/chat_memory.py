@@ -0,0 +1,162 @@
+# chatbot/retrieval/chat_memory.py
+# ------------------------------------------------------------
+# Memori percakapan multi-giliran untuk Telkom-LLM (raw API)
+# ------------------------------------------------------------
+# - ConversationLog: log percakapan append-only yang ringkas (role disimpan
+#   sebagai byte, jumlah token per giliran dihitung sekali saat ditambahkan).
+#   Dipakai juga sebagai transkrip chat main.py / main_telkom.py.
+# - build_chat_request(): menyiapkan prompt sistem (dikirim sekali, tidak
+#   diulang di tiap pesan), riwayat yang dibatasi anggaran token, dan
+#   ringkasan giliran lama yang sudah tidak muat.
+# ------------------------------------------------------------
+
+import re
+from array import array
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from chatbot.retrieval.token_budget import (
+    MESSAGE_OVERHEAD_TOKENS,
+    ContextPlan,
+    estimate_tokens,
+    plan_context,
+    truncate_to_tokens,
+)
+
+ROLES = ("user", "assistant")
+
+# Panjang maksimum ringkasan satu giliran dan seluruh ringkasan (token)
+TURN_SUMMARY_TOKENS = 40
+MAX_SUMMARY_TOKENS = 600
+
+_SENTENCE_END_RE = re.compile(r"(?<=[.!?])\s+")
+
+
+def summarize_turn(role: str, content: str) -> str:
+    """Ringkasan ekstraktif satu giliran: kalimat pertama, dipangkas per token"""
+    first = _SENTENCE_END_RE.split(content.strip(), maxsplit=1)[0]
+    first = " ".join(first.split())
+    who = "Pengguna" if role == "user" else "Asisten"
+    return f"- {who}: {truncate_to_tokens(first, TURN_SUMMARY_TOKENS, marker=' …')}"
+
+
+class ConversationLog:
+    """Log percakapan append-only dengan jumlah token per giliran yang di-cache"""
+
+    def __init__(self):
+        self._roles = bytearray()
+        self._contents: List[str] = []
+        self._tokens = array("I")
+        # Giliran yang tidak dikirim ke model (misal pesan error)
+        self._in_prompt = bytearray()
+        # Giliran [0, summarized_upto) sudah dipadatkan menjadi ringkasan
+        self.summarized_upto = 0
+        self._summary_lines: List[str] = []
+
+    def __len__(self) -> int:
+        return len(self._contents)
+
+    def __iter__(self) -> Iterator[Tuple[str, str]]:
+        return self.turns()
+
+    def turns(self, start: int = 0) -> Iterator[Tuple[str, str]]:
+        """(role, isi) giliran mulai dari `start`, tanpa menyalin seluruh log"""
+        for i in range(max(start, 0), len(self._contents)):
+            yield ROLES[self._roles[i]], self._contents[i]
+
+    def append(
+        self, role: str, content: str, in_prompt: bool = True, tokens: Optional[int] = None
+    ):
+        """Menambahkan giliran; `tokens` diberikan jika sudah dihitung (misal saat dipulihkan)"""
+        self._roles.append(ROLES.index(role))
+        self._contents.append(content)
+        if tokens is None:
+            tokens = estimate_tokens(content) + MESSAGE_OVERHEAD_TOKENS
+        self._tokens.append(tokens)
+        self._in_prompt.append(1 if in_prompt else 0)
+
+    def turn_tokens(self, i: int) -> int:
+        return self._tokens[i]
+
+    def window(self, start: int = 0) -> Tuple[List[Dict[str, str]], List[int]]:
+        """Pesan (format API) dan jumlah tokennya mulai dari giliran `start`"""
+        messages, tokens = [], []
+        for i in range(start, len(self._contents)):
+            if self._in_prompt[i]:
+                messages.append(
+                    {"role": ROLES[self._roles[i]], "content": self._contents[i]}
+                )
+                tokens.append(self._tokens[i])
+        return messages, tokens
+
+    @property
+    def summary(self) -> str:
+        return "\n".join(self._summary_lines)
+
+    def compact(self, upto: int):
+        """Memadatkan giliran [summarized_upto, upto) ke dalam ringkasan berjalan"""
+        for i in range(self.summarized_upto, min(upto, len(self._contents))):
+            if self._in_prompt[i]:
+                self._summary_lines.append(
+                    summarize_turn(ROLES[self._roles[i]], self._contents[i])
+                )
+        self.summarized_upto = max(self.summarized_upto, upto)
+        # Ringkasan juga dibatasi: baris tertua dibuang lebih dulu
+        while (
+            len(self._summary_lines) > 1
+            and estimate_tokens(self.summary) > MAX_SUMMARY_TOKENS
+        ):
+            self._summary_lines.pop(0)
+
+
+def build_chat_request(
+    log: ConversationLog,
+    model: str,
+    system_prompt: str,
+    question: str,
+    max_output_tokens: int,
+) -> Tuple[str, List[Dict[str, str]], ContextPlan]:
+    """Menyusun prompt sistem + riwayat untuk pertanyaan baru.
+
+    `log` belum berisi pertanyaan saat ini. Giliran lama yang tidak muat di
+    anggaran token dipadatkan menjadi ringkasan dan disisipkan ke prompt sistem.
+    """
+
+    def system_with_summary() -> str:
+        if not log.summary:
+            return system_prompt
+        return f"{system_prompt}\n\nRingkasan percakapan sebelumnya:\n{log.summary}"
+
+    def plan() -> ContextPlan:
+        history, tokens = log.window(log.summarized_upto)
+        return plan_context(
+            model,
+            system_with_summary(),
+            question,
+            history=history,
+            history_token_counts=tokens,
+            max_output_tokens=max_output_tokens,
+        )
+
+    result = plan()
+    # Ringkasan yang bertambah ikut memakai anggaran, jadi bisa butuh beberapa putaran
+    for _ in range(3):
+        if not result.dropped["history"]:
+            break
+        # Padatkan giliran yang terbuang (dihitung dalam indeks log, bukan daftar pesan)
+        kept_from = len(log) - _turns_spanning(log, len(result.history))
+        log.compact(kept_from)
+        result = plan()
+    return result.system_prompt, result.history, result
+
+
+def _turns_spanning(log: ConversationLog, n_messages: int) -> int:
+    """Jumlah giliran terakhir di log yang memuat `n_messages` pesan prompt"""
+    if n_messages == 0:
+        return 0
+    count = 0
+    for i in range(len(log) - 1, log.summarized_upto - 1, -1):
+        if log._in_prompt[i]:
+            count += 1
+        if count == n_messages:
+            return len(log) - i
+    return len(log) - log.summarized_upto
@@ -0,0 +1,163 @@
+# chatbot/retrieval/knowledge_base.py
+# ------------------------------------------------------------
+# Model basis pengetahuan per-dokumen untuk satu sesi
+# ------------------------------------------------------------
+# Basis pengetahuan adalah kumpulan DocumentRef yang dikunci dengan hash
+# konten. Penambahan, penghapusan, dan penggantian dokumen memperbarui
+# jumlah kata secara inkremental, tanpa memindai atau menyambung ulang
+# string basis pengetahuan. Pencarian memakai indeks chunk milik setiap
+# dokumen (dibagi lewat DocumentStore), tanpa salinan indeks per sesi.
+# ------------------------------------------------------------
+
+import re
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from chatbot.ingestion.doc_store import DocumentRef
+from chatbot.retrieval.token_budget import estimate_tokens
+
+_WORD_RE = re.compile(r"\w+", re.UNICODE)
+
+
+class KnowledgeBase:
+    """Kumpulan dokumen milik sesi dengan operasi add/remove/replace berbasis hash"""
+
+    def __init__(self):
+        # Urutan penyisipan dict dipakai sebagai urutan dokumen di prompt
+        self._refs: Dict[str, DocumentRef] = {}
+        self._sources: Dict[str, str] = {}
+        self.word_count = 0
+        # Naik setiap kali isi berubah; dipakai sebagai kunci cache turunan
+        self.version = 0
+        # Jumlah token text(), di-cache per versi
+        self._tokens_cache: Tuple[int, int] = (-1, 0)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._refs
+
+    def __len__(self) -> int:
+        return len(self._refs)
+
+    def __iter__(self):
+        return iter(self._refs.values())
+
+    def keys(self) -> List[str]:
+        return list(self._refs)
+
+    def get(self, key: str) -> Optional[DocumentRef]:
+        return self._refs.get(key)
+
+    def find_by_name(self, name: str, source: Optional[str] = None) -> Optional[str]:
+        for key, ref in self._refs.items():
+            if ref.name == name and (source is None or self._sources[key] == source):
+                return key
+        return None
+
+    # --------------------------
+    # Operasi perubahan
+    # --------------------------
+    def add(self, ref: DocumentRef, source: str = "upload") -> bool:
+        """Menambahkan dokumen; mengembalikan False jika hash yang sama sudah ada"""
+        if ref.key in self._refs:
+            ref.release()
+            return False
+        self._refs[ref.key] = ref
+        self._sources[ref.key] = source
+        self.word_count += ref.document.word_count
+        self.version += 1
+        return True
+
+    def remove(self, key: str) -> bool:
+        ref = self._refs.pop(key, None)
+        if ref is None:
+            return False
+        self._sources.pop(key, None)
+        self.word_count -= ref.document.word_count
+        ref.release()
+        self.version += 1
+        return True
+
+    def replace(self, old_key: str, ref: DocumentRef, source: str = "upload") -> bool:
+        """Mengganti dokumen lama dengan versi baru di posisi yang sama"""
+        if old_key not in self._refs or ref.key in self._refs:
+            self.remove(old_key)
+            return self.add(ref, source=source)
+
+        old_ref = self._refs[old_key]
+        self.word_count -= old_ref.document.word_count
+        self._refs = {
+            (ref.key if k == old_key else k): (ref if k == old_key else v)
+            for k, v in self._refs.items()
+        }
+        self._sources.pop(old_key, None)
+        self._sources[ref.key] = source
+        self.word_count += ref.document.word_count
+        old_ref.release()
+        self.version += 1
+        return True
+
+    def sync_source(self, source: str, keys: Iterable[str]) -> List[str]:
+        """Menghapus dokumen dari `source` yang tidak ada lagi di `keys`"""
+        keep = set(keys)
+        removed = [
+            k for k, s in self._sources.items() if s == source and k not in keep
+        ]
+        for key in removed:
+            self.remove(key)
+        return removed
+
+    def clear(self):
+        for key in list(self._refs):
+            self.remove(key)
+
+    # --------------------------
+    # Akses isi
+    # --------------------------
+    def text(self) -> str:
+        """Merakit teks basis pengetahuan untuk prompt sistem"""
+        parts = []
+        for ref in self._refs.values():
+            parts.append(f"{self._header(ref)}{ref.document.text}")
+        return "".join(parts)
+
+    def text_tokens(self) -> int:
+        """Perkiraan token `text()` tanpa merakitnya; dihitung ulang hanya jika isi berubah"""
+        if self._tokens_cache[0] != self.version:
+            total = sum(
+                estimate_tokens(self._header(ref)) + ref.document.token_count
+                for ref in self._refs.values()
+            )
+            self._tokens_cache = (self.version, total)
+        return self._tokens_cache[1]
+
+    @staticmethod
+    def _header(ref: DocumentRef) -> str:
+        label = ref.name
+        if ref.document.kind == "excel":
+            label += " (Excel Table)"
+        return f"\n\n=== DOCUMENT: {label} ===\n"
+
+    def search(self, query: str, k: int = 5) -> List[Tuple[DocumentRef, int, float]]:
+        """Mencari chunk paling relevan berdasarkan jumlah kata kueri yang cocok"""
+        scores: Dict[Tuple[str, int], float] = {}
+        for term in set(_WORD_RE.findall(query.lower())):
+            postings = [
+                (key, ids)
+                for key, ref in self._refs.items()
+                if (ids := ref.document.index.get(term))
+            ]
+            if not postings:
+                continue
+            # Kata yang jarang muncul (di semua dokumen sesi) diberi bobot lebih tinggi
+            weight = 1.0 / sum(len(ids) for _, ids in postings)
+            for key, ids in postings:
+                for chunk_id in ids:
+                    scores[(key, chunk_id)] = scores.get((key, chunk_id), 0.0) + weight
+        best = sorted(scores.items(), key=lambda item: item[1], reverse=True)[:k]
+        return [(self._refs[key], chunk_id, score) for (key, chunk_id), score in best]
+
+    def retrieve(self, query: str, k: int = 20) -> List[str]:
+        """Chunk paling relevan untuk kueri, diberi label nama dokumen"""
+        return [
+            f"[{ref.name}]\n{ref.document.chunks[chunk_id]}"
+            for ref, chunk_id, _ in self.search(query, k)
+        ]
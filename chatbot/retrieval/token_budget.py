@@ -0,0 +1,268 @@
+# chatbot/retrieval/token_budget.py
+# ------------------------------------------------------------
+# Penghitungan token & perencana anggaran konteks
+# ------------------------------------------------------------
+# - estimate_tokens(): perkiraan jumlah token yang cepat tanpa tokenizer
+#   asli (cukup akurat untuk perencanaan, ±15% untuk teks Latin).
+# - MODEL_CONTEXT_LIMITS: batas jendela konteks per model.
+# - plan_context(): membagi anggaran token ke prompt sistem, konteks hasil
+#   retrieval, riwayat percakapan, dan pertanyaan, lalu memangkas
+#   berdasarkan prioritas (bukan memotong karakter).
+# - log_usage(): mencatat token perkiraan vs aktual per permintaan, serta
+#   panjang jawaban per label (output_lengths) untuk penyesuaian max_tokens.
+# ------------------------------------------------------------
+
+import logging
+import os
+import re
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional
+
+logger = logging.getLogger("token_budget")
+
+# Batas jendela konteks (token) per model. Bisa ditimpa lewat environment
+# variable CONTEXT_LIMIT_<NAMA_MODEL>, misal CONTEXT_LIMIT_TELKOM_AI=16384
+MODEL_CONTEXT_LIMITS = {
+    "gemini-2.5-flash": 1_048_576,
+    "telkom-ai": 8_192,
+    "telkom-llm-0.0.4": 8_192,
+}
+DEFAULT_CONTEXT_LIMIT = 8_192
+
+# Token yang dicadangkan untuk jawaban jika pemanggil tidak menentukan
+DEFAULT_OUTPUT_RESERVE = 1_200
+
+# Overhead format per pesan (role, pemisah) dalam token
+MESSAGE_OVERHEAD_TOKENS = 4
+
+# Sisa anggaran minimum agar satu potongan konteks masih layak dipangkas
+MIN_PARTIAL_TOKENS = 64
+
+_PIECE_RE = re.compile(r"\w+|[^\w\s]", re.UNICODE)
+
+
+def _piece_tokens(piece: str) -> int:
+    # Kata pendek ≈ 1 token; kata panjang dipecah BPE kira-kira per 4 karakter
+    n = len(piece)
+    return 1 if n <= 4 else (n + 3) // 4
+
+
+def estimate_tokens(text: str) -> int:
+    """Perkiraan cepat jumlah token sebuah teks"""
+    if not text:
+        return 0
+    return sum(_piece_tokens(m.group()) for m in _PIECE_RE.finditer(text))
+
+
+def truncate_to_tokens(text: str, max_tokens: int, marker: str = "\n[...]") -> str:
+    """Memotong teks agar ≤ max_tokens, di batas kata"""
+    if max_tokens <= 0:
+        return ""
+    used = 0
+    # Penanda pemotongan ikut dihitung agar hasil akhir tetap dalam anggaran;
+    # jika penanda sendiri tidak muat, teks dipotong tanpa penanda
+    marker_tokens = estimate_tokens(marker)
+    if marker_tokens > max_tokens:
+        marker, marker_tokens = "", 0
+    cut_limit = max_tokens - marker_tokens
+    cut_at = None
+    for m in _PIECE_RE.finditer(text):
+        used += _piece_tokens(m.group())
+        if cut_at is None and used > cut_limit:
+            cut_at = m.start()
+        if used > max_tokens:
+            return text[:cut_at].rstrip() + marker
+    return text
+
+
+def get_context_limit(model: str) -> int:
+    env_key = "CONTEXT_LIMIT_" + re.sub(r"[^A-Za-z0-9]", "_", model).upper()
+    if os.getenv(env_key):
+        return int(os.getenv(env_key))
+    return MODEL_CONTEXT_LIMITS.get(model, DEFAULT_CONTEXT_LIMIT)
+
+
+class ContextPlan:
+    """Hasil perencanaan: bagian prompt yang lolos anggaran + rincian token"""
+
+    def __init__(self, model: str, limit: int, output_reserve: int):
+        self.model = model
+        self.limit = limit
+        self.output_reserve = output_reserve
+        self.system_prompt = ""
+        self.question = ""
+        self.context: List[str] = []
+        self.history: List[Dict[str, str]] = []
+        self.tokens: Dict[str, int] = {
+            "system": 0,
+            "context": 0,
+            "history": 0,
+            "question": 0,
+        }
+        self.dropped = {"context": 0, "history": 0}
+        # Anggaran token yang tersedia untuk konteks (setelah sistem & pertanyaan)
+        self.context_budget = 0
+
+    @property
+    def prompt_tokens(self) -> int:
+        return sum(self.tokens.values())
+
+    def context_text(self, separator: str = "\n\n") -> str:
+        return separator.join(self.context)
+
+
+def plan_context(
+    model: str,
+    system_prompt: str,
+    question: str,
+    context_candidates: Optional[List[str]] = None,
+    history: Optional[List[Dict[str, str]]] = None,
+    history_token_counts: Optional[List[int]] = None,
+    context_full: Optional[str] = None,
+    context_full_tokens: Optional[int] = None,
+    max_output_tokens: int = DEFAULT_OUTPUT_RESERVE,
+    context_share: float = 0.6,
+) -> ContextPlan:
+    """Membagi anggaran konteks model dan memangkas berdasarkan prioritas.
+
+    Prioritas: pertanyaan > prompt sistem > konteks retrieval / riwayat.
+    `context_candidates` harus sudah terurut dari yang paling relevan;
+    `context_full` (misal seluruh basis pengetahuan) dipakai utuh bila muat;
+    `context_full_tokens` dapat diberikan jika jumlah tokennya sudah di-cache.
+    Riwayat diisi dari pesan terbaru ke terlama; `history_token_counts` dapat
+    diberikan jika jumlah token tiap pesan sudah di-cache. Anggaran yang tidak
+    terpakai oleh konteks diberikan ke riwayat, dan sebaliknya.
+    """
+    limit = get_context_limit(model)
+    plan = ContextPlan(model, limit, max_output_tokens)
+    available = max(limit - max_output_tokens, 0)
+
+    # 1) Pertanyaan saat ini selalu dikirim (dipangkas hanya jika melebihi setengah anggaran)
+    plan.question = truncate_to_tokens(question, available // 2)
+    plan.tokens["question"] = estimate_tokens(plan.question) + MESSAGE_OVERHEAD_TOKENS
+    available -= plan.tokens["question"]
+
+    # 2) Prompt sistem (instruksi peran) berikutnya
+    plan.system_prompt = truncate_to_tokens(system_prompt, available // 2)
+    plan.tokens["system"] = estimate_tokens(plan.system_prompt) + MESSAGE_OVERHEAD_TOKENS
+    available -= plan.tokens["system"]
+
+    # 3) Konteks retrieval dan riwayat berbagi sisa anggaran
+    history = history or []
+    history_tokens = history_token_counts or [
+        estimate_tokens(m["content"]) + MESSAGE_OVERHEAD_TOKENS for m in history
+    ]
+    context_budget = int(available * context_share)
+    history_budget = available - context_budget
+    # Bagian yang tidak membutuhkan seluruh jatahnya menyerahkan sisanya
+    if sum(history_tokens) < history_budget:
+        context_budget += history_budget - sum(history_tokens)
+
+    plan.context_budget = context_budget
+
+    full_tokens = 0
+    if context_full:
+        full_tokens = (
+            context_full_tokens
+            if context_full_tokens is not None
+            else estimate_tokens(context_full)
+        )
+    if context_full and full_tokens <= context_budget:
+        plan.context = [context_full]
+        plan.tokens["context"] = full_tokens
+    else:
+        used = 0
+        candidates = context_candidates or []
+        for i, chunk in enumerate(candidates):
+            cost = estimate_tokens(chunk)
+            remaining = context_budget - used
+            if cost <= remaining:
+                plan.context.append(chunk)
+                used += cost
+                continue
+            if remaining >= MIN_PARTIAL_TOKENS:
+                plan.context.append(truncate_to_tokens(chunk, remaining))
+                used += estimate_tokens(plan.context[-1])
+                plan.dropped["context"] = len(candidates) - i - 1
+            else:
+                plan.dropped["context"] = len(candidates) - i
+            break
+        plan.tokens["context"] = used
+
+    history_budget = available - plan.tokens["context"]
+    kept: List[Dict[str, str]] = []
+    used = 0
+    for message, cost in zip(reversed(history), reversed(history_tokens)):
+        if used + cost > history_budget:
+            break
+        kept.append(message)
+        used += cost
+    plan.history = list(reversed(kept))
+    plan.tokens["history"] = used
+    plan.dropped["history"] = len(history) - len(kept)
+    return plan
+
+
+# --------------------------
+# Pencatatan pemakaian token
+# --------------------------
+_usage_log: Deque[Dict[str, Any]] = deque(maxlen=200)
+# Panjang jawaban (token) terbaru per label, terpisah dari _usage_log agar
+# label yang sering dipanggil tidak menggeser sampel label lain
+OUTPUT_SAMPLES = 100
+_output_lengths: Dict[str, Deque[int]] = {}
+
+
+def log_usage(
+    label: str,
+    model: str,
+    estimated_prompt_tokens: int,
+    actual_prompt_tokens: Optional[int] = None,
+    actual_output_tokens: Optional[int] = None,
+    estimated_output_tokens: Optional[int] = None,
+) -> Dict[str, Any]:
+    """Mencatat token perkiraan vs aktual (jika API mengembalikannya).
+
+    `estimated_output_tokens` (dari teks jawaban) dipakai sebagai panjang
+    jawaban bila API tidak melaporkan completion tokens.
+    """
+    entry = {
+        "label": label,
+        "model": model,
+        "estimated_prompt_tokens": estimated_prompt_tokens,
+        "actual_prompt_tokens": actual_prompt_tokens,
+        "actual_output_tokens": actual_output_tokens,
+        "estimated_output_tokens": estimated_output_tokens,
+    }
+    _usage_log.append(entry)
+    output_tokens = actual_output_tokens or estimated_output_tokens
+    if output_tokens:
+        _output_lengths.setdefault(label, deque(maxlen=OUTPUT_SAMPLES)).append(output_tokens)
+    if actual_prompt_tokens:
+        error = (estimated_prompt_tokens - actual_prompt_tokens) / actual_prompt_tokens
+        logger.info(
+            "%s [%s] prompt tokens: estimated=%d actual=%d (%+.0f%%) output=%s",
+            label,
+            model,
+            estimated_prompt_tokens,
+            actual_prompt_tokens,
+            error * 100,
+            actual_output_tokens,
+        )
+    else:
+        logger.info(
+            "%s [%s] prompt tokens: estimated=%d (actual not reported)",
+            label,
+            model,
+            estimated_prompt_tokens,
+        )
+    return entry
+
+
+def recent_usage() -> List[Dict[str, Any]]:
+    return list(_usage_log)
+
+
+def output_lengths(label: str) -> List[int]:
+    """Panjang jawaban (token) terbaru yang dicatat untuk `label`"""
+    return list(_output_lengths.get(label, ()))
@@ -0,0 +1,224 @@
+# chatbot/session_store.py
+# ------------------------------------------------------------
+# Penyimpanan percakapan & artefak pipeline (SQLite, mode WAL)
+# ------------------------------------------------------------
+# Semua penulisan bersifat append-only:
+#   sessions      → satu baris per sesi (id dari query param URL, user)
+#   conversations → percakapan dalam sesi (label = peran / tab)
+#   messages      → giliran chat, termasuk perkiraan token (tidak dihitung ulang)
+#   artifacts     → hasil mahal (teks OCR, analisis tender, briefing) yang
+#                   dikunci dengan hash konten; baris terbaru yang berlaku
+#
+# Pemulihan bersifat malas: saat sesi Streamlit baru dibuka, hanya
+# percakapan terakhir yang dibaca (dua kueri ber-indeks); artefak baru
+# dibaca ketika pipeline yang bersangkutan membutuhkannya. Artefak dikunci
+# dengan hash konten input dan hanya dibaca kembali oleh sesi yang
+# menyimpannya.
+#
+# Kontrol akses: id sesi (acak, 128 bit) adalah SATU-SATUNYA pengaman.
+# Siapa pun yang memegang URL ?sid=... dapat membaca percakapan dan
+# artefak sesi itu; `user` hanya label, bukan autentikasi.
+#
+# Mode WAL: pembaca tidak memblokir penulis, dan penulisan cukup satu
+# append ke log WAL (synchronous=NORMAL).
+# ------------------------------------------------------------
+
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Any, Dict, List, Optional, Tuple
+
+from chatbot.retrieval.chat_memory import ConversationLog
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    id       TEXT PRIMARY KEY,
+    user_id  TEXT NOT NULL,
+    app      TEXT NOT NULL,
+    created  REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS sessions_user ON sessions (user_id, created);
+
+CREATE TABLE IF NOT EXISTS conversations (
+    id         TEXT PRIMARY KEY,
+    session_id TEXT NOT NULL,
+    label      TEXT NOT NULL,
+    created    REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS conversations_session ON conversations (session_id, created);
+
+CREATE TABLE IF NOT EXISTS messages (
+    id              INTEGER PRIMARY KEY,
+    conversation_id TEXT NOT NULL,
+    role            TEXT NOT NULL,
+    content         TEXT NOT NULL,
+    tokens          INTEGER NOT NULL,
+    in_prompt       INTEGER NOT NULL,
+    created         REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS messages_conversation ON messages (conversation_id, id);
+
+CREATE TABLE IF NOT EXISTS artifacts (
+    id         INTEGER PRIMARY KEY,
+    session_id TEXT NOT NULL,
+    kind       TEXT NOT NULL,
+    key        TEXT NOT NULL,
+    payload    TEXT NOT NULL,
+    blob       BLOB,
+    created    REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS artifacts_session_key ON artifacts (session_id, kind, key, id);
+CREATE INDEX IF NOT EXISTS artifacts_session ON artifacts (session_id, kind, id);
+"""
+
+
+def new_id() -> str:
+    return uuid.uuid4().hex
+
+
+class SessionStore:
+    """Percakapan dan artefak per user / sesi dalam satu file SQLite (aman lintas thread)"""
+
+    def __init__(self, path: str):
+        self.path = path
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def _write(self, statements: List[Tuple[str, tuple]]):
+        # Satu transaksi per penulisan: satu fsync WAL untuk beberapa baris
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                for sql, params in statements:
+                    self._conn.execute(sql, params)
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def _read(self, sql: str, params: tuple) -> List[tuple]:
+        with self._lock:
+            return self._conn.execute(sql, params).fetchall()
+
+    # --------------------------
+    # Percakapan
+    # --------------------------
+    def append_message(
+        self,
+        session_id: str,
+        user_id: str,
+        app: str,
+        conversation_id: str,
+        label: str,
+        role: str,
+        content: str,
+        tokens: int,
+        in_prompt: bool = True,
+    ):
+        """Menambahkan satu giliran; sesi & percakapan dibuat saat pesan pertama ditulis"""
+        now = time.time()
+        self._write(
+            [
+                (
+                    "INSERT OR IGNORE INTO sessions VALUES (?, ?, ?, ?)",
+                    (session_id, user_id, app, now),
+                ),
+                (
+                    "INSERT OR IGNORE INTO conversations VALUES (?, ?, ?, ?)",
+                    (conversation_id, session_id, label, now),
+                ),
+                (
+                    "INSERT INTO messages (conversation_id, role, content, tokens, in_prompt, created)"
+                    " VALUES (?, ?, ?, ?, ?, ?)",
+                    (conversation_id, role, content, tokens, int(in_prompt), now),
+                ),
+            ]
+        )
+
+    def latest_conversation(
+        self, session_id: str, label: Optional[str] = None
+    ) -> Optional[Tuple[str, str]]:
+        """(id, label) percakapan terbaru sesi (opsional: dengan label tertentu), atau None"""
+        if label is None:
+            rows = self._read(
+                "SELECT id, label FROM conversations WHERE session_id = ?"
+                " ORDER BY created DESC, rowid DESC LIMIT 1",
+                (session_id,),
+            )
+        else:
+            rows = self._read(
+                "SELECT id, label FROM conversations WHERE session_id = ? AND label = ?"
+                " ORDER BY created DESC, rowid DESC LIMIT 1",
+                (session_id, label),
+            )
+        return rows[0] if rows else None
+
+    def load_log(self, conversation_id: str) -> ConversationLog:
+        """Membangun ulang ConversationLog tanpa menghitung ulang token"""
+        log = ConversationLog()
+        for role, content, tokens, in_prompt in self._read(
+            "SELECT role, content, tokens, in_prompt FROM messages"
+            " WHERE conversation_id = ? ORDER BY id",
+            (conversation_id,),
+        ):
+            log.append(role, content, in_prompt=bool(in_prompt), tokens=tokens)
+        return log
+
+    # --------------------------
+    # Artefak
+    # --------------------------
+    def put_artifact(
+        self,
+        session_id: str,
+        kind: str,
+        key: str,
+        payload: Dict[str, Any],
+        blob: Optional[bytes] = None,
+    ):
+        self._write(
+            [
+                (
+                    "INSERT INTO artifacts (session_id, kind, key, payload, blob, created)"
+                    " VALUES (?, ?, ?, ?, ?, ?)",
+                    (session_id, kind, key, json.dumps(payload), blob, time.time()),
+                )
+            ]
+        )
+
+    def get_artifact(
+        self, session_id: str, kind: str, key: str, with_blob: bool = False
+    ) -> Optional[Dict[str, Any]]:
+        """Artefak terbaru untuk (kind, key) milik sesi ini; `_blob` jika diminta"""
+        column = "blob" if with_blob else "NULL"
+        # Dibatasi per sesi: hasil milik sesi lain tidak pernah dikembalikan
+        rows = self._read(
+            f"SELECT payload, {column}, created FROM artifacts"
+            " WHERE session_id = ? AND kind = ? AND key = ? ORDER BY id DESC LIMIT 1",
+            (session_id, kind, key),
+        )
+        if not rows:
+            return None
+        payload, blob, created = rows[0]
+        artifact = json.loads(payload)
+        artifact["_created"] = created
+        if with_blob:
+            artifact["_blob"] = blob
+        return artifact
+
+    def stats(self) -> Dict[str, int]:
+        counts = {}
+        for table in ("sessions", "conversations", "messages", "artifacts"):
+            counts[table] = self._read(f"SELECT COUNT(*) FROM {table}", ())[0][0]
+        return counts
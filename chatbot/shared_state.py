@@ -0,0 +1,317 @@
+# chatbot/shared_state.py
+# ------------------------------------------------------------
+# State bersama lintas proses worker (cache hasil, lease, rate limit)
+# ------------------------------------------------------------
+# Antarmuka kecil bergaya Redis (get / set nx+ttl / delete / incr) dengan
+# tiga implementasi:
+#   memory://              → MemoryState, dalam satu proses (juga pengganti
+#                            Redis untuk pengujian lokal)
+#   sqlite:///path/file.db → SqliteState, bersama untuk semua worker di satu
+#                            host (file SQLite mode WAL)
+#   redis://host:6379/0    → RedisState, lintas host (paket `redis` opsional)
+#
+# Dipilih lewat SHARED_STATE_URL. Tanpa variabel ini komponen tetap memakai
+# state per proses seperti sebelumnya. Di atas antarmuka ini:
+# - lock(): lease bernama dengan TTL; worker yang mati melepas lease-nya
+#   otomatis saat TTL habis.
+# - SharedRateLimiter: rate limit per jendela waktu untuk semua proses.
+# Nilai disimpan sebagai bytes; get_json() / set_json() untuk data JSON.
+# ------------------------------------------------------------
+
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional, Tuple
+from urllib.parse import urlparse
+
+# Interval polling saat menunggu lease / hasil worker lain (detik)
+POLL_SECONDS = 0.1
+
+
+class SharedState:
+    """Antarmuka dasar; subclass mengimplementasikan get/set/delete/incr"""
+
+    def get(self, key: str) -> Optional[bytes]:
+        raise NotImplementedError
+
+    def set(self, key: str, value: bytes, ttl: Optional[float] = None, nx: bool = False) -> bool:
+        """Menyimpan nilai; dengan `nx` hanya jika kunci belum ada. True jika tersimpan"""
+        raise NotImplementedError
+
+    def delete(self, key: str, value: Optional[bytes] = None) -> bool:
+        """Menghapus kunci; dengan `value` hanya jika nilainya masih sama"""
+        raise NotImplementedError
+
+    def incr(self, key: str, ttl: Optional[float] = None) -> int:
+        """Menaikkan penghitung; `ttl` berlaku sejak penghitung dibuat"""
+        raise NotImplementedError
+
+    def get_json(self, key: str) -> Any:
+        raw = self.get(key)
+        return json.loads(raw) if raw is not None else None
+
+    def set_json(self, key: str, value: Any, ttl: Optional[float] = None, nx: bool = False) -> bool:
+        data = json.dumps(value, ensure_ascii=False).encode("utf-8")
+        return self.set(key, data, ttl=ttl, nx=nx)
+
+    @contextmanager
+    def lock(self, name: str, ttl: float = 300, timeout: Optional[float] = None) -> Iterator[None]:
+        """Lease eksklusif lintas proses; TimeoutError jika tidak didapat dalam `timeout`"""
+        key = f"lock:{name}"
+        token = uuid.uuid4().hex.encode()
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while not self.set(key, token, ttl=ttl, nx=True):
+            if deadline is not None and time.monotonic() > deadline:
+                raise TimeoutError(f"Lease {name} masih dipegang proses lain.")
+            time.sleep(POLL_SECONDS)
+        try:
+            yield
+        finally:
+            # Lease yang sudah kedaluwarsa dan diambil proses lain tidak dihapus
+            self.delete(key, token)
+
+    def close(self):
+        pass
+
+
+class MemoryState(SharedState):
+    """State dalam satu proses (dict + TTL); aman lintas thread"""
+
+    def __init__(self):
+        self._data: Dict[str, Tuple[Any, Optional[float]]] = {}
+        self._lock = threading.Lock()
+
+    def _live(self, key: str) -> Optional[Any]:
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        value, expires = entry
+        if expires is not None and expires <= time.time():
+            del self._data[key]
+            return None
+        return value
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            value = self._live(key)
+        return str(value).encode() if isinstance(value, int) else value
+
+    def set(self, key: str, value: bytes, ttl: Optional[float] = None, nx: bool = False) -> bool:
+        with self._lock:
+            if nx and self._live(key) is not None:
+                return False
+            self._data[key] = (bytes(value), time.time() + ttl if ttl else None)
+            return True
+
+    def delete(self, key: str, value: Optional[bytes] = None) -> bool:
+        with self._lock:
+            current = self._live(key)
+            if current is None or (value is not None and current != value):
+                return False
+            del self._data[key]
+            return True
+
+    def incr(self, key: str, ttl: Optional[float] = None) -> int:
+        with self._lock:
+            current = self._live(key)
+            if current is None:
+                self._data[key] = (1, time.time() + ttl if ttl else None)
+                return 1
+            count = int(current) + 1
+            self._data[key] = (count, self._data[key][1])
+            return count
+
+
+_SQLITE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS shared_state (
+    key     TEXT PRIMARY KEY,
+    value   BLOB NOT NULL,
+    expires REAL
+);
+CREATE INDEX IF NOT EXISTS shared_state_expires ON shared_state (expires);
+"""
+
+
+class SqliteState(SharedState):
+    """State bersama semua proses di satu host (SQLite mode WAL)"""
+
+    # Setiap N penulisan, baris kedaluwarsa dibersihkan
+    PURGE_EVERY = 500
+
+    def __init__(self, path: str):
+        self.path = path
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(
+            path, check_same_thread=False, isolation_level=None, timeout=30
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SQLITE_SCHEMA)
+        self._writes = 0
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def _transaction(self, fn):
+        # BEGIN IMMEDIATE: kunci tulis diambil di awal, jadi baca-ubah-tulis
+        # atomik terhadap proses lain
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                now = time.time()
+                result = fn(now)
+                self._writes += 1
+                if self._writes % self.PURGE_EVERY == 0:
+                    self._conn.execute("DELETE FROM shared_state WHERE expires <= ?", (now,))
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+            return result
+
+    def _expire(self, key: str, now: float):
+        self._conn.execute(
+            "DELETE FROM shared_state WHERE key = ? AND expires <= ?", (key, now)
+        )
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT value FROM shared_state WHERE key = ? AND (expires IS NULL OR expires > ?)",
+                (key, time.time()),
+            ).fetchall()
+        if not rows:
+            return None
+        value = rows[0][0]
+        return str(value).encode() if isinstance(value, int) else value
+
+    def set(self, key: str, value: bytes, ttl: Optional[float] = None, nx: bool = False) -> bool:
+        def write(now: float) -> bool:
+            self._expire(key, now)
+            verb = "INSERT OR IGNORE" if nx else "INSERT OR REPLACE"
+            cursor = self._conn.execute(
+                f"{verb} INTO shared_state VALUES (?, ?, ?)",
+                (key, bytes(value), now + ttl if ttl else None),
+            )
+            return cursor.rowcount > 0
+
+        return self._transaction(write)
+
+    def delete(self, key: str, value: Optional[bytes] = None) -> bool:
+        def write(now: float) -> bool:
+            self._expire(key, now)
+            if value is None:
+                cursor = self._conn.execute("DELETE FROM shared_state WHERE key = ?", (key,))
+            else:
+                cursor = self._conn.execute(
+                    "DELETE FROM shared_state WHERE key = ? AND value = ?", (key, bytes(value))
+                )
+            return cursor.rowcount > 0
+
+        return self._transaction(write)
+
+    def incr(self, key: str, ttl: Optional[float] = None) -> int:
+        def write(now: float) -> int:
+            self._expire(key, now)
+            self._conn.execute(
+                "INSERT OR IGNORE INTO shared_state VALUES (?, 0, ?)",
+                (key, now + ttl if ttl else None),
+            )
+            self._conn.execute(
+                "UPDATE shared_state SET value = CAST(value AS INTEGER) + 1 WHERE key = ?", (key,)
+            )
+            return self._conn.execute(
+                "SELECT value FROM shared_state WHERE key = ?", (key,)
+            ).fetchone()[0]
+
+        return self._transaction(write)
+
+
+class RedisState(SharedState):
+    """Adapter klien Redis (redis-py atau klien lain dengan API yang sama)"""
+
+    # Bandingkan-lalu-hapus atomik di sisi server
+    _COMPARE_AND_DELETE = (
+        'if redis.call("get", KEYS[1]) == ARGV[1] then '
+        'return redis.call("del", KEYS[1]) end return 0'
+    )
+
+    def __init__(self, client):
+        self._client = client
+
+    def get(self, key: str) -> Optional[bytes]:
+        return self._client.get(key)
+
+    def set(self, key: str, value: bytes, ttl: Optional[float] = None, nx: bool = False) -> bool:
+        px = int(ttl * 1000) if ttl else None
+        return bool(self._client.set(key, bytes(value), px=px, nx=nx))
+
+    def delete(self, key: str, value: Optional[bytes] = None) -> bool:
+        if value is None:
+            return bool(self._client.delete(key))
+        return bool(self._client.eval(self._COMPARE_AND_DELETE, 1, key, bytes(value)))
+
+    def incr(self, key: str, ttl: Optional[float] = None) -> int:
+        count = int(self._client.incr(key))
+        if count == 1 and ttl:
+            self._client.pexpire(key, int(ttl * 1000))
+        return count
+
+    def close(self):
+        self._client.close()
+
+
+def open_shared_state(url: Optional[str] = None) -> Optional[SharedState]:
+    """Backend dari URL (default SHARED_STATE_URL); None jika tidak dikonfigurasi"""
+    url = url or os.getenv("SHARED_STATE_URL")
+    if not url:
+        return None
+    parsed = urlparse(url)
+    if parsed.scheme == "memory":
+        return MemoryState()
+    if parsed.scheme == "sqlite":
+        # sqlite:///relatif.db atau sqlite:////abs/path.db
+        return SqliteState(url[len("sqlite:///"):])
+    if parsed.scheme in ("redis", "rediss"):
+        try:
+            import redis
+        except ImportError as e:
+            raise RuntimeError(
+                "SHARED_STATE_URL memakai Redis, tetapi paket `redis` belum terpasang."
+            ) from e
+        return RedisState(redis.Redis.from_url(url))
+    raise ValueError(f"Skema SHARED_STATE_URL tidak dikenal: {parsed.scheme}")
+
+
+class SharedRateLimiter:
+    """Maksimal `rate_per_minute` permintaan per menit untuk SEMUA proses pemakai `name`.
+
+    Jendela waktu tetap sepanjang `burst` interval: setiap jendela memberi
+    `burst` slot (penghitung incr bersama), sehingga rata-rata laju sama dengan
+    token bucket per proses.
+    """
+
+    def __init__(self, state: SharedState, name: str, rate_per_minute: float, burst: int = 1):
+        self.state = state
+        self.name = name
+        self.capacity = max(burst, 1)
+        interval = 60.0 / rate_per_minute if rate_per_minute > 0 else 0.0
+        self.window = interval * self.capacity
+
+    def acquire(self):
+        if not self.window:
+            return
+        while True:
+            now = time.time()
+            slot = int(now // self.window)
+            count = self.state.incr(f"rate:{self.name}:{slot}", ttl=self.window * 2)
+            if count <= self.capacity:
+                return
+            time.sleep((slot + 1) * self.window - now)
@@ -0,0 +1,671 @@
+# chatbot/ui.py
+# ------------------------------------------------------------
+# Komponen Streamlit bersama untuk main.py dan main_telkom.py
+# ------------------------------------------------------------
+# - Resource bersama (st.cache_resource): store dokumen, store tabel,
+#   layanan generasi, single-flight — dibuat sekali per proses server.
+#   Dengan SHARED_STATE_URL, parsing dokumen dan panggilan upstream identik
+#   juga tidak diulang antar proses worker (lihat chatbot/shared_state.py).
+# - Panel basis pengetahuan di sidebar dan transkrip chat dirender sebagai
+#   fragment: mengunggah file atau membuka basis pengetahuan tersimpan
+#   hanya menjalankan ulang panel tersebut, bukan seluruh script.
+# - Transkrip berjendela: hanya CHAT_WINDOW (default 20) pesan terakhir
+#   yang dirender, pesan lama dimuat per halaman lewat "Load older".
+# - Cabang percakapan per label (peran): berganti peran menyimpan riwayat
+#   peran sebelumnya dan melanjutkan riwayat peran tujuan.
+# - Persistensi sesi: id sesi disimpan di URL (?sid=...). Percakapan dan
+#   daftar dokumen basis pengetahuan ditulis ke SessionStore saat berubah,
+#   dan dipulihkan (sekali, malas) saat halaman dibuka ulang.
+# - Mode profiling: start_profiling() di awal script dan profiling_panel()
+#   di akhir memprofil setiap rerun (lihat chatbot/profiling.py); rerun
+#   fragment panel basis pengetahuan diprofil tersendiri.
+# - chat_page(): seluruh alur chat role-play (pilih / ganti peran, prefetch,
+#   perencanaan token, fragment streaming, petunjuk). main.py dan
+#   main_telkom.py hanya memberikan bagian khusus provider (fungsi submit).
+# ------------------------------------------------------------
+
+import logging
+import os
+import time
+from typing import Any, Callable, Dict, Iterable, Optional
+
+import streamlit as st
+
+from chatbot import profiling
+from chatbot.ingestion import uploads
+from chatbot.ingestion.doc_store import Document, DocumentStore
+from chatbot.ingestion.kb_storage import KnowledgeBaseStorage
+from chatbot.ingestion.table_store import TableStore
+from chatbot.pipelines.chat import ChatPrefetch, PreparedChat, plan_chat
+from chatbot.providers.generation_service import GenerationHandle, GenerationService
+from chatbot.providers.single_flight import SingleFlight
+from chatbot.providers.task_profiles import task_params
+from chatbot.retrieval.chat_memory import ConversationLog
+from chatbot.retrieval.knowledge_base import KnowledgeBase
+from chatbot.retrieval.prompts import ROLE_NAMES, ROLES
+from chatbot.retrieval.token_budget import ContextPlan, estimate_tokens, log_usage
+from chatbot.session_store import SessionStore, new_id
+from chatbot.shared_state import SharedState, open_shared_state
+from chatbot.warmup import warm_up
+
+logger = logging.getLogger("ui")
+
+
+# State lintas proses worker (SQLite / Redis); None → hanya state per proses
+@st.cache_resource
+def get_shared_state() -> Optional[SharedState]:
+    return open_shared_state()
+
+
+# Store dokumen bersama untuk semua sesi dalam satu proses server.
+# File yang sama (hash konten sama) hanya di-parse dan disimpan sekali,
+# dan hasilnya disimpan ke disk agar tetap ada setelah server di-restart.
+@st.cache_resource
+def get_document_store() -> DocumentStore:
+    max_mb = int(os.getenv("DOC_STORE_MAX_MB", "512"))
+    storage = KnowledgeBaseStorage(os.getenv("KB_STORE_DIR", ".kb_store"))
+    return DocumentStore(
+        max_bytes=max_mb * 1024 * 1024, storage=storage, shared=get_shared_state()
+    )
+
+
+# Store tabel Excel bersama: deduplikasi per hash, tipe kolom diperkecil,
+# dan tabel lama di-spill ke Parquet jika melewati batas memori
+@st.cache_resource
+def get_table_store() -> TableStore:
+    max_mb = int(os.getenv("TABLE_STORE_MAX_MB", "256"))
+    spill_dir = os.path.join(os.getenv("KB_STORE_DIR", ".kb_store"), "tables")
+    return TableStore(max_bytes=max_mb * 1024 * 1024, spill_dir=spill_dir)
+
+
+# Layanan generasi bersama: satu event loop untuk semua sesi, sehingga thread
+# script tidak menunggu I/O jaringan selama jawaban di-stream
+@st.cache_resource
+def get_generation_service() -> GenerationService:
+    return GenerationService(
+        max_concurrency=int(os.getenv("GENERATION_MAX_CONCURRENCY", "256"))
+    )
+
+
+# Penggabungan panggilan upstream identik yang sedang berjalan (LLM, OCR, LMM)
+# lintas sesi; tidak menyimpan hasil setelah panggilan selesai
+@st.cache_resource
+def get_single_flight() -> SingleFlight:
+    return SingleFlight(shared=get_shared_state())
+
+
+# Percakapan & artefak tersimpan (SQLite WAL) bersama untuk semua sesi
+@st.cache_resource
+def get_session_store() -> SessionStore:
+    default = os.path.join(os.getenv("KB_STORE_DIR", ".kb_store"), "sessions.db")
+    return SessionStore(os.getenv("SESSION_DB", default))
+
+
+def get_session_id() -> str:
+    """Id sesi disimpan di URL (?sid=...) agar bertahan saat halaman di-refresh.
+
+    Id ini satu-satunya kontrol akses ke percakapan & artefak sesi: siapa
+    pun yang memegang URL-nya dapat membacanya.
+    """
+    if "session_id" not in st.session_state:
+        sid = st.query_params.get("sid")
+        if not sid:
+            sid = new_id()
+            st.query_params["sid"] = sid
+        st.session_state.session_id = sid
+    return st.session_state.session_id
+
+
+def get_user_id() -> str:
+    return st.query_params.get("user") or "anonymous"
+
+
+def get_knowledge_base() -> KnowledgeBase:
+    """Basis pengetahuan per-dokumen milik sesi ini (dipulihkan dari disk sekali per sesi)"""
+    if "knowledge_base" not in st.session_state:
+        kb = KnowledgeBase()
+        saved = get_session_store().get_artifact(
+            get_session_id(), "session_kb", get_session_id()
+        )
+        store = get_document_store()
+        for entry in (saved or {}).get("documents", []):
+            # Dokumen dibuka dari disk (mmap); "saved" agar tidak dihapus oleh
+            # sinkronisasi uploader yang kosong setelah refresh
+            ref = store.acquire(entry["key"], lambda: None, name=entry["name"])
+            if ref is not None:
+                kb.add(ref, source="saved")
+        st.session_state.knowledge_base = kb
+        st.session_state.knowledge_base_saved = kb.version
+    return st.session_state.knowledge_base
+
+
+def persist_knowledge_base(kb: KnowledgeBase):
+    """Menyimpan daftar dokumen basis pengetahuan sesi jika berubah sejak penyimpanan terakhir"""
+    if st.session_state.get("knowledge_base_saved") == kb.version:
+        return
+    documents = [{"key": ref.key, "name": ref.name} for ref in kb]
+    try:
+        get_session_store().put_artifact(
+            get_session_id(), "session_kb", get_session_id(), {"documents": documents}
+        )
+    except Exception:
+        logger.exception("gagal menyimpan basis pengetahuan sesi")
+        return
+    st.session_state.knowledge_base_saved = kb.version
+
+
+# --------------------------
+# Percakapan tersimpan
+# --------------------------
+def restore_conversation(app: str, default_label: str, key: str = "messages") -> ConversationLog:
+    """Percakapan sesi di st.session_state[key]; dipulihkan dari disk saat sesi baru dibuka"""
+    if key not in st.session_state:
+        latest = get_session_store().latest_conversation(get_session_id())
+        if latest is not None:
+            conversation_id, label = latest
+            log = get_session_store().load_log(conversation_id)
+        else:
+            conversation_id, label, log = new_id(), default_label, ConversationLog()
+        st.session_state[key] = log
+        st.session_state[f"{key}_conversation"] = (app, conversation_id, label)
+    return st.session_state[key]
+
+
+def conversation_label(key: str = "messages") -> str:
+    return st.session_state[f"{key}_conversation"][2]
+
+
+def switch_conversation(label: str, key: str = "messages") -> ConversationLog:
+    """Berpindah ke cabang percakapan `label` (misal peran lain) tanpa membuang riwayat.
+
+    Cabang yang sedang aktif disimpan di memori sesi; cabang tujuan diambil
+    dari memori, dari disk (percakapan terbaru sesi dengan label tersebut),
+    atau dibuat baru.
+    """
+    app, conversation_id, current = st.session_state[f"{key}_conversation"]
+    branches = st.session_state.setdefault(f"{key}_branches", {})
+    branches[current] = (conversation_id, st.session_state[key])
+    if label in branches:
+        conversation_id, log = branches[label]
+    else:
+        latest = get_session_store().latest_conversation(get_session_id(), label=label)
+        if latest is not None:
+            conversation_id = latest[0]
+            log = get_session_store().load_log(conversation_id)
+        else:
+            conversation_id, log = new_id(), ConversationLog()
+    st.session_state[key] = log
+    st.session_state[f"{key}_conversation"] = (app, conversation_id, label)
+    reset_transcript()
+    return log
+
+
+def record_message(role: str, content: str, in_prompt: bool = True, key: str = "messages"):
+    """Menambahkan giliran ke percakapan sesi dan menuliskannya (append-only) ke disk"""
+    log = st.session_state[key]
+    log.append(role, content, in_prompt=in_prompt)
+    app, conversation_id, label = st.session_state[f"{key}_conversation"]
+    try:
+        get_session_store().append_message(
+            get_session_id(),
+            get_user_id(),
+            app,
+            conversation_id,
+            label,
+            role,
+            content,
+            log.turn_tokens(len(log) - 1),
+            in_prompt,
+        )
+    except Exception:
+        # Gagal menyimpan tidak boleh menghentikan chat
+        logger.exception("gagal menyimpan pesan")
+
+
+# --------------------------
+# Persiapan spekulatif chat
+# --------------------------
+def prefetch_chat(model: str, role_prompt: str, key: str = "messages"):
+    """Menyiapkan prompt di latar (selama pengguna mengetik) jika peran, basis
+    pengetahuan, atau riwayat berubah sejak persiapan terakhir"""
+    kb, log = get_knowledge_base(), st.session_state[key]
+    st.session_state[f"{key}_prefetch_args"] = (model, role_prompt)
+    # Satu persiapan per prompt peran: kembali ke peran sebelumnya langsung
+    # memakai prompt yang sudah dirakit jika basis pengetahuan tidak berubah
+    prefetches = st.session_state.setdefault(f"{key}_prefetch", {})
+    current = prefetches.get(role_prompt)
+    if current is None or not current.matches(model, role_prompt, kb, log):
+        prefetches[role_prompt] = ChatPrefetch(model, role_prompt, kb, log)
+
+
+def refresh_prefetch(key: str = "messages"):
+    """Mengulang prefetch_chat terakhir (misal setelah basis pengetahuan diubah di fragment)"""
+    args = st.session_state.get(f"{key}_prefetch_args")
+    if args is not None:
+        prefetch_chat(*args, key=key)
+
+
+def prepared_chat(model: str, role_prompt: str, key: str = "messages") -> Optional[PreparedChat]:
+    """Hasil prefetch yang masih sesuai keadaan saat ini, atau None (dihitung inline)"""
+    current = st.session_state.get(f"{key}_prefetch", {}).get(role_prompt)
+    if current is None or not current.matches(
+        model, role_prompt, get_knowledge_base(), st.session_state[key]
+    ):
+        return None
+    return current.result()
+
+
+# OCR untuk halaman PDF hasil scan (tanpa text layer). Opt-in: halaman
+# dokumen hanya dikirim ke layanan OCR eksternal jika PDF_OCR=1 atau
+# OCR_ENDPOINT diatur secara eksplisit; PDF_OCR=0 selalu menonaktifkan
+def get_pdf_ocr_fn() -> Optional[Callable[[bytes], str]]:
+    enabled = os.getenv("PDF_OCR")
+    if enabled is None:
+        enabled = "1" if os.getenv("OCR_ENDPOINT") else "0"
+    if enabled != "1":
+        return None
+    from chatbot.providers.telkom_api import DEFAULT_ENDPOINTS, ocr_pdf
+
+    endpoint = os.getenv("OCR_ENDPOINT", DEFAULT_ENDPOINTS["OCR"])
+    return lambda page_pdf: ocr_pdf(page_pdf, endpoint)
+
+
+# Fungsi untuk membangun dokumen (teks + indeks) dari file yang diunggah
+def build_document(key: str, uploaded_file) -> Optional[Document]:
+    try:
+        return uploads.build_document(
+            key,
+            uploaded_file.name,
+            uploaded_file.type,
+            uploaded_file,
+            get_table_store(),
+            ocr_fn=get_pdf_ocr_fn(),
+        )
+    except Exception as e:
+        # Tampilkan pesan error jika gagal mengekstrak teks
+        label = "PDF" if uploads.document_kind(uploaded_file.type) == "pdf" else "Excel"
+        st.error(f"Error extracting {label} text: {str(e)}")
+        return None
+
+
+@st.fragment
+def knowledge_base_panel():
+    """Unggah, sinkronkan, simpan, dan buka basis pengetahuan (di sidebar)"""
+    # Rerun fragment saja (unggahan) diprofil terpisah dari rerun script
+    with profiling.profiled("kb_panel", enabled=profiling_enabled()):
+        _knowledge_base_panel()
+
+
+def _knowledge_base_panel():
+    # Bagian untuk mengunggah file PDF dan Excel sebagai basis pengetahuan (knowledge base)
+    st.subheader("📚 Knowledge Base")
+    uploaded_files = st.file_uploader(
+        "Upload PDF or Excel documents:",
+        type=["pdf", "xlsx"],
+        accept_multiple_files=True,
+    )
+
+    kb = get_knowledge_base()
+    # Hash konten di-cache per file unggahan agar tidak dihitung ulang tiap rerun
+    if "upload_hashes" not in st.session_state:
+        st.session_state.upload_hashes = {}
+
+    # Sinkronkan basis pengetahuan dengan isi uploader; dokumen hanya
+    # di-parse jika belum ada di store bersama
+    store = get_document_store()
+    processed = uploads.sync_uploads(
+        kb,
+        store,
+        uploaded_files or [],
+        st.session_state.upload_hashes,
+        build_document,
+        on_process=lambda f: st.write(f"📄 Processing: {f.name}"),
+        on_reject=lambda f, e: st.error(str(e)),
+    )
+    if processed:
+        st.success(f"✅ Processed {processed} document(s)")
+
+    # Tombol untuk menghapus seluruh basis pengetahuan
+    if st.button("🗑️ Clear Knowledge Base"):
+        kb.clear()
+        st.success("Knowledge base cleared!")
+
+    # Daftar dokumen sesi disimpan agar basis pengetahuan pulih setelah refresh
+    persist_knowledge_base(kb)
+    # Prompt dengan basis pengetahuan baru disiapkan di latar sebelum pertanyaan berikutnya
+    refresh_prefetch()
+
+    # Tampilkan status basis pengetahuan (jumlah kata, diperbarui inkremental)
+    if len(kb):
+        st.metric("Knowledge Base", f"{kb.word_count} words")
+
+    # Tampilkan pemakaian memori per tabel Excel
+    table_keys = [ref.key for ref in kb if ref.document.kind == "excel"]
+    if table_keys:
+        with st.expander("📊 Excel Tables"):
+            for info in get_table_store().memory_report(table_keys):
+                st.caption(
+                    f"{info['name']}: {info['rows']} rows × {info['columns']} cols — "
+                    f"{info['bytes'] / (1024 * 1024):.2f} MB ({info['location']})"
+                )
+
+    # Simpan / buka kembali basis pengetahuan dari disk tanpa mengunggah ulang
+    with st.expander("💾 Saved Knowledge Bases"):
+        storage = store.storage
+        kb_name = st.text_input("Knowledge base name:", value="default")
+        if st.button("Save Knowledge Base", disabled=not len(kb)):
+            storage.save_knowledge_base(
+                kb_name, [{"key": ref.key, "name": ref.name} for ref in kb]
+            )
+            st.success(f"Saved '{kb_name}'")
+
+        saved_kbs = storage.list_knowledge_bases()
+        if saved_kbs:
+            kb_to_open = st.selectbox("Open saved knowledge base:", saved_kbs)
+            if st.button("Open Knowledge Base"):
+                for entry in storage.load_knowledge_base(kb_to_open):
+                    if entry["key"] in kb:
+                        continue
+                    # Dokumen dibuka dari disk (mmap), tidak perlu di-parse ulang
+                    ref = store.acquire(entry["key"], lambda: None, name=entry["name"])
+                    if ref is not None:
+                        kb.add(ref, source="saved")
+                persist_knowledge_base(kb)
+                st.rerun(scope="fragment")
+
+
+# Jumlah pesan terakhir yang dirender; "Load older" menambah satu halaman
+TRANSCRIPT_PAGE = int(os.getenv("CHAT_WINDOW", "20"))
+
+
+def _load_older(state_key: str, window: int):
+    st.session_state[state_key] = window + TRANSCRIPT_PAGE
+
+
+def reset_transcript(key: str = "transcript"):
+    """Kembali ke jendela default (misal saat percakapan diganti)"""
+    st.session_state.pop(f"{key}_window", None)
+
+
+@st.fragment
+def render_transcript(log: ConversationLog, key: str = "transcript"):
+    """Merender hanya pesan terakhir; pesan lama dimuat per halaman.
+
+    Biaya rerun sebanding dengan ukuran jendela, bukan panjang percakapan.
+    Tombol "Load older" hanya menjalankan ulang fragment ini.
+    """
+    state_key = f"{key}_window"
+    window = st.session_state.get(state_key, TRANSCRIPT_PAGE)
+    start = max(len(log) - window, 0)
+    if start:
+        st.button(
+            f"⬆️ Load older messages ({start} hidden)",
+            key=f"{key}_older",
+            on_click=_load_older,
+            args=(state_key, window),
+        )
+    for role, content in log.turns(start):
+        with st.chat_message(role):
+            st.markdown(content)
+
+
+# --------------------------
+# Mode profiling
+# --------------------------
+def profiling_enabled() -> bool:
+    return st.session_state.get("profiling", profiling.PROFILE_MODE)
+
+
+def start_profiling(script: str):
+    """Dipanggil di awal script: memprofil rerun ini bila mode profiling aktif"""
+    previous = st.session_state.pop("_rerun_profile", None)
+    if previous is not None:
+        # Rerun sebelumnya berhenti di tengah (st.stop / st.rerun / error): tidak disimpan
+        previous.discard()
+    if profiling_enabled():
+        run = profiling.RerunProfile(script)
+        if run.start():
+            st.session_state["_rerun_profile"] = run
+
+
+def profiling_panel():
+    """Dipanggil di akhir script: menyimpan profil rerun ini dan menampilkan viewer di sidebar"""
+    run = st.session_state.pop("_rerun_profile", None)
+    saved = run.stop() if run is not None else None
+    with st.sidebar.expander("🩺 Profiling"):
+        st.checkbox(
+            "Profil setiap rerun (cProfile + tracemalloc)",
+            value=profiling.PROFILE_MODE,
+            key="profiling",
+        )
+        profiles = profiling.list_profiles()
+        if not profiles:
+            st.caption(f"Belum ada profil di {profiling.PROFILE_DIR}")
+            return
+        if saved is None and profiling_enabled():
+            st.caption("Rerun ini tidak diprofil (rerun lain sedang diprofil).")
+        chosen = st.selectbox(
+            "Profil",
+            profiles,
+            format_func=lambda p: (
+                f"{time.strftime('%H:%M:%S', time.localtime(p['started']))} · "
+                f"{p['script']} · {p['wall_s']:.2f} dtk"
+            ),
+            key="profiling_selected",
+        )
+        if chosen["stages"]:
+            st.markdown("**Tahap**")
+            st.dataframe(chosen["stages"], hide_index=True)
+        st.markdown("**Fungsi terpanas**")
+        st.dataframe(chosen["top_functions"], hide_index=True)
+        if chosen["top_allocations"]:
+            st.markdown("**Alokasi terbesar**")
+            st.dataframe(chosen["top_allocations"], hide_index=True)
+        st.caption(f"Flame graph: `snakeviz {chosen['prof']}`")
+
+
+# --------------------------
+# Halaman chat (main.py / main_telkom.py)
+# --------------------------
+# Interval polling jawaban yang sedang di-stream (detik)
+STREAM_POLL_SECONDS = 0.15
+
+CHAT_HOW_TO = """
+    ### Role-Playing:
+    - Select different roles from the sidebar
+    - Each role has specific behavior and expertise
+    - Each role keeps its own conversation; switching back resumes it
+
+    ### Knowledge Base:
+    - Upload PDF or Excel documents in the sidebar
+    - Ask questions about the content in your documents
+    - The AI will reference the uploaded documents when answering
+    - You can upload multiple PDFs and Excel files
+
+    ### Tips:
+    - Be specific in your questions for better answers
+    - The AI will mention which document information came from
+    - Clear the knowledge base to start fresh
+    """
+
+# submit(plan, prepared, limits) → GenerationHandle milik provider
+SubmitFn = Callable[
+    [ContextPlan, Optional[PreparedChat], Dict[str, Any]], GenerationHandle
+]
+
+
+def chat_page(
+    app: str,
+    title: str,
+    model: str,
+    task: str,
+    api_label: str,
+    submit: SubmitFn,
+    check: Optional[Callable[[], Optional[str]]] = None,
+    sidebar_footer: Optional[Callable[[], None]] = None,
+    warm_modules: Iterable[str] = (),
+    warm_hooks: Iterable[Callable[[], None]] = (),
+):
+    """Alur chat role-play + basis pengetahuan; bagian khusus provider lewat parameter.
+
+    `model` menentukan anggaran konteks, `task` adalah TaskProfile batas
+    jawaban (juga label log_usage). `submit` mengirim permintaan ke layanan
+    generasi; `check` mengembalikan pesan error jika provider tidak siap.
+    """
+    # Mode profiling (sidebar / PROFILE_MODE=1): rerun ini diprofil sampai profiling_panel()
+    start_profiling(app)
+
+    st.title(title)
+
+    # Pulihkan percakapan terakhir sesi ini (setelah refresh / restart server).
+    # Riwayat disimpan sebagai log append-only yang ringkas; jumlah token per
+    # giliran dihitung sekali dan ikut tersimpan.
+    restore_conversation(app, ROLE_NAMES[0])
+
+    # Inisialisasi peran saat ini (peran percakapan yang dipulihkan)
+    if "current_role" not in st.session_state:
+        st.session_state.current_role = conversation_label()
+
+    # --- Bagian Sidebar untuk Konfigurasi ---
+    with st.sidebar:
+        st.header("⚙️ Configuration")
+
+        # Pilihan untuk mengubah peran (role) AI
+        st.subheader("🎭 Select Role")
+        selected_role = st.selectbox(
+            "Choose assistant role:",
+            options=ROLE_NAMES,
+            index=ROLE_NAMES.index(st.session_state.current_role)
+            if st.session_state.current_role in ROLE_NAMES
+            else 0,
+            # Jawaban yang sedang di-stream milik percakapan peran saat ini
+            disabled=st.session_state.get("generation") is not None,
+        )
+
+        # Panel basis pengetahuan berjalan sebagai fragment: unggahan tidak
+        # menjalankan ulang (dan merender ulang) seluruh halaman chat
+        knowledge_base_panel()
+
+    # Setiap peran memiliki cabang percakapannya sendiri: berganti peran
+    # melanjutkan riwayat peran tujuan (dan prompt yang sudah disiapkan),
+    # tanpa membuang riwayat peran sebelumnya
+    if st.session_state.current_role != selected_role:
+        switch_conversation(selected_role)
+        st.session_state.current_role = selected_role
+
+    # --- Antarmuka Chat Utama ---
+
+    # Tampilkan peran yang sedang aktif
+    st.markdown(f"**Current Role:** {ROLES[selected_role]['icon']} {selected_role}")
+
+    # Tampilkan riwayat percakapan dari sesi sebelumnya (hanya jendela pesan
+    # terakhir; pesan lama dimuat lewat tombol "Load older")
+    render_transcript(st.session_state.messages)
+
+    # Error generasi sebelumnya disimpan oleh _show_generation() sebelum
+    # st.rerun() (yang menghapus st.error) dan ditampilkan sekali di bawah
+    # jawaban cadangannya
+    if "generation_error" in st.session_state:
+        st.error(st.session_state.pop("generation_error"))
+
+    # Prompt peran, basis pengetahuan, dan riwayat disiapkan di latar selama
+    # pengguna mengetik; saat pertanyaan dikirim hanya retrieval yang tersisa
+    role_prompt = ROLES[selected_role]["system_prompt"]
+    generation = st.session_state.get("generation")
+    if generation is None:
+        prefetch_chat(model, role_prompt)
+
+    # Input chat dari pengguna (dinonaktifkan selama jawaban sebelumnya masih di-stream)
+    if prompt := st.chat_input("What can I help you with?", disabled=generation is not None):
+        with st.chat_message("user"):
+            st.markdown(prompt)
+
+        # Periksa apakah provider siap (misal kunci API tersedia)
+        problem = check() if check is not None else None
+        if problem:
+            with st.chat_message("assistant"):
+                st.error(problem)
+            st.stop()
+
+        # Rencanakan anggaran token: prompt peran, konteks basis pengetahuan,
+        # riwayat, dan pertanyaan dipangkas berdasarkan prioritas. Seluruh basis
+        # pengetahuan dipakai bila muat; jika tidak, hanya chunk yang relevan.
+        # Batas jawaban mengikuti TaskProfile `task` dan dicadangkan dari
+        # jendela konteks.
+        limits = task_params(task, model)
+        with profiling.stage("plan_chat"):
+            prepared = prepared_chat(model, role_prompt)
+            plan = plan_chat(
+                model,
+                role_prompt,
+                prompt,
+                get_knowledge_base(),
+                st.session_state.messages,
+                prepared=prepared,
+                max_output_tokens=limits["max_tokens"],
+            )
+
+        # Tambahkan pesan pengguna ke riwayat chat (setelah perencanaan, karena
+        # pertanyaan saat ini dikirim terpisah dari riwayat)
+        record_message("user", prompt)
+
+        # Kirim ke layanan generasi async; thread script langsung selesai dan
+        # jawaban ditampilkan oleh fragment di bawah
+        generation = submit(plan, prepared, limits)
+        st.session_state.generation = generation
+        st.session_state.generation_prompt_tokens = plan.prompt_tokens
+
+    if generation is not None:
+        st.fragment(_show_generation, run_every=STREAM_POLL_SECONDS)(model, task, api_label)
+
+    # --- Petunjuk Penggunaan di Bagian Bawah ---
+    with st.expander("ℹ️ How to use"):
+        st.markdown(CHAT_HOW_TO)
+
+    if sidebar_footer is not None:
+        with st.sidebar:
+            sidebar_footer()
+
+    # Impor parser dokumen & SDK provider di latar belakang setelah halaman tampil
+    warm_up(["PyPDF2", "pandas", "openpyxl", "tabulate", *warm_modules], hooks=list(warm_hooks))
+
+    # Simpan profil rerun ini (mode profiling) dan tampilkan viewer di sidebar
+    profiling_panel()
+
+
+def _show_generation(model: str, task: str, api_label: str):
+    """Menampilkan jawaban yang sedang di-stream; di-poll tanpa memblokir thread"""
+    handle = st.session_state.get("generation")
+    if handle is None:
+        return
+    response_text, done = handle.snapshot()
+    with st.chat_message("assistant"):
+        if not done:
+            # Tambahkan kursor berkedip untuk efek visual
+            st.markdown(response_text + "▌")
+            return
+
+        if handle.error:
+            st.session_state.generation_error = (
+                f"Error calling {api_label}: {str(handle.error)}"
+            )
+            response_text = (
+                "Sorry, I encountered an error while processing your request."
+            )
+        else:
+            # Catat token perkiraan vs aktual (jika provider melaporkan usage)
+            log_usage(
+                task,
+                model,
+                st.session_state.generation_prompt_tokens,
+                handle.usage.get("prompt_tokens"),
+                handle.usage.get("completion_tokens"),
+                estimate_tokens(response_text),
+            )
+        st.markdown(response_text)
+
+    # Tambahkan respons dari asisten ke riwayat chat, lalu muat ulang seluruh
+    # halaman agar polling berhenti dan input chat aktif kembali
+    del st.session_state.generation
+    record_message("assistant", response_text)
+    st.rerun()
@@ -0,0 +1,75 @@
+# chatbot/warmup.py
+# ------------------------------------------------------------
+# Pemanasan (warm-up) modul berat di latar belakang
+# ------------------------------------------------------------
+# Parser dokumen (PyPDF2, pandas/openpyxl) dan SDK provider (Gemini,
+# OpenAI) baru diimpor saat dibutuhkan, sehingga render pertama tidak
+# menunggu impor yang mungkin tidak pernah dipakai. warm_up() dipanggil
+# di akhir script (setelah halaman pertama tampil) untuk mengimpor modul
+# tersebut di thread latar, sekali per proses, agar unggahan / chat
+# pertama juga tidak menunggu.
+#
+# Nonaktifkan dengan environment variable WARMUP=0.
+# ------------------------------------------------------------
+
+import importlib
+import logging
+import os
+import threading
+import time
+from typing import Callable, Dict, Iterable, Optional, Set
+
+logger = logging.getLogger("warmup")
+
+_lock = threading.Lock()
+_scheduled: Set[str] = set()
+_timings: Dict[str, float] = {}
+
+
+def _run(modules, hooks):
+    for name in modules:
+        started = time.perf_counter()
+        try:
+            importlib.import_module(name)
+        except ImportError as e:
+            # Dependensi opsional yang tidak terpasang bukan error
+            logger.info("warm-up: %s tidak tersedia (%s)", name, e)
+            continue
+        _timings[name] = time.perf_counter() - started
+    for hook in hooks:
+        started = time.perf_counter()
+        try:
+            hook()
+        except Exception:
+            logger.exception("warm-up hook %r gagal", hook)
+            continue
+        _timings[getattr(hook, "__name__", repr(hook))] = time.perf_counter() - started
+    logger.info(
+        "warm-up selesai: %s",
+        ", ".join(f"{k}={v * 1000:.0f}ms" for k, v in _timings.items()),
+    )
+
+
+def warm_up(
+    modules: Iterable[str],
+    hooks: Iterable[Callable[[], object]] = (),
+) -> Optional[threading.Thread]:
+    """Mengimpor `modules` lalu menjalankan `hooks` di thread latar (sekali per proses)"""
+    if os.getenv("WARMUP", "1") == "0":
+        return None
+    hooks = list(hooks)
+    with _lock:
+        modules = [m for m in modules if m not in _scheduled]
+        hook_names = {getattr(h, "__name__", repr(h)) for h in hooks}
+        hooks = [h for h in hooks if getattr(h, "__name__", repr(h)) not in _scheduled]
+        if not modules and not hooks:
+            return None
+        _scheduled.update(modules)
+        _scheduled.update(hook_names)
+    thread = threading.Thread(target=_run, args=(modules, hooks), name="warmup", daemon=True)
+    thread.start()
+    return thread
+
+
+def warmup_timings() -> Dict[str, float]:
+    return dict(_timings)
@@ -0,0 +1,179 @@
+# load_test.py
+# ------------------------------------------------------------
+# Uji beban GenerationService terhadap LLM palsu lokal
+# ------------------------------------------------------------
+# Membandingkan dua cara melayani N chat bersamaan:
+# - async   : semua sesi lewat GenerationService (satu event loop I/O)
+# - threads : satu thread per sesi yang menunggu jawaban (cara lama)
+# dan melaporkan waktu token pertama, waktu total, throughput, serta
+# jumlah thread puncak.
+#
+# LLM palsu:
+# - --provider fake : generator async in-process (tanpa dependensi)
+# - --provider http : server tiruan lokal (benchmarks.mock_server), diakses
+#                     lewat openai.AsyncOpenAI (jalur yang sama dengan main_telkom.py)
+#
+# Contoh:
+#   python load_test.py --concurrency 1 10 100 500 --tokens 200 --delay 0.02
+# ------------------------------------------------------------
+
+import argparse
+import asyncio
+import statistics
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+from chatbot.providers.generation_service import GenerationService, openai_chat_stream
+
+
+# --------------------------
+# LLM palsu
+# --------------------------
+async def fake_stream(
+    n_tokens: int, delay: float, usage: Dict[str, Any]
+) -> AsyncIterator[str]:
+    for i in range(n_tokens):
+        await asyncio.sleep(delay)
+        yield f"tok{i} "
+    usage["completion_tokens"] = n_tokens
+
+
+def fake_stream_blocking(n_tokens: int, delay: float):
+    for i in range(n_tokens):
+        time.sleep(delay)
+        yield f"tok{i} "
+
+
+# --------------------------
+# Skenario
+# --------------------------
+class ThreadMonitor:
+    """Mencatat jumlah thread puncak selama skenario berjalan"""
+
+    def __init__(self):
+        self.peak = threading.active_count()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(0.01):
+            self.peak = max(self.peak, threading.active_count())
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+
+
+def _report(label: str, n: int, wall: float, ttft: List[float], total: List[float], threads: int, tokens: int):
+    def pct(values: List[float], q: int) -> float:
+        return statistics.quantiles(values, n=100)[q - 1] if len(values) > 1 else values[0]
+
+    print(
+        f"{label:8s} n={n:4d}  wall={wall:6.2f}s  "
+        f"ttft p50={pct(ttft, 50) * 1000:6.0f}ms p95={pct(ttft, 95) * 1000:6.0f}ms  "
+        f"total p95={pct(total, 95):5.2f}s  "
+        f"{tokens * n / wall:8.0f} tok/s  threads={threads}"
+    )
+
+
+def run_async(service: GenerationService, n: int, args, stream_kwargs: Dict[str, Any]):
+    ttft: List[float] = []
+    total: List[float] = []
+
+    async def session():
+        started = time.perf_counter()
+        first = None
+        async for _ in service.stream(**stream_kwargs):
+            if first is None:
+                first = time.perf_counter() - started
+        ttft.append(first or 0.0)
+        total.append(time.perf_counter() - started)
+
+    async def main():
+        await asyncio.gather(*(session() for _ in range(n)))
+
+    with ThreadMonitor() as mon:
+        started = time.perf_counter()
+        asyncio.run(main())
+        wall = time.perf_counter() - started
+    _report("async", n, wall, ttft, total, mon.peak, args.tokens)
+
+
+def run_threads(n: int, args):
+    ttft: List[float] = []
+    total: List[float] = []
+
+    def session():
+        started = time.perf_counter()
+        first = None
+        for _ in fake_stream_blocking(args.tokens, args.delay):
+            if first is None:
+                first = time.perf_counter() - started
+        ttft.append(first or 0.0)
+        total.append(time.perf_counter() - started)
+
+    with ThreadMonitor() as mon:
+        started = time.perf_counter()
+        # Seperti server Streamlit: satu thread script per sesi aktif
+        with ThreadPoolExecutor(max_workers=n) as pool:
+            for fut in [pool.submit(session) for _ in range(n)]:
+                fut.result()
+        wall = time.perf_counter() - started
+    _report("threads", n, wall, ttft, total, mon.peak, args.tokens)
+
+
+def parse_args(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Uji beban GenerationService")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 10, 100, 500])
+    parser.add_argument("--tokens", type=int, default=100, help="Token per jawaban")
+    parser.add_argument("--delay", type=float, default=0.02, help="Jeda antar token (detik)")
+    parser.add_argument("--provider", choices=["fake", "http"], default="fake")
+    parser.add_argument("--mode", choices=["async", "threads", "both"], default="both")
+    parser.add_argument("--max-concurrency", type=int, default=1024)
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+
+    service = GenerationService(max_concurrency=args.max_concurrency)
+    if args.provider == "fake":
+        stream_kwargs = {"stream_fn": fake_stream, "n_tokens": args.tokens, "delay": args.delay}
+    else:
+        from openai import AsyncOpenAI
+
+        from benchmarks.mock_server import MockConfig, MockServer
+
+        server = MockServer(
+            config=MockConfig(latency=0.0, token_rate=1 / args.delay if args.delay else 0, tokens=args.tokens)
+        ).start()
+        client = AsyncOpenAI(api_key="fake", base_url=f"{server.url}/v1")
+        stream_kwargs = {
+            "stream_fn": openai_chat_stream,
+            "client": client,
+            "model": "fake",
+            "messages": [{"role": "user", "content": "halo"}],
+        }
+
+    print(
+        f"{args.tokens} token/jawaban, jeda {args.delay * 1000:.0f} ms/token, "
+        f"provider={args.provider}",
+        file=sys.stderr,
+    )
+    for n in args.concurrency:
+        if args.mode in ("async", "both"):
+            run_async(service, n, args, stream_kwargs)
+        if args.mode in ("threads", "both"):
+            run_threads(n, args)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -19,43 +19,74 @@
 import os
 import base64
 import json
+import time
 import requests
 import streamlit as st
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, Union
 from dotenv import load_dotenv
+from chatbot.ingestion.doc_store import content_hash
+from chatbot.ingestion.extractors import PdfText, extract_pdf_hybrid
+from chatbot.ingestion.spool import open_upload
+from chatbot.profiling import stage
+from chatbot.providers.single_flight import request_key
+from chatbot.providers.task_profiles import task_params
+from chatbot.providers.telkom_api import (
+    AUTH_SCHEMES,
+    DEFAULT_ENDPOINTS,
+    PROFILE_PRODUCTS,
+    SYSTEM_PROMPT,
+    TELKOM_LLM_MODEL,
+    auth_headers,
+    build_llm_payload,
+    build_profile_prompt,
+    ocr_pdf,
+    parse_llm_response,
+    post_json,
+    stream_llm,
+    stt,
+    tts,
+)
+from chatbot.retrieval.chat_memory import build_chat_request
+from chatbot.pipelines.image_pipeline import (
+    DEFAULT_MAX_SIDE,
+    DEFAULT_QUALITY,
+    ResultCache,
+    prepare_image,
+)
+from chatbot.pipelines.sections import (
+    SECTION_KEYS,
+    SECTION_TITLES,
+    SectionParser,
+    section_max_tokens,
+    section_prompt,
+    split_blocks,
+    structured_system_prompt,
+)
+from chatbot.retrieval.token_budget import estimate_tokens, plan_context, truncate_to_tokens
+from chatbot.pipelines.voice_pipeline import (
+    SentenceSplitter,
+    StageTimer,
+    TTSQueue,
+    decode_audio_b64,
+    split_wav_on_silence,
+    transcribe_segments,
+)
+from chatbot.ui import (
+    get_session_id,
+    get_session_store,
+    get_shared_state,
+    get_single_flight,
+    profiling_panel,
+    record_message,
+    render_transcript,
+    restore_conversation,
+    start_profiling,
+)
+from chatbot.warmup import warm_up
 
 # ---- Load .env ----
 load_dotenv()
 
-# --------------------------
-# Endpoint default
-# --------------------------
-DEFAULT_ENDPOINTS = {
-    "TELKOM_LLM": "https://telkom-ai-dag-api.apilogy.id/Telkom-LLM/0.0.4/llm",  # ← sudah pakai /llm
-    "LMM": "https://telkom-ai-dag.api.apilogy.id/LargeMultimodalModel/0.0.2",
-    "OCR": "http://telkom-ai-dag.api.apilogy.id/OCR_Document_Based/0.0.5",
-    "OD": "http://telkom-ai-dag.api.apilogy.id/Object_Detection/0.0.1",
-    "STT": "http://telkom-ai-dag.api.apilogy.id/Speech_To_Text/0.0.2",
-    "TTS": "http://telkom-ai-dag.api.apilogy.id/Text_To_Speech/0.0.2",
-}
-
-# --------------------------
-# System Prompt
-# --------------------------
-SYSTEM_PROMPT = (
-    "Anda adalah Asisten Consultative Selling Telkom. Jawab ringkas, actionable, "
-    "dan berbasis data. Selalu format hasil dengan blok berikut bila relevan:\n\n"
-    "[Profil]\n"
-    "[Pain Points]\n"
-    "[Opportunity 90 Hari]\n"
-    "[Risiko]\n"
-    "[Next Best Action]\n"
-    "[Talk Track 30 detik]\n"
-    "[Data yang perlu diverifikasi]\n"
-    "Jika pengguna mengunggah dokumen atau foto, lakukan analisis kontekstual."
-)
-
-
 # --------------------------
 # Helpers
 # --------------------------
@@ -72,16 +103,6 @@ def get_api_key() -> Optional[str]:
     return key
 
 
-def safe_get(d: Dict[str, Any], path: str, default=None):
-    cur = d
-    for p in path.split("."):
-        if isinstance(cur, dict) and p in cur:
-            cur = cur[p]
-        else:
-            return default
-    return cur
-
-
 def pretty_error(e: Exception) -> str:
     body = ""
     try:
@@ -92,12 +113,31 @@ def pretty_error(e: Exception) -> str:
 
 
 def b64encode_file(content_bytes: bytes, mime: str) -> str:
-    return f"data:{mime};base64," + base64.b64encode(content_bytes).decode()
+    with stage("base64"):
+        return f"data:{mime};base64," + base64.b64encode(content_bytes).decode()
+
+
+# Foto yang sama (hash konten sama) tidak diproses ulang pada rerun berikutnya;
+# isi foto (`_data`, memoryview unggahan) tidak ikut di-hash oleh Streamlit
+@st.cache_data(max_entries=32, show_spinner=False)
+def prepare_site_image(content_key: str, _data, mime: str, max_side: int, quality: int):
+    return prepare_image(
+        _data, mime, max_side=max_side, quality=quality, content_key=content_key
+    )
+
+
+# Hasil OD / LMM bersama lintas sesi (dan lintas worker jika SHARED_STATE_URL
+# diisi), dicari lewat hash konten / perceptual hash
+@st.cache_resource
+def get_site_cache() -> ResultCache:
+    return ResultCache(
+        max_entries=int(os.getenv("SITE_CACHE_MAX_ENTRIES", "256")), shared=get_shared_state()
+    )
 
 
 def ensure_session_state():
-    if "chat_history" not in st.session_state:
-        st.session_state.chat_history = []
+    # Riwayat chat dipulihkan dari disk bila sesi (?sid=...) pernah dibuka
+    restore_conversation("test", "chat", key="chat_log")
     if "endpoints" not in st.session_state:
         st.session_state.endpoints = DEFAULT_ENDPOINTS.copy()
     if "AUTH_SCHEME" not in st.session_state:
@@ -107,22 +147,16 @@ def ensure_session_state():
 # --------------------------
 # Auth & HTTP helpers
 # --------------------------
+# Header dihitung sekali per (kunci, skema), bukan di setiap panggilan API
+@st.cache_data(max_entries=16, show_spinner=False)
+def cached_auth_headers(api_key: Optional[str], scheme: str) -> Dict[str, str]:
+    return auth_headers(api_key, scheme)
+
+
 def build_headers_for_scheme(scheme: str) -> Dict[str, str]:
-    key = get_api_key()
-    h = {"Content-Type": "application/json"}
-    if not key:
+    h = cached_auth_headers(get_api_key(), scheme)
+    if len(h) == 1:
         return h
-    key = key.strip()
-
-    if scheme == "bearer":
-        h["Authorization"] = f"Bearer {key}"
-    elif scheme == "x-api-key":
-        h["x-api-key"] = key
-    elif scheme == "apikey":
-        h["apikey"] = key
-    elif scheme == "bearer + x-api-key":
-        h["Authorization"] = f"Bearer {key}"
-        h["x-api-key"] = key
 
     # Debug logging (remove sensitive info)
     debug_headers = {
@@ -176,37 +210,149 @@ def post_json_auth(
 def post_json_plain(
     url: str, payload: Dict[str, Any], timeout: int = 120
 ) -> Dict[str, Any]:
-    r = requests.post(
-        url, json=payload, headers={"Content-Type": "application/json"}, timeout=timeout
-    )
-    try:
-        r.raise_for_status()
-    except requests.HTTPError as e:
-        raise RuntimeError(f"{e} | body: {r.text[:500]}") from e
-    return r.json()
+    return post_json(url, payload, timeout=timeout)
 
 
 # --------------------------
 # API Wrappers
 # --------------------------
+def output_budget(task: str) -> int:
+    """max_tokens tugas saat ini; dipakai juga sebagai cadangan jawaban di plan_context"""
+    return task_params(task, TELKOM_LLM_MODEL)["max_tokens"]
+
+
+# Permintaan identik (endpoint, kredensial, payload sama) yang sedang berjalan
+# di sesi lain tidak dikirim ulang: pemanggil menunggu panggilan yang sama
+def flight_key(kind: str, url: str, payload: Any) -> str:
+    scheme = st.session_state.get("AUTH_SCHEME", "bearer")
+    return request_key(kind, url, scheme, get_api_key(), payload)
+
+
+# Model, batas token keluaran, temperature, dan stop sequence mengikuti
+# TaskProfile alur kerjanya; pemanggil boleh menimpa temperature / max_tokens
+def llm_payload(
+    user_text: str,
+    system_prompt: str,
+    task: str,
+    temperature: Optional[float] = None,
+    max_tokens: Optional[int] = None,
+    history: Optional[List[Dict[str, str]]] = None,
+) -> Dict[str, Any]:
+    params = task_params(task, TELKOM_LLM_MODEL)
+    return build_llm_payload(
+        user_text,
+        system_prompt,
+        params["temperature"] if temperature is None else temperature,
+        max_tokens or params["max_tokens"],
+        history=history,
+        stop=params["stop"],
+        model=params["model"],
+    )
+
+
 def call_telkom_llm(
     user_text: str,
     system_prompt: str = SYSTEM_PROMPT,
-    temperature: float = 0.2,
-    max_tokens: int = 1200,
+    task: str = "chat",
+    temperature: Optional[float] = None,
+    max_tokens: Optional[int] = None,
 ) -> str:
     url = st.session_state.endpoints["TELKOM_LLM"]
-    payload = {
-        "model": "telkom-llm-0.0.4",
-        "inputs": {
-            "system": system_prompt,
-            "messages": [{"role": "user", "content": user_text}],
-            "temperature": temperature,
-            "max_tokens": max_tokens,
-        },
-    }
-    resp = post_json_auth(url, payload, timeout=120)
-    return safe_get(resp, "outputs.text", "Maaf, tidak ada keluaran dari LLM.")
+    payload = llm_payload(user_text, system_prompt, task, temperature, max_tokens)
+    return get_single_flight().do(
+        flight_key("llm", url, payload),
+        lambda: parse_llm_response(post_json_auth(url, payload, timeout=120), payload, task),
+    )
+
+
+def stream_telkom_llm(
+    user_text: str,
+    system_prompt: str = SYSTEM_PROMPT,
+    task: str = "chat",
+    temperature: Optional[float] = None,
+    max_tokens: Optional[int] = None,
+    history: Optional[List[Dict[str, str]]] = None,
+    label: Optional[str] = None,
+):
+    """Versi streaming call_telkom_llm; fallback ke blocking jika endpoint tidak mendukung.
+
+    Panjang jawaban dicatat dengan `label` (default: `task`) untuk TaskProfile.
+    """
+    key = get_api_key()
+    if not key:
+        raise RuntimeError(
+            "❌ No API key provided. Please set GEMINI_API_KEY in sidebar or .env file."
+        )
+    url = st.session_state.endpoints["TELKOM_LLM"]
+    headers = build_headers_for_scheme(st.session_state.get("AUTH_SCHEME", "bearer"))
+    payload = llm_payload(user_text, system_prompt, task, temperature, max_tokens, history)
+    # Stream identik yang sedang berjalan dibagikan ke semua penunggu
+    return get_single_flight().stream(
+        flight_key("llm_stream", url, payload),
+        stream_llm,
+        payload,
+        url,
+        headers,
+        timeout=120,
+        label=label or task,
+    )
+
+
+def render_stream(chunks, placeholder=None) -> str:
+    """Menampilkan potongan teks saat tiba (efek ketikan) dan mengembalikan teks lengkap"""
+    placeholder = placeholder or st.empty()
+    placeholder.markdown("▌")
+    started = time.perf_counter()
+    first_token_s = None
+    text = ""
+    with stage("llm_stream"):
+        for piece in chunks:
+            if first_token_s is None:
+                first_token_s = time.perf_counter() - started
+            text += piece
+            placeholder.markdown(text + "▌")
+    placeholder.markdown(text)
+    if first_token_s is not None:
+        st.caption(
+            f"⏱ token pertama {first_token_s:.2f} dtk · selesai {time.perf_counter() - started:.2f} dtk"
+        )
+    return text
+
+
+def section_markdown(key: str, text: str) -> str:
+    return f"**[{SECTION_TITLES[key]}]**\n\n{text}"
+
+
+def stream_sections(
+    user_prompt: str,
+    keys: List[str],
+    current: Dict[str, str],
+    placeholders: Dict[str, Any],
+) -> Dict[str, str]:
+    """Meminta bagian `keys` sebagai JSON; tiap bagian dirender begitu nilainya selesai"""
+    parser = SectionParser()
+    # Hanya profil lengkap yang menjadi sampel panjang jawaban tugas "profile"
+    partial_request = len(keys) < len(SECTION_KEYS)
+    chunks = stream_telkom_llm(
+        section_prompt(user_prompt, keys, current),
+        structured_system_prompt(SYSTEM_PROMPT, keys),
+        task="profile",
+        max_tokens=section_max_tokens(keys) if partial_request else None,
+        label="profile_partial" if partial_request else None,
+    )
+    for piece in chunks:
+        for key, text in parser.feed(piece):
+            if key in placeholders:
+                placeholders[key].markdown(section_markdown(key, text))
+        partial = parser.partial()
+        if partial is not None and partial[0] in placeholders:
+            placeholders[partial[0]].markdown(section_markdown(*partial) + "▌")
+    # Model menjawab teks bebas → dipecah berdasarkan penanda [Judul]
+    sections = parser.sections or split_blocks(parser.text)
+    fresh = {key: sections[key] for key in keys if sections.get(key)}
+    for key, text in fresh.items():
+        placeholders[key].markdown(section_markdown(key, text))
+    return fresh
 
 
 def call_lmm(
@@ -220,13 +366,24 @@ def call_lmm(
         payload["inputs"]["images"] = images_b64
     if files_b64:
         payload["inputs"]["files"] = files_b64
-    return post_json_auth(url, payload, timeout=150)
+    return get_single_flight().do(
+        flight_key("lmm", url, payload),
+        post_json_auth, url, payload, timeout=150,
+    )
 
 
-def call_ocr(pdf_b64: str) -> Dict[str, Any]:
+def call_ocr(pdf_bytes: Union[bytes, memoryview]) -> PdfText:
+    """Text layer lokal; hanya halaman hasil scan yang dikirim ke OCR"""
+    # Endpoint dibaca di thread script; OCR per halaman berjalan di thread pool
     url = st.session_state.endpoints["OCR"]
-    payload = {"file_base64": pdf_b64}
-    return post_json_plain(url, payload, timeout=150)
+    flights = get_single_flight()
+    with stage("pdf_text_ocr"):
+        return extract_pdf_hybrid(
+            pdf_bytes,
+            lambda page_pdf: flights.do(
+                request_key("ocr", url, content_hash(page_pdf)), ocr_pdf, page_pdf, url
+            ),
+        )
 
 
 def call_object_detection(
@@ -239,22 +396,12 @@ def call_object_detection(
     return post_json_plain(url, payload, timeout=120)
 
 
-def call_stt(audio_b64: str, language: str = "id") -> Dict[str, Any]:
-    url = st.session_state.endpoints["STT"]
-    payload = {"audio_base64": audio_b64, "language": language}
-    return post_json_plain(url, payload, timeout=180)
-
-
-def call_tts(text: str, voice: str = "id_female_1") -> Dict[str, Any]:
-    url = st.session_state.endpoints["TTS"]
-    payload = {"text": text, "voice": voice}
-    return post_json_plain(url, payload, timeout=180)
-
-
 # --------------------------
 # UI
 # --------------------------
 st.set_page_config(page_title="Telkom ConsultBot (POC)", page_icon="🤖", layout="wide")
+# Mode profiling (sidebar / PROFILE_MODE=1): rerun ini diprofil sampai profiling_panel()
+start_profiling("test")
 ensure_session_state()
 
 with st.sidebar:
@@ -282,7 +429,7 @@ with st.sidebar:
     st.subheader("Auth")
     st.session_state.AUTH_SCHEME = st.selectbox(
         "Skema header untuk Telkom-LLM/LMM",
-        options=["bearer", "x-api-key", "apikey", "bearer + x-api-key"],
+        options=AUTH_SCHEMES,
         index=0,
         help="Coba x-api-key jika bearer gagal. Atau gunakan bearer + x-api-key.",
     )
@@ -325,9 +472,7 @@ with st.sidebar:
                 st.error("❌ Set API key dulu!")
             else:
                 try:
-                    ping = call_telkom_llm(
-                        "ping", system_prompt="ping", temperature=0.0, max_tokens=16
-                    )
+                    ping = call_telkom_llm("ping", system_prompt="ping", task="ping")
                     st.success("✅ Telkom-LLM OK")
                     st.code(ping)
                 except Exception as e:
@@ -369,29 +514,35 @@ tabs = st.tabs(
 # -------------
 with tabs[0]:
     st.subheader("Chat Bebas (Consultative Selling)")
-    for msg in st.session_state.chat_history:
-        with st.chat_message(msg["role"]):
-            st.markdown(msg["content"])
+    chat_log = st.session_state.chat_log
+    # Hanya pesan terakhir yang dirender; pesan lama lewat "Load older"
+    render_transcript(chat_log, key="chat_transcript")
 
     user_msg = st.chat_input(
         "Ketik pesan (misal: 'Rekomendasi pendekatan untuk PT ABC sektor logistik')."
     )
     if user_msg:
-        st.session_state.chat_history.append({"role": "user", "content": user_msg})
         with st.chat_message("user"):
             st.markdown(user_msg)
+        # Riwayat dikirim sesuai anggaran token; giliran lama diringkas
+        chat_budget = output_budget("chat")
+        system_prompt, history, _ = build_chat_request(
+            chat_log, TELKOM_LLM_MODEL, SYSTEM_PROMPT, user_msg, max_output_tokens=chat_budget
+        )
+        record_message("user", user_msg, key="chat_log")
         try:
             with st.chat_message("assistant"):
-                with st.spinner("Memproses dengan Telkom-LLM..."):
-                    answer = call_telkom_llm(user_msg, SYSTEM_PROMPT)
-                    st.markdown(answer)
-                st.session_state.chat_history.append(
-                    {"role": "assistant", "content": answer}
+                answer = render_stream(
+                    stream_telkom_llm(
+                        user_msg, system_prompt, max_tokens=chat_budget, history=history
+                    )
                 )
+                record_message("assistant", answer, key="chat_log")
         except Exception as e:
             err = pretty_error(e)
             st.error(err)
-            st.session_state.chat_history.append({"role": "assistant", "content": err})
+            # Pesan error ditampilkan di riwayat tetapi tidak dikirim ke model
+            record_message("assistant", err, in_prompt=False, key="chat_log")
 
 # ------------------------
 # Tab: Profil Perusahaan
@@ -402,14 +553,7 @@ with tabs[1]:
     industry = st.text_input("Industri (opsional, misal: Logistik)")
     products = st.multiselect(
         "Produk fokus",
-        [
-            "IndiBiz Internet",
-            "SD-WAN",
-            "MPLS/IPVPN",
-            "WAN Optimization",
-            "Cloud/Edge",
-            "Security",
-        ],
+        PROFILE_PRODUCTS,
         default=["IndiBiz Internet", "SD-WAN"],
     )
     crm_snapshot = st.text_area(
@@ -421,24 +565,86 @@ with tabs[1]:
         do_profile = st.button("🔎 Profilkan")
     with colB:
         do_strategy = st.button("🧭 Rekomendasi Pendekatan")
+    structured = st.checkbox(
+        "Keluaran terstruktur per bagian", value=True, key="profile_structured"
+    )
+    refresh_profile = st.checkbox(
+        "Buat ulang (abaikan hasil tersimpan)", key="refresh_profile"
+    )
 
+    profile_result = st.session_state.get("profile_result")
+    pending: List[str] = []
     if do_profile or do_strategy:
         if not company:
             st.warning("Isi dulu nama perusahaan.")
         else:
+            task = "profil" if do_profile else "strategi"
+            user_prompt = build_profile_prompt(
+                company, industry, products, crm_snapshot, task=task
+            )
+            if not structured:
+                try:
+                    render_stream(
+                        stream_telkom_llm(user_prompt, SYSTEM_PROMPT, task="profile")
+                    )
+                except Exception as e:
+                    st.error(pretty_error(e))
+            else:
+                # Bagian disimpan per hash prompt: profil yang sama tidak diminta ulang
+                profile_key = request_key(TELKOM_LLM_MODEL, SYSTEM_PROMPT, user_prompt)
+                saved = (
+                    None
+                    if refresh_profile
+                    else get_session_store().get_artifact(
+                        get_session_id(), "profile_sections", profile_key
+                    )
+                )
+                profile_result = {
+                    "key": profile_key,
+                    "prompt": user_prompt,
+                    "sections": dict(saved["sections"]) if saved else {},
+                }
+                st.session_state.profile_result = profile_result
+                if saved:
+                    st.caption("📦 Hasil tersimpan (centang 'Buat ulang' untuk meminta ulang)")
+                else:
+                    pending = list(SECTION_KEYS)
+
+    if structured and profile_result:
+        # Satu placeholder per bagian: bagian tampil begitu selesai di-stream
+        placeholders = {key: st.empty() for key in SECTION_KEYS}
+        for key, text in profile_result["sections"].items():
+            placeholders[key].markdown(section_markdown(key, text))
+
+        colC, colD = st.columns([3, 1])
+        with colC:
+            regen_keys = st.multiselect(
+                "Bagian yang dibuat ulang",
+                SECTION_KEYS,
+                default=["talk_track"],
+                format_func=SECTION_TITLES.get,
+                key="profile_regen_keys",
+            )
+        with colD:
+            do_regen = st.button("♻️ Buat ulang bagian terpilih")
+        if do_regen and regen_keys and not pending:
+            pending = [key for key in SECTION_KEYS if key in regen_keys]
+
+        if pending:
             try:
-                task = "profil" if do_profile else "strategi"
-                with st.spinner(f"Meminta {task} ke Telkom-LLM..."):
-                    user_prompt = (
-                        f"Tugas: {'Profilkan' if do_profile else 'Rekomendasikan pendekatan untuk'} perusahaan berikut.\n"
-                        f"Nama: {company}\n"
-                        f"Industri: {industry or '-'}\n"
-                        f"Produk target: {', '.join(products) if products else '-'}\n"
-                        f"Data CRM ringkas: {crm_snapshot or '-'}\n"
-                        f"Tujuan: peluang proyek 90 hari + next best action."
+                fresh = stream_sections(
+                    profile_result["prompt"], pending, profile_result["sections"], placeholders
+                )
+                if not fresh:
+                    st.warning("Jawaban model tidak berisi bagian yang diminta.")
+                profile_result["sections"].update(fresh)
+                if fresh:
+                    get_session_store().put_artifact(
+                        get_session_id(),
+                        "profile_sections",
+                        profile_result["key"],
+                        {"prompt": profile_result["prompt"], "sections": profile_result["sections"]},
                     )
-                    res = call_telkom_llm(user_prompt, SYSTEM_PROMPT, temperature=0.2)
-                    st.markdown(res)
             except Exception as e:
                 st.error(pretty_error(e))
 
@@ -449,40 +655,105 @@ with tabs[2]:
     st.subheader("Analisis Dokumen Tender (PDF → OCR → Compliance)")
     pdf_file = st.file_uploader("Unggah dokumen tender (PDF)", type=["pdf"])
     go = st.button("📑 Analisis Tender")
+    reanalyze_tender = st.checkbox(
+        "Analisis ulang (abaikan hasil tersimpan)", key="reanalyze_tender"
+    )
 
     if go:
         if not pdf_file:
             st.warning("Unggah dulu PDF tender.")
         else:
             try:
-                pdf_bytes = pdf_file.read()
-                pdf_b64 = b64encode_file(pdf_bytes, "application/pdf")
-                with st.spinner("Menjalankan OCR..."):
-                    ocr = call_ocr(pdf_b64)
-                extracted_text = ocr.get("text", "")
+                # Teks PDF & hasil analisis disimpan per hash isi file: PDF yang
+                # sama (sesi ini, sesi lain, atau setelah restart) tidak di-OCR ulang.
+                # PDF dibaca sebagai memoryview (tanpa salinan) dalam jatah memori
+                # unggahan per proses
+                sessions = get_session_store()
+                with open_upload(pdf_file) as upload:
+                    pdf_key = content_hash(upload.view)
+                    saved_text = sessions.get_artifact(get_session_id(), "pdf_text", pdf_key)
+                    if saved_text is None:
+                        with st.spinner("Membaca teks PDF (OCR hanya untuk halaman hasil scan)..."):
+                            pdf_text = call_ocr(upload.view)
+                if saved_text is not None:
+                    extracted_text = saved_text["text"]
+                    st.success(
+                        f"Teks PDF dari arsip — {len(extracted_text)} karakter "
+                        f"dari {saved_text['pages']} halaman (tanpa OCR ulang)."
+                    )
+                else:
+                    extracted_text = pdf_text.text.strip()
+                    for page, error in pdf_text.ocr_errors.items():
+                        st.warning(f"OCR halaman {page + 1} gagal: {pretty_error(error)}")
+                    if extracted_text:
+                        st.success(
+                            f"Teks selesai diekstraksi — {len(extracted_text)} karakter dari "
+                            f"{len(pdf_text.pages)} halaman ({len(pdf_text.ocr_pages)} lewat OCR, "
+                            f"{pdf_text.ocr_bytes / 1024:,.0f} dari {pdf_text.total_bytes / 1024:,.0f} KB dikirim)."
+                        )
+                        # Hasil dengan halaman OCR yang gagal tidak disimpan agar bisa dicoba ulang
+                        if not pdf_text.ocr_errors:
+                            sessions.put_artifact(
+                                get_session_id(),
+                                "pdf_text",
+                                pdf_key,
+                                {"text": extracted_text, "pages": len(pdf_text.pages)},
+                            )
 
                 if not extracted_text:
                     st.error(
                         "OCR tidak menghasilkan teks. Pastikan PDF tidak terenkripsi atau coba ulang."
                     )
                 else:
-                    st.success(
-                        f"OCR selesai — {len(extracted_text)} karakter diekstraksi."
-                    )
                     with st.expander("Lihat cuplikan teks OCR"):
                         st.text(extracted_text[:5000])
 
-                    analysis_prompt = (
-                        "Analisis teks tender berikut. Buat ringkasan, tabel persyaratan (mandatory/optional), "
-                        "timeline, kriteria evaluasi, dokumen wajib, serta rekomendasi go/no-go dan risiko utama.\n\n"
-                        f"{extracted_text[:15000]}"
+                    saved_analysis = (
+                        None
+                        if reanalyze_tender
+                        else sessions.get_artifact(get_session_id(), "tender_analysis", pdf_key)
                     )
-                    with st.spinner("Menyusun compliance checklist..."):
-                        analysis = call_telkom_llm(
-                            analysis_prompt,
-                            system_prompt="Anda analis tender Telkom yang teliti, ringkas, dan patuh standar.",
+                    if saved_analysis is not None:
+                        st.markdown(saved_analysis["text"])
+                        st.caption(
+                            "📦 Analisis tersimpan dari "
+                            + time.strftime("%d %b %Y %H:%M", time.localtime(saved_analysis["_created"]))
+                        )
+                    else:
+                        tender_system = "Anda analis tender Telkom yang teliti, ringkas, dan patuh standar."
+                        instruction = (
+                            "Analisis teks tender berikut. Buat ringkasan, tabel persyaratan (mandatory/optional), "
+                            "timeline, kriteria evaluasi, dokumen wajib, serta rekomendasi go/no-go dan risiko utama."
+                        )
+                        # Teks tender dipangkas sesuai anggaran token model, bukan jumlah karakter
+                        tender_budget = output_budget("tender")
+                        plan = plan_context(
+                            TELKOM_LLM_MODEL,
+                            tender_system,
+                            instruction,
+                            context_candidates=[extracted_text],
+                            max_output_tokens=tender_budget,
                         )
-                    st.markdown(analysis)
+                        if plan.tokens["context"] < estimate_tokens(extracted_text):
+                            st.caption(
+                                f"Teks tender dipangkas ke ±{plan.tokens['context']} token agar muat di konteks model."
+                            )
+                        analysis_prompt = f"{instruction}\n\n{plan.context_text()}"
+                        analysis = render_stream(
+                            stream_telkom_llm(
+                                analysis_prompt,
+                                system_prompt=tender_system,
+                                task="tender",
+                                max_tokens=tender_budget,
+                            )
+                        )
+                        if analysis:
+                            sessions.put_artifact(
+                                get_session_id(),
+                                "tender_analysis",
+                                pdf_key,
+                                {"text": analysis, "name": pdf_file.name},
+                            )
 
             except Exception as e:
                 st.error(pretty_error(e))
@@ -493,6 +764,11 @@ with tabs[2]:
 with tabs[3]:
     st.subheader("Asesmen Risiko Site (Foto → OD + LMM Advice)")
     img = st.file_uploader("Unggah foto lokasi (JPG/PNG)", type=["jpg", "jpeg", "png"])
+    with st.expander("Pengaturan gambar"):
+        max_side = st.number_input(
+            "Resolusi maks (sisi terpanjang, px)", 320, 4096, DEFAULT_MAX_SIDE, step=160
+        )
+        quality = st.slider("Kualitas JPEG", 50, 95, DEFAULT_QUALITY)
     run_site = st.button("🛠 Analisis Site")
 
     if run_site:
@@ -505,23 +781,40 @@ with tabs[3]:
                     if img.type in ["image/jpg", "image/jpeg"]
                     else "image/png"
                 )
-                img_bytes = img.read()
-                img_b64 = b64encode_file(img_bytes, mime)
+                # Diperkecil & di-encode sekali; base64 dipakai bersama OD dan LMM.
+                # Foto asli dibaca sebagai memoryview dalam jatah memori unggahan
+                with open_upload(img) as upload, stage("image_prepare"):
+                    prepared = prepare_site_image(
+                        content_hash(upload.view), upload.view, mime, max_side, quality
+                    )
+                site_cache = get_site_cache()
+                od_labels = ["rack", "cable", "power-socket", "distribution-box", "ladder"]
+                lmm_prompt = "Analisis risiko instalasi dari foto berikut. Soroti bahaya & rekomendasi mitigasi dalam 3 poin ringkas."
+                cache_params = {"max_side": max_side, "quality": quality}
 
                 col1, col2 = st.columns(2)
                 with col1:
                     st.image(
-                        img_bytes, caption="Foto lokasi (input)", use_column_width=True
+                        prepared.data, caption="Foto lokasi (input)", use_column_width=True
+                    )
+                    st.caption(
+                        f"Diunggah {prepared.nbytes / 1024:,.0f} KB "
+                        f"(asli {prepared.original_nbytes / 1024:,.0f} KB, "
+                        f"{prepared.original_size[0]}×{prepared.original_size[1]} → "
+                        f"{prepared.size[0]}×{prepared.size[1]})"
                     )
 
-                with st.spinner("Object Detection..."):
-                    od = call_object_detection(img_b64)
+                od = site_cache.get("od", prepared, {**cache_params, "labels": od_labels})
+                if od is None:
+                    with st.spinner("Object Detection..."), stage("object_detection"):
+                        od = call_object_detection(prepared.data_uri, labels=od_labels)
+                    site_cache.put("od", prepared, {**cache_params, "labels": od_labels}, od)
 
-                with st.spinner("Analisis LMM..."):
-                    lmm = call_lmm(
-                        prompt="Analisis risiko instalasi dari foto berikut. Soroti bahaya & rekomendasi mitigasi dalam 3 poin ringkas.",
-                        images_b64=[img_b64],
-                    )
+                lmm = site_cache.get("lmm", prepared, {**cache_params, "prompt": lmm_prompt})
+                if lmm is None:
+                    with st.spinner("Analisis LMM..."), stage("lmm"):
+                        lmm = call_lmm(prompt=lmm_prompt, images_b64=[prepared.data_uri])
+                    site_cache.put("lmm", prepared, {**cache_params, "prompt": lmm_prompt}, lmm)
 
                 with col2:
                     st.markdown("*Deteksi objek (ringkas):*")
@@ -529,20 +822,29 @@ with tabs[3]:
                     st.markdown("*Saran teknis (LMM):*")
                     st.json(lmm)
 
-                # Ringkas jadi rekomendasi praktis
-                detected = json.dumps(od)[:4000]
-                lmm_text = json.dumps(lmm)[:4000]
+                # Ringkas jadi rekomendasi praktis; hasil OD dan LMM masing-masing
+                # mendapat separuh anggaran token konteks
+                site_system = "Anda engineer jaringan Telkom yang memberikan saran praktis dan aman."
+                instruction = "Ringkas hasil berikut menjadi rekomendasi teknis praktis untuk tim instalasi (maks 7 poin):"
+                site_budget = output_budget("site")
+                plan = plan_context(
+                    TELKOM_LLM_MODEL, site_system, instruction, max_output_tokens=site_budget
+                )
+                detected = truncate_to_tokens(json.dumps(od), plan.context_budget // 2)
+                lmm_text = truncate_to_tokens(json.dumps(lmm), plan.context_budget // 2)
                 summary_prompt = (
-                    "Ringkas hasil berikut menjadi rekomendasi teknis praktis untuk tim instalasi (maks 7 poin):\n"
+                    f"{instruction}\n"
                     f"Deteksi: {detected}\n"
                     f"Analisis LMM: {lmm_text}"
                 )
-                with st.spinner("Menyusun rekomendasi praktis..."):
-                    summary = call_telkom_llm(
+                render_stream(
+                    stream_telkom_llm(
                         summary_prompt,
-                        system_prompt="Anda engineer jaringan Telkom yang memberikan saran praktis dan aman.",
+                        system_prompt=site_system,
+                        task="site",
+                        max_tokens=site_budget,
                     )
-                st.markdown(summary)
+                )
 
             except Exception as e:
                 st.error(pretty_error(e))
@@ -556,6 +858,9 @@ with tabs[4]:
         "Unggah voice note (MP3/WAV/M4A)", type=["mp3", "wav", "m4a"]
     )
     run_voice = st.button("🎧 Proses Voice")
+    regenerate_voice = st.checkbox(
+        "Buat ulang briefing (abaikan hasil tersimpan)", key="regenerate_voice"
+    )
 
     if run_voice:
         if not audio:
@@ -568,52 +873,150 @@ with tabs[4]:
                     if ext == "mp3"
                     else ("audio/wav" if ext == "wav" else "audio/mp4")
                 )
-                audio_bytes = audio.read()
-                audio_b64 = b64encode_file(audio_bytes, mime)
-
-                with st.spinner("Transkrip (STT)..."):
-                    stt_res = call_stt(audio_b64, language="id")
-                transcript = stt_res.get("text", "")
+                timer = StageTimer()
+                sessions = get_session_store()
+                # Endpoint dibaca di thread script; worker STT/TTS tidak boleh
+                # mengakses st.session_state
+                stt_url = st.session_state.endpoints["STT"]
+                tts_url = st.session_state.endpoints["TTS"]
+
+                def stt_segment(segment) -> str:
+                    res = stt(b64encode_file(segment, mime), stt_url, language="id")
+                    return res.get("text", "")
+
+                # Rekaman dibaca sebagai memoryview (tanpa salinan) dalam jatah
+                # memori unggahan per proses; transkrip & briefing disimpan per
+                # hash isi rekaman
+                with open_upload(audio) as upload:
+                    audio_key = content_hash(upload.view)
+                    saved_briefing = (
+                        None
+                        if regenerate_voice
+                        else sessions.get_artifact(
+                            get_session_id(), "briefing", audio_key, with_blob=True
+                        )
+                    )
+                    saved_transcript = sessions.get_artifact(
+                        get_session_id(), "transcript", audio_key
+                    )
+                    if saved_transcript is not None:
+                        transcript = saved_transcript["text"]
+                    else:
+                        # Rekaman WAV panjang dipecah di jeda hening → STT paralel per segmen
+                        segments = (
+                            split_wav_on_silence(upload.view)
+                            if mime == "audio/wav"
+                            else [upload.view]
+                        )
+                        with st.spinner(f"Transkrip (STT, {len(segments)} segmen)..."), stage("stt"):
+                            transcript = transcribe_segments(segments, stt_segment)
+                        if transcript:
+                            sessions.put_artifact(
+                                get_session_id(), "transcript", audio_key, {"text": transcript}
+                            )
+                timer.mark("stt")
 
                 if not transcript:
                     st.error("Gagal menghasilkan transkrip. Coba format audio lain.")
+                elif saved_briefing is not None:
+                    st.markdown("*Transkrip:*")
+                    st.write(transcript)
+                    st.markdown("*Briefing 30 detik (teks):*")
+                    st.markdown(saved_briefing["text"])
+                    if saved_briefing["_blob"]:
+                        st.audio(saved_briefing["_blob"], format="audio/mp3")
+                        st.download_button(
+                            "⬇ Unduh Audio Briefing",
+                            data=saved_briefing["_blob"],
+                            file_name="briefing.mp3",
+                        )
+                    st.caption(
+                        "📦 Briefing tersimpan dari "
+                        + time.strftime("%d %b %Y %H:%M", time.localtime(saved_briefing["_created"]))
+                    )
                 else:
-                    st.success("STT selesai.")
+                    if saved_transcript is not None:
+                        st.success("Transkrip dari arsip (tanpa STT ulang).")
+                    else:
+                        st.success(f"STT selesai ({timer.get('stt'):.1f} dtk).")
                     st.markdown("*Transkrip:*")
                     st.write(transcript)
 
-                    with st.spinner("Ringkas jadi briefing 30 detik..."):
-                        briefing = call_telkom_llm(
-                            user_text=f"Ringkas jadi briefing AM 30 detik: poin inti, next step, CTA.\n\nTeks:\n{transcript}",
-                            system_prompt="Anda konsultan penjualan Telkom. Jawab ringkas, praktis, dengan CTA jelas.",
-                        )
+                    voice_system = "Anda konsultan penjualan Telkom. Jawab ringkas, praktis, dengan CTA jelas."
+                    instruction = "Ringkas jadi briefing AM 30 detik: poin inti, next step, CTA."
+                    voice_budget = output_budget("voice")
+                    plan = plan_context(
+                        TELKOM_LLM_MODEL,
+                        voice_system,
+                        instruction,
+                        context_candidates=[transcript],
+                        max_output_tokens=voice_budget,
+                    )
                     st.markdown("*Briefing 30 detik (teks):*")
-                    st.write(briefing)
-
+                    text_placeholder = st.empty()
+                    st.markdown("*Audio briefing (diputar per kalimat):*")
+                    audio_area = st.container()
+
+                    def tts_sentence(sentence: str) -> Optional[bytes]:
+                        res = tts(sentence, tts_url, voice="id_female_1")
+                        audio_out_b64 = res.get("audio_base64")
+                        if not audio_out_b64:
+                            return None
+                        try:
+                            return decode_audio_b64(audio_out_b64)
+                        except ValueError:
+                            # base64 rusak → kalimat ini dilewati, kalimat lain tetap diputar
+                            return None
+
+                    # TTS kalimat pertama dimulai selagi LLM masih menulis kalimat berikutnya
+                    tts_queue = TTSQueue(tts_sentence)
+                    splitter = SentenceSplitter()
+                    clips: List[bytes] = []
+
+                    def play_ready(ready_clips):
+                        for clip in ready_clips:
+                            if clip:
+                                timer.mark("first_audio")
+                                audio_area.audio(clip, format="audio/mp3")
+                                clips.append(clip)
+
+                    def briefing_stream():
+                        for piece in stream_telkom_llm(
+                            user_text=f"{instruction}\n\nTeks:\n{plan.context_text()}",
+                            system_prompt=voice_system,
+                            task="voice",
+                            max_tokens=voice_budget,
+                        ):
+                            for sentence in splitter.feed(piece):
+                                tts_queue.submit(sentence)
+                            play_ready(tts_queue.ready())
+                            yield piece
+                        for sentence in splitter.flush():
+                            tts_queue.submit(sentence)
+
+                    briefing = render_stream(briefing_stream(), placeholder=text_placeholder)
                     with st.spinner("Text-to-Speech..."):
-                        tts = call_tts(briefing, voice="id_female_1")
-                    audio_out_b64 = tts.get("audio_base64")
-
-                    if audio_out_b64:
-                        # decode base64 (dengan / tanpa prefix data:)
-                        b64data = (
-                            audio_out_b64.split(",", 1)[1]
-                            if "," in audio_out_b64
-                            else audio_out_b64
+                        play_ready(tts_queue.drain())
+                    if briefing:
+                        sessions.put_artifact(
+                            get_session_id(),
+                            "briefing",
+                            audio_key,
+                            {"text": briefing},
+                            blob=b"".join(clips) or None,
+                        )
+
+                    if clips:
+                        st.download_button(
+                            "⬇ Unduh Audio Briefing",
+                            data=b"".join(clips),
+                            file_name="briefing.mp3",
+                        )
+                        st.caption(
+                            f"⏱ STT {timer.get('stt'):.1f} dtk · "
+                            f"audio pertama {timer.get('first_audio'):.1f} dtk · "
+                            f"total {time.perf_counter() - timer.started:.1f} dtk"
                         )
-                        try:
-                            audio_bytes_out = base64.b64decode(b64data)
-                            st.audio(audio_bytes_out, format="audio/mp3")
-                            st.download_button(
-                                "⬇ Unduh Audio Briefing",
-                                data=audio_bytes_out,
-                                file_name="briefing.mp3",
-                            )
-                        except Exception:
-                            st.info(
-                                "Audio TTS tersedia dalam base64 (tidak bisa diputar otomatis)."
-                            )
-                            st.code(audio_out_b64[:300] + "...")
                     else:
                         st.warning("TTS tidak mengembalikan audio.")
 
@@ -643,3 +1046,9 @@ with tabs[5]:
 
 st.markdown("<hr/>", unsafe_allow_html=True)
 st.caption("© 2025 Telkom ConsultBot (POC) — All-in-One with selectable auth scheme.")
+
+# Pillow (Site Risk) & PyPDF2 (Tender Analyzer) diimpor di latar belakang setelah halaman tampil
+warm_up(["PIL.Image", "PIL.ImageOps", "PyPDF2"])
+
+# Simpan profil rerun ini (mode profiling) dan tampilkan viewer di sidebar
+profiling_panel()